@@ -5,35 +5,17 @@ from models import db, Board, Thought, MeetingMinute, User
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from flask_wtf import CSRFProtect
 import os
-import uuid
+import logging
 import time
+import itertools
 import glob
 import google.generativeai as genai
 from flask import send_from_directory
 
-# Version detection based on file modification times
+# Version of the front end: a hash over the static assets, stable until one of them changes
 def get_app_version():
-    """Generate app version based on modification time of key files"""
-    try:
-        # Key files that indicate app changes
-        files_to_check = [
-            'app.py',
-            'templates/index.html', 
-            'static/js/interactive-mode.js',
-            'prompts/prompts_modified.txt'
-        ]
-        
-        latest_mtime = 0
-        for file_path in files_to_check:
-            if os.path.exists(file_path):
-                file_mtime = os.path.getmtime(file_path)
-                latest_mtime = max(latest_mtime, file_mtime)
-        
-        # Return timestamp as version string, with current time to force refresh
-        return str(int(time.time()))
-    except Exception as e:
-        # Fallback version if file checking fails
-        return str(int(time.time()))
+    """Front-end version for templates; clears browser storage when the assets change"""
+    return asset_manifest.get_version()
 
 # ... other imports ...
 
@@ -52,6 +34,18 @@ MAX_HISTORY_TURNS = 12
 import board_store
 import openai_api
 import gemini_api
+from dedup_index import thought_index
+from search_index import search_index, KINDS as SEARCH_KINDS
+from debug_logger import get_logger, RingBuffer
+from rate_limiter import rate_limited
+from utils.pagination import keyset_page, page_limit, InvalidCursor
+from exporters import stream_export, iter_rows, json_array, json_object, ndjson, export_format, wants_gzip
+from board_import import import_boards, import_json_store, READERS as IMPORT_READERS, detect_format as detect_import_format
+from board_repository import resolve as resolve_board, sql_boards, RevisionConflict, THOUGHT_BATCH_MAX_OPS
+from utils.asset_manifest import asset_manifest, ASSET_MAX_AGE
+from utils.http_cache import revision_etag, revision_from_etags, hashed_etag, conditional
+from minutes_log import minute_log
+from board_events import board_events, BOARD_EVENTS_ENABLED
 
 from sqlalchemy import event
 from sqlalchemy.engine import Engine
@@ -66,6 +60,14 @@ def set_sqlite_pragma(dbapi_connection, connection_record):
 AI_PROVIDER = os.environ.get("AI_PROVIDER", "openai").lower()  # Default to OpenAI, set to 'gemini' to use Gemini
 # Route LLM calls through provider-agnostic facade
 ai_api = llm_provider
+# HTTP status for provider error codes (anything else is a 500)
+AI_ERROR_STATUS = {'insufficient_quota': 429, 'provider_unavailable': 503}
+
+# Structured, leveled loggers (see debug_logger.configure_logging; LOG_LEVEL=DEBUG restores verbose traces)
+log = get_logger('app')
+interactive_log = get_logger('interactive')
+thoughts_log = get_logger('thoughts')
+rules_log = get_logger('rules')
 
 # Helper function to generate version string with AI provider
 def get_version_with_provider():
@@ -73,9 +75,10 @@ def get_version_with_provider():
     provider = AI_PROVIDER.upper()
     return f"{version} ({provider})"
 
-# Debug storage for prompt engineering
-debug_entries = []
-MAX_DEBUG_ENTRIES = 50  # Keep last 50 entries
+# Debug storage for prompt engineering (bounded ring buffer; fields capped at DEBUG_MAX_FIELD_CHARS)
+MAX_DEBUG_ENTRIES = int(os.environ.get('MAX_DEBUG_ENTRIES', '50'))  # Keep last 50 entries
+debug_entries = RingBuffer(MAX_DEBUG_ENTRIES, name='prompt_debug',
+                           sample_rate=float(os.environ.get('PROMPT_DEBUG_SAMPLE_RATE', '1.0')))
 
 def add_debug_entry(user_input, prompt, ai_response, clean_message, suggestions):
     """Store debug information for web-based debug console"""
@@ -90,13 +93,8 @@ def add_debug_entry(user_input, prompt, ai_response, clean_message, suggestions)
         'suggestions': suggestions or []
     }
     
-    debug_entries.append(entry)
-    
-    # Keep only the last MAX_DEBUG_ENTRIES
-    if len(debug_entries) > MAX_DEBUG_ENTRIES:
-        debug_entries.pop(0)
-    
-    print(f"[DEBUG STORAGE] Added entry #{len(debug_entries)}: {user_input[:50]}...", flush=True)
+    seq = debug_entries.append(entry)
+    log.debug("Debug storage: added entry #%s: %.50s", seq, user_input)
 
 app = Flask(__name__)
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///database.db'
@@ -107,20 +105,41 @@ csrf = CSRFProtect(app)
 app.register_blueprint(admin_bp)
 
 # --- Serve files from /prompts for download ---
+# Browsers reuse a download this long, then revalidate it by ETag/Last-Modified; kept
+# short because admins edit the prompts in place
+PROMPT_CACHE_SECONDS = int(os.environ.get('PROMPT_CACHE_SECONDS', '60'))
+
 @app.route('/prompts/<path:filename>')
 def download_prompt_file(filename):
     import os
     prompts_dir = os.path.join(os.path.dirname(__file__), 'prompts')
-    return send_from_directory(prompts_dir, filename, as_attachment=True)
+    return send_from_directory(prompts_dir, filename, as_attachment=True, max_age=PROMPT_CACHE_SECONDS)
 
 
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key')
 
-# Make app version available to all templates
+# Content-hashed asset URLs are computed once, not per page load
+asset_manifest.build()
+
+# Make app version and fingerprinted asset URLs available to all templates
 @app.context_processor
 def inject_app_version():
-    return {'app_version': get_app_version()}
+    return {'app_version': get_app_version(), 'asset_url': asset_manifest.url}
+
+@app.route('/assets/<path:filename>')
+def fingerprinted_asset(filename):
+    """Static JS/CSS under its content-hashed name; the URL changes with the content, so cache it for good"""
+    path = asset_manifest.resolve(filename)
+    if path is None:
+        # A page rendered before the asset changed: point it at the current version
+        current = asset_manifest.current_url(filename)
+        if current is None:
+            return jsonify({'error': 'Not found'}), 404
+        return redirect(current)
+    response = send_from_directory(app.static_folder, path, max_age=ASSET_MAX_AGE)
+    response.cache_control.immutable = True
+    return response
 
 # Register knowledge base endpoint
 app.register_blueprint(kb_blueprint)
@@ -129,12 +148,16 @@ app.register_blueprint(kb_blueprint)
 from get_csrf_token import csrf_token_api
 app.register_blueprint(csrf_token_api)
 
+# Register admin cost analytics API (/admin/costs/report, /admin/costs/import)
+from cost_analytics import cost_analytics_bp
+app.register_blueprint(cost_analytics_bp)
+
 # Increase CSRF token lifetime to 1 hour (3600 seconds)
 app.config['WTF_CSRF_TIME_LIMIT'] = 3600
 
 # --- CSRF Protection (DISABLED FOR EXPERIMENTAL ENVIRONMENT) ---
 # csrf = CSRFProtect(app)  # Temporarily disabled to fix API route issues
-print("[WARNING] CSRF protection is disabled in experimental environment", flush=True)
+log.warning("CSRF protection is disabled in experimental environment")
 
 # Flask-Login setup
 login_manager = LoginManager()
@@ -253,9 +276,8 @@ def facilitator():
         return api_key_check
     if request.method == 'POST':
         # Create new board (database only)
-        print('POST /facilitator form:', request.form)
         title = request.form.get('new_board_title', '').strip()
-        print('Parsed title:', title)
+        log.debug("POST /facilitator new board title: %r", title)
         if title:
             # Only create a board if the user doesn't already have one with this title
             if not Board.query.filter_by(title=title, user_id=current_user.id).first():
@@ -266,64 +288,29 @@ def facilitator():
             return redirect(url_for('facilitator', board_id=Board.query.filter_by(title=title, user_id=current_user.id).first().id))
 
     board_id = request.args.get('board_id')
-    uuid_re = re.compile(r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$')
-    # If board_id is a UUID, load from JSON
-    if board_id and uuid_re.match(str(board_id)):
-        # Load boards from JSON
-        boards = board_store.list_boards()
-        board = board_store.get_board(board_id)
-        if not board:
-            return render_template('index.html', boards=boards, board=None, quadrants={}, thoughts={}, version=get_version_with_provider())
-        # Prepare thoughts dict
-        thoughts = {q: [] for q in ['status', 'goal', 'analysis', 'plan']}
-        for t in board.get('thoughts', []):
-            q = t.get('quadrant')
-            if q in thoughts:
-                thoughts[q].append(t)
-        return render_template('index.html', boards=boards, board=board, quadrants=None, thoughts=thoughts, version=get_version_with_provider())
-    else:
-        # Default: use database
-        board = get_current_board()
-        boards = get_boards()
-        if not board and boards:
-            board = boards[0]  # fallback to first available board
-        
-        # DEBUG: Log board data being passed to template
-        print(f"=== BOARD DATA DEBUG ===")
-        print(f"Board object: {board}")
-        print(f"Board type: {type(board)}")
-        if board:
-            print(f"Board attributes: {dir(board)}")
-            if hasattr(board, 'title'):
-                print(f"Board title: {board.title}")
-            if hasattr(board, 'name'):
-                print(f"Board name: {board.name}")
-            if hasattr(board, 'id'):
-                print(f"Board id: {board.id}")
-        print(f"========================")
-        
-        if not board:
-            return render_template('index.html', boards=[], board=None, quadrants={}, thoughts={}, version=get_version_with_provider())
-        
-        # DEBUG: Log thoughts retrieval
-        print(f"[DEBUG] Retrieving thoughts for board {board.id}...")
-        print(f"[DEBUG] Board.thoughts count: {len(board.thoughts)}")
-        
-        thoughts = {q: [] for q in ['status', 'goal', 'analysis', 'plan']}
-        for i, t in enumerate(board.thoughts):
-            print(f"[DEBUG] Thought {i+1}: '{t.content}' in {t.quadrant} quadrant (id: {t.id})")
-            thoughts[t.quadrant].append(t)
-        
-        print(f"[DEBUG] Final thoughts dict: {[(k, len(v)) for k, v in thoughts.items()]}")
-        return render_template('index.html', boards=boards, board=board, quadrants=None, thoughts=thoughts, version=get_version_with_provider())
+    repo, board_id = resolve_board(board_id)
+    boards = repo.list_boards(current_user.id)
+    # The requested board, or the first one available
+    board = next((b for b in boards if str(b['id']) == str(board_id)), None) if board_id else None
+    if board is None and board_id and repo.kind == 'json':
+        board = repo.get(board_id)
+    if board is None and boards:
+        board = boards[0]
+    log.debug("Facilitator board: %s", board)
+    if not board:
+        return render_template('index.html', boards=boards, board=None, quadrants={}, thoughts={}, version=get_version_with_provider())
+    thoughts = repo.thoughts_by_quadrant(board['id'])
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("Board %s thoughts per quadrant: %s", board['id'], {k: len(v) for k, v in thoughts.items()})
+    return render_template('index.html', boards=boards, board=board, quadrants=None, thoughts=thoughts, version=get_version_with_provider())
 
 
 from flask_wtf.csrf import validate_csrf
 
 @app.route('/interactive_gaps', methods=['POST'])
 @csrf.exempt
+@rate_limited()
 def interactive_gaps():
-    print("Entered /interactive_gaps endpoint", flush=True)
     """
     Route for interactive GAPS AI. Uses GAPS-Coach logic for structured, hybrid conversational output.
     """
@@ -351,7 +338,7 @@ def interactive_gaps():
         data = request.get_json(force=True)
         board_id = data.get('board_id')
         user_input = data.get('user_input', '')
-        print(f"[DEBUG] Parsed user_input: {user_input}", flush=True)
+        interactive_log.debug("Parsed user_input: %s", user_input)
         if not board_id:
             return jsonify({'error': 'Missing board_id'}), 400
         # If user_input is empty, check if this is initial conversation setup
@@ -389,7 +376,7 @@ def interactive_gaps():
         conversation_history = []
         for t in history_turns:
             conversation_history.append({"role": t.role, "content": t.content})
-        print(f"[DEBUG] Loaded conversation_history: {conversation_history}", flush=True)
+        interactive_log.debug("Loaded conversation history: %d turns", len(conversation_history))
 
         # Backend safeguard: Flexible onboarding/intro detection and knowledge base integration
         from utils.knowledge_base import get_kb_section
@@ -527,7 +514,7 @@ def interactive_gaps():
                 f"meaning of {key}"
             ]
             if any(phrase in user_input_lc for phrase in definition_phrases):
-                print(f"[DEBUG] Triggered quadrant explanation for key: {key}", flush=True)
+                interactive_log.debug("Triggered quadrant explanation for key: %s", key)
                 kb_text = get_kb_section(section)
                 if kb_text:
                     db.session.add(ConversationTurn(
@@ -543,28 +530,15 @@ def interactive_gaps():
                         content=kb_text
                     ))
                     db.session.commit()
-                    print(f"[DEBUG] Returning quadrant explanation: {kb_text}", flush=True)
                     return jsonify({"reply": kb_text})
 
         # Use quadrants from POST data if present, otherwise fall back to DB
         quadrants = data.get('quadrants')
         if not quadrants:
-            quadrants = {q: [] for q in ['status', 'goal', 'analysis', 'plan']}
-            from models import Thought
-            thoughts = Thought.query.filter_by(board_id=board_id).all()
-            for t in thoughts:
-                if t.quadrant in quadrants:
-                    quadrants[t.quadrant].append(t.content)
-            # If using board_store (UUID boards), try that as fallback
-            if not thoughts:
-                import board_store
-                board = board_store.get_board(board_id)
-                if board and 'thoughts' in board:
-                    for t in board['thoughts']:
-                        q = t.get('quadrant')
-                        if q in quadrants:
-                            quadrants[q].append(t.get('content', ''))
-        print("[DEBUG] Quadrants being used for LLM (from POST data if present):", quadrants, flush=True)
+            repo, repo_board_id = resolve_board(board_id)
+            quadrants = repo.quadrants(repo_board_id)
+        if interactive_log.isEnabledFor(logging.DEBUG):
+            interactive_log.debug("Quadrant sizes used for LLM: %s", {q: len(items or []) for q, items in quadrants.items()})
         
         # === HYBRID RULE-BASED + AI CATEGORIZATION ===
         # Import debug logger
@@ -572,7 +546,6 @@ def interactive_gaps():
         
         # Get configurable confidence threshold from environment
         RULE_CONFIDENCE_THRESHOLD = float(os.environ.get('RULE_CONFIDENCE_THRESHOLD', '0.7'))
-        print(f"[DEBUG] Rule confidence threshold: {RULE_CONFIDENCE_THRESHOLD}", flush=True)
         debug_logger.log('system', f'Interactive Mode started with threshold: {RULE_CONFIDENCE_THRESHOLD}', {'user_input': user_input[:100]})
         
         # Step 1: Check if input is a question (skip categorization for questions)
@@ -590,20 +563,32 @@ def interactive_gaps():
             return False
         
         is_user_question = is_question(user_input)
-        print(f"[DEBUG] Is question: {is_user_question} ('{user_input[:50]}...')")
-        
+
+        # Generic questions asked on a board in the same state can reuse a cached answer
+        from semantic_cache import semantic_cache
+        if is_user_question:
+            cached = semantic_cache.lookup(user_input, quadrants, has_history=bool(conversation_history))
+            if cached:
+                debug_logger.log('semantic_cache', 'Answered from semantic cache', {
+                    'input': user_input[:100],
+                    'matched': cached['question'],
+                    'similarity': cached['similarity']
+                })
+                db.session.add(ConversationTurn(board_id=board_id, user_id=None, role='assistant', content=cached['answer']))
+                db.session.commit()
+                add_debug_entry(user_input=user_input, prompt='(semantic cache)', ai_response=cached['answer'],
+                                clean_message=cached['answer'], suggestions=[])
+                return jsonify({"reply": cached['answer'], "suggestions": {"add_to_quadrant": []}, "cached": True})
+
         # Step 2: Try rule-based categorization (skip for questions)
         rule_based_suggestion = None
         
-        if is_question(user_input):
-            print(f"[DEBUG] Is question: True ('{user_input[:50]}...')")
-            print("[DEBUG] Skipping rule-based categorization - user asked a question", flush=True)
+        if is_user_question:
             debug_logger.log('question_detection', 'Skipped rule-based categorization', {
                 'input': user_input[:100],
                 'reason': 'User asked a question'
             })
         else:
-            print(f"[DEBUG] Is question: False ('{user_input[:50]}...')")
             debug_logger.log('question_detection', 'Proceeding with categorization', {
                 'input': user_input[:100],
                 'reason': 'Not a question'
@@ -616,7 +601,6 @@ def interactive_gaps():
                 rule_result = categorizer.categorize(user_input)
                 processing_time = (time.time() - start_time) * 1000  # Convert to milliseconds
                 
-                print(f"[DEBUG] Rule-based result: {rule_result['quadrant']} (confidence: {rule_result['confidence']:.2f}, {processing_time:.1f}ms)", flush=True)
                 debug_logger.log('rule_based', f"Categorized as {rule_result['quadrant']}", {
                     'input': user_input[:100],
                     'quadrant': rule_result['quadrant'],
@@ -627,7 +611,6 @@ def interactive_gaps():
                 
                 # Check if confidence is high enough to use rule-based result
                 if rule_result['confidence'] >= RULE_CONFIDENCE_THRESHOLD:
-                    print(f"[DEBUG] High confidence ({rule_result['confidence']:.2f} >= {RULE_CONFIDENCE_THRESHOLD}) - using rule-based categorization", flush=True)
                     debug_logger.log('hybrid_decision', 'Using rule-based categorization', {
                         'confidence': rule_result['confidence'],
                         'threshold': RULE_CONFIDENCE_THRESHOLD,
@@ -638,14 +621,12 @@ def interactive_gaps():
                         'quadrant': rule_result['quadrant']
                     }
                 else:
-                    print(f"[DEBUG] Low confidence ({rule_result['confidence']:.2f} < {RULE_CONFIDENCE_THRESHOLD}) - involving AI for categorization", flush=True)
                     debug_logger.log('hybrid_decision', 'Involving AI for categorization', {
                         'confidence': rule_result['confidence'],
                         'threshold': RULE_CONFIDENCE_THRESHOLD,
                         'reason': 'Low confidence'
                     })
             except Exception as e:
-                print(f"[DEBUG] Rule-based categorization failed: {e}", flush=True)
                 debug_logger.log('error', 'Rule-based categorization failed', {
                     'error': str(e),
                     'input': user_input[:100]
@@ -668,12 +649,8 @@ def interactive_gaps():
         base_prompt = build_conversational_prompt(history_window + [{"role": "user", "content": user_input}], quadrants)
         prompt = base_prompt
         
-        # Removed massive prompt logging to keep Flask log clean
-        print("[DEBUG] Quadrants being sent to LLM:", quadrants, flush=True)
-        print("[DEBUG] User input being processed:", repr(user_input), flush=True)
-        print("[DEBUG] AI Provider:", AI_PROVIDER, flush=True)
-        print("=========================================")
-        
+        interactive_log.debug("Calling %s facilitator (%d prompt chars)", AI_PROVIDER, len(prompt))
+
         # Call the LLM and capture the raw response
         ai_result = conversational_facilitator(prompt, quadrants=quadrants)
 
@@ -681,18 +658,14 @@ def interactive_gaps():
         if isinstance(ai_result, dict) and ai_result.get('action') == 'error':
             err_code = ai_result.get('code') or 'provider_error'
             msg = ai_result.get('message') or 'AI provider error'
-            # Map insufficient quota to 429; others to 500
-            status = 429 if err_code == 'insufficient_quota' else 500
+            # Map insufficient quota to 429, an unavailable provider (open circuit) to 503; others to 500
+            status = AI_ERROR_STATUS.get(err_code, 500)
             return jsonify({
                 'error': err_code,
                 'message': msg
             }), status
         
-        # DEBUG: Print the raw AI response
-        print("\n=== RAW AI RESPONSE ===", flush=True)
-        print("AI Result type:", type(ai_result), flush=True)
-        print("AI Result content:", repr(ai_result), flush=True)
-        print("========================\n", flush=True)
+        interactive_log.debug("Raw AI result: %r", ai_result)
         # Always use the full reply_text (JSON + follow-up) if present
         if isinstance(ai_result, dict) and 'reply_text' in ai_result:
             reply_text = ai_result['reply_text']
@@ -701,66 +674,25 @@ def interactive_gaps():
         else:
             reply_text = str(ai_result)
         # Robustly clean leading/trailing stray characters and extract user-facing message
-        import re
-        import json
+        import llm_json
         def extract_json_and_message(reply_text):
-            import json
-            import re
-            reply_text = reply_text.lstrip()
-            
-            # Handle markdown-wrapped JSON (e.g., ```json {...} ```)
-            markdown_match = re.search(r'```(?:json)?\s*({.*?})\s*```', reply_text, re.DOTALL)
-            if markdown_match:
-                json_part = markdown_match.group(1)
-                # Get text before and after the markdown block
-                before_json = reply_text[:markdown_match.start()].strip()
-                after_json = reply_text[markdown_match.end():].strip()
-                message_part = (before_json + ' ' + after_json).strip()
-                try:
-                    parsed_json = json.loads(json_part)
-                    return parsed_json, message_part
-                except Exception as e:
-                    print(f"[DEBUG] Failed to parse markdown-wrapped JSON: {e}", flush=True)
-                    # Fall through to regular processing
-            
-            # Handle regular JSON at start of text
-            if reply_text.startswith('{') or reply_text.startswith('['):
-                stack = []
-                end = None
-                for i, c in enumerate(reply_text):
-                    if c in '{[':
-                        stack.append(c)
-                    elif c in '}]':
-                        if stack:
-                            open_c = stack.pop()
-                            # Check for matching pairs
-                            if (open_c == '{' and c != '}') or (open_c == '[' and c != ']'):
-                                break
-                        if not stack:
-                            end = i + 1
-                            break
-                if end:
-                    json_part = reply_text[:end]
-                    # More careful message extraction - only strip leading whitespace and newlines
-                    message_part = reply_text[end:].lstrip(' \n\t')
-                    try:
-                        parsed_json = json.loads(json_part)
-                        # If there's no conversational message after JSON, provide a default response
-                        if not message_part.strip():
-                            message_part = "I'd suggest reviewing the categorizations above. Does that placement work for you?"
-                    except Exception as e:
-                        print(f"[DEBUG] Failed to parse JSON from AI reply: {e}", flush=True)
-                        parsed_json = None
-                    return parsed_json, message_part.strip()
-            # If no JSON at the start, just return the message
-            return None, reply_text.strip()
-        suggestions, reply_text_clean = extract_json_and_message(reply_text)
-        
-        # === PROMPT ENGINEERING DEBUG: JSON EXTRACTION ===
-        print(f"\n🔍 JSON EXTRACTION RESULTS:", flush=True)
-        print(f"   📊 Extracted JSON: {suggestions}", flush=True)
-        print(f"   💬 Clean Message: '{reply_text_clean}'", flush=True)
+            # Single-pass tolerant parse of the JSON block (fenced or bare) plus surrounding prose
+            parsed_json, message_part = llm_json.split_json_and_message(reply_text, expect=dict)
+            # If there's no conversational message after JSON, provide a default response
+            if parsed_json is not None and not message_part:
+                message_part = "I'd suggest reviewing the categorizations above. Does that placement work for you?"
+            return parsed_json, message_part
+        if isinstance(ai_result, dict) and isinstance(ai_result.get('suggestions'), dict):
+            # Provider returned structured output; no need to scrape the text
+            suggestions = ai_result['suggestions']
+            reply_text_clean = (ai_result.get('message') or '').strip()
+            if not reply_text_clean and suggestions.get('add_to_quadrant'):
+                reply_text_clean = "I'd suggest reviewing the categorizations above. Does that placement work for you?"
+        else:
+            suggestions, reply_text_clean = extract_json_and_message(reply_text)
         
+        interactive_log.debug("Extracted JSON: %s; clean message: %r", suggestions, reply_text_clean)
+
         # === HYBRID INTEGRATION: DISABLED ===
         # Rule-based suggestion injection has been disabled to allow LLM full control
         # over both conversational flow and categorization, matching prompt testing tool behavior
@@ -780,132 +712,20 @@ def interactive_gaps():
         #         # Prepend rule-based suggestion to any AI suggestions
         #         suggestions['add_to_quadrant'].insert(0, rule_based_suggestion)
         #     
-        #     print(f"[DEBUG] Injected rule-based suggestion: {rule_based_suggestion}", flush=True)
+        #     interactive_log.debug("Injected rule-based suggestion: %s", rule_based_suggestion)
         
         # Filter out meta-conversational suggestions and duplicates from JSON
         if suggestions and 'add_to_quadrant' in suggestions:
-            meta_filters = [
-                'quadrants are currently empty',
-                'quadrants are empty', 
-                'user requested a summary',
-                'user requested recommendations',
-                'provide recommendations for how to proceed',
-                'need recommendations',
-                'should start with goals',
-                'should start with',
-                'recommendations for how to proceed',
-                # Greeting and conversational content filters
-                'i can help you solve problems',
-                'what gap is on your mind',
-                'what problem are you hoping to solve',
-                'tell me about your goals',
-                'which area would you like to start',
-                'anything more for goals',
-                'anything else you want to add',
-                'ok? anything more',
-                'want to move or edit it',
-                'edit wording or move it',
-                'how do you think this might be impacting',
-                'what do you think about',
-                'does that sound right',
-                'make sense?',
-                'sound good?',
-                'i see you have a goal',
-                'what would you like to work on next',
-                'goals, status, analysis, or plans',
-                'which quadrant should we work on',
-                'what should we focus on'
-            ]
-            
-            # Build list of existing quadrant items for duplicate detection
-            existing_items = set()
-            for quadrant_name, items in quadrants.items():
-                for item in items:
-                    # Normalize for comparison (lowercase, strip whitespace)
-                    normalized_item = item.lower().strip()
-                    existing_items.add(normalized_item)
-            
-            print(f"[DEBUG] Existing quadrant items for duplicate check: {len(existing_items)} items", flush=True)
-            debug_logger.log('filtering', f'Starting suggestion filtering', {
-                'total_suggestions': len(suggestions['add_to_quadrant']),
-                'existing_items_count': len(existing_items)
-            })
-            
-            filtered_suggestions = []
-            seen_suggestions = set()  # Track suggestions to avoid rule-based + AI duplicates
-            
-            for suggestion in suggestions['add_to_quadrant']:
-                thought_text = suggestion.get('thought', '').lower().strip()
-                
-                # Check for meta-conversational content
-                is_meta = any(meta_phrase in thought_text for meta_phrase in meta_filters)
-                if is_meta:
-                    print(f"[DEBUG] Filtered out meta-suggestion: {suggestion['thought']}", flush=True)
-                    debug_logger.log('filtering', 'Filtered meta-suggestion', {
-                        'suggestion': suggestion['thought'][:100],
-                        'reason': 'Meta-conversational content'
-                    })
-                    continue
-                
-                # Check for duplicates against existing quadrant items
-                is_duplicate = thought_text in existing_items
-                if is_duplicate:
-                    print(f"[DEBUG] Filtered out duplicate suggestion: {suggestion['thought']}", flush=True)
-                    debug_logger.log('filtering', 'Filtered duplicate suggestion', {
-                        'suggestion': suggestion['thought'][:100],
-                        'reason': 'Already exists in quadrants'
-                    })
-                    continue
-                
-                # Check for semantic duplicates between rule-based and AI suggestions
-                # Create a normalized version for comparison
-                normalized_text = ' '.join(thought_text.split())  # Remove extra whitespace
-                # Remove common prefixes/suffixes that might differ
-                for prefix in ['i want to ', 'we need to ', 'goal is to ', 'plan to ']:
-                    if normalized_text.startswith(prefix):
-                        normalized_text = normalized_text[len(prefix):]
-                        break
-                
-                # Check if we've seen a similar suggestion already
-                is_semantic_duplicate = False
-                for seen_text in seen_suggestions:
-                    # Simple similarity check - if 80% of words overlap, consider duplicate
-                    seen_words = set(seen_text.split())
-                    current_words = set(normalized_text.split())
-                    if len(current_words) > 0 and len(seen_words) > 0:
-                        overlap = len(seen_words.intersection(current_words))
-                        similarity = overlap / max(len(seen_words), len(current_words))
-                        if similarity >= 0.8:  # 80% similarity threshold
-                            is_semantic_duplicate = True
-                            print(f"[DEBUG] Filtered out semantic duplicate: '{suggestion['thought']}' (similar to previous suggestion)", flush=True)
-                            debug_logger.log('filtering', 'Filtered semantic duplicate', {
-                                'suggestion': suggestion['thought'][:100],
-                                'similarity': round(similarity, 2),
-                                'reason': 'Similar to previous suggestion'
-                            })
-                            break
-                
-                if is_semantic_duplicate:
-                    continue
-                
-                # Keep non-meta, non-duplicate suggestions
-                seen_suggestions.add(normalized_text)
-                filtered_suggestions.append(suggestion)
-                debug_logger.log('filtering', 'Kept suggestion', {
-                    'suggestion': suggestion['thought'][:100],
-                    'quadrant': suggestion.get('quadrant', 'unknown')
-                })
-            
+            from suggestion_filter import suggestion_filter
+            known_duplicate = None
+            if str(board_id).isdigit():
+                # DB boards: also consult the persistent near-duplicate index
+                known_duplicate = lambda text: thought_index.is_duplicate(board_id, text)
+            filtered_suggestions = suggestion_filter.filter(suggestions['add_to_quadrant'], quadrants, board_id=board_id,
+                                                            known_duplicate=known_duplicate)
             suggestions['add_to_quadrant'] = filtered_suggestions
-            print(f"[DEBUG] After filtering: {len(filtered_suggestions)} suggestions remain", flush=True)
-            debug_logger.log('filtering', 'Filtering complete', {
-                'final_suggestions_count': len(filtered_suggestions),
-                'filtered_out_count': len(suggestions_before_filter) - len(filtered_suggestions) if 'suggestions_before_filter' in locals() else 'unknown'
-            })
-        
-        print(f"[DEBUG] Final reply_text (raw): {reply_text}", flush=True)
-        print(f"[DEBUG] Final reply_text (cleaned): {reply_text_clean}", flush=True)
-        print(f"[DEBUG] Suggestions parsed (after filtering): {suggestions}", flush=True)
+            interactive_log.debug("After filtering: %d suggestions remain", len(filtered_suggestions))
+
         # Save conversation turn for context continuity (just the message)
         db.session.add(ConversationTurn(
             board_id=board_id,
@@ -967,18 +787,14 @@ def interactive_gaps():
                     reply_text = f"{json_str}\n\n" + reply_text
                     patched = True
         if patched:
-            print("[BACKEND PATCH] Prepended missing JSON to AI reply:", reply_text, flush=True)
+            interactive_log.info("Prepended missing JSON to AI reply for board %s", board_id)
 
-        # === PROMPT ENGINEERING DEBUG: FINAL OUTPUT ===
-        print(f"\n🎆 FINAL OUTPUT TO USER:", flush=True)
-        print(f"   💬 Message to User: '{reply_text_clean}'", flush=True)
         # Safe handling of suggestions that might be None
         suggestions_list = suggestions.get('add_to_quadrant', []) if suggestions else []
-        print(f"   📊 Suggestions Count: {len(suggestions_list)}", flush=True)
-        if suggestions_list:
-            for i, suggestion in enumerate(suggestions_list):
-                print(f"   📝 Suggestion {i+1}: {suggestion.get('quadrant', 'unknown').upper()} - '{suggestion.get('thought', 'unknown')}'", flush=True)
-        print("="*80 + "\n", flush=True)
+        if is_user_question and not patched:
+            semantic_cache.store(user_input, quadrants, reply_text_clean, suggestions=suggestions_list,
+                                 has_history=bool(conversation_history))
+        interactive_log.debug("Final output: %d suggestions, message %r", len(suggestions_list), reply_text_clean)
         
         # Store debug information for web-based console
         suggestions_for_debug = []
@@ -1003,26 +819,52 @@ def interactive_gaps():
             suggestions = {"add_to_quadrant": []}
         return jsonify({"reply": reply_text_clean, "suggestions": suggestions})
     except Exception as e:
-        print(f"[DEBUG] Exception caught in /interactive_gaps: {e}", flush=True)
+        interactive_log.exception("Exception caught in /interactive_gaps: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @app.route('/get_quadrants')
 def get_quadrants():
-    board_id = request.args.get('board_id')
-    quadrants = {q: [] for q in ['status', 'goal', 'analysis', 'plan']}
-    from models import Thought
-    thoughts = Thought.query.filter_by(board_id=board_id).all()
-    for t in thoughts:
-        if t.quadrant in quadrants:
-            quadrants[t.quadrant].append(t.content)
-    return jsonify(quadrants)
+    repo, board_id = resolve_board(request.args.get('board_id'))
+    validators = repo.validators(board_id)
+    if validators is None:
+        return jsonify(repo.quadrants(board_id))
+    # Unchanged since the client's copy: skip loading and serializing the thoughts
+    return conditional(lambda: jsonify(repo.quadrants(board_id)),
+                       revision_etag(validators['revision']), validators['updated_at'])
+
+
+def expected_revision(data):
+    """
+    Board revision a write was based on: 'revision' in the JSON body or the If-Match
+    ETag from a board read. None skips the check.
+    """
+    value = (data or {}).get('revision')
+    if value is None:
+        return revision_from_etags(request.if_match)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def revision_conflict(e):
+    """409 for a write based on an old board revision; the client reloads the board and retries."""
+    thoughts_log.info("Revision conflict on board %s: expected %s, now %s", e.board_id, e.expected, e.current)
+    return jsonify({'success': False, 'error': 'The board was changed by someone else; reload it and try again.',
+                    'conflict': True, 'revision': e.current}), 409
+
+
+def with_revision(response, repo, board_id):
+    """Add the revision the write left the board at, for the client's next write."""
+    revision = repo.committed_revision(board_id)
+    if revision is not None:
+        response['revision'] = revision
+    return response
 
 @app.route('/export_conversation', methods=['POST'])
 @login_required
 def export_conversation():
     # ...
-    from flask import send_file
-    import io, json
     from models import ConversationTurn, Board
     data = request.get_json(force=True)
     board_id = data.get('board_id')
@@ -1031,28 +873,36 @@ def export_conversation():
     board = Board.query.get(board_id)
     if not board or board.user_id != current_user.id:
         return jsonify({'error': 'Not authorized'}), 403
-    turns = ConversationTurn.query.filter_by(board_id=board_id).order_by(ConversationTurn.timestamp).all()
-    out = [
-        {
+    def serialize(t):
+        return {
             'id': t.id,
             'role': t.role,
             'content': t.content,
             'timestamp': t.timestamp.isoformat() if t.timestamp else None
-        } for t in turns
-    ]
-    buf = io.BytesIO()
-    buf.write(json.dumps(out, indent=2).encode('utf-8'))
-    buf.seek(0)
-    filename = f'conversation_log_board_{board_id}.json'
-    return send_file(
-        buf,
-        mimetype='application/json',
-        as_attachment=True,
-        download_name=filename
-    )
+        }
+    turns_query = ConversationTurn.query.filter_by(board_id=board_id)
+    # With limit or cursor, return one page of turns as JSON instead of the whole log as a file
+    if 'limit' in data or 'cursor' in data:
+        limit = page_limit(data.get('limit'))
+        try:
+            turns, next_cursor = keyset_page(turns_query, [ConversationTurn.id], data.get('cursor'), limit)
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify({'turns': [serialize(t) for t in turns], 'limit': limit, 'next_cursor': next_cursor})
+    # The full download is streamed from a server-side cursor (?format=ndjson for one turn per line)
+    fmt = export_format(data.get('format') or request.args.get('format'))
+    if fmt is None:
+        return jsonify({'error': 'Unknown format'}), 400
+    rows = iter_rows(db.session.query(ConversationTurn.id, ConversationTurn.role, ConversationTurn.content,
+                                      ConversationTurn.timestamp)
+                     .filter(ConversationTurn.board_id == board_id).order_by(ConversationTurn.id))
+    items = (serialize(t) for t in rows)
+    filename = f'conversation_log_board_{board_id}.{fmt}'
+    return stream_export(json_array(items) if fmt == 'json' else ndjson(items), filename, fmt, wants_gzip(request))
 
 @app.route('/summarize_conversation', methods=['POST'])
 @login_required
+@rate_limited()
 def summarize_conversation_route():
     try:
         from summarize_utils import summarize_conversation
@@ -1140,13 +990,11 @@ def logout():
 @app.route('/add_thought', methods=['POST'])
 @login_required
 def add_thought():
-    print("=== ENTERED ADD_THOUGHT ROUTE ===")
     data = request.get_json()
-    print("/add_thought received data:", data)
+    thoughts_log.debug("/add_thought received data: %s", data)
     content = data.get('content', '').strip()
     quadrant = data.get('quadrant', '')
     board_id = data.get('board_id')
-    uuid_re = re.compile(r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$')
     # Normalize quadrant names to singular
     quadrant_map = {
         'statuses': 'status',
@@ -1163,149 +1011,141 @@ def add_thought():
     if quadrant == 'auto' or not quadrant:
         quadrant = 'status'
     if not (content and board_id):
-        print("Returning error: Missing content or board_id")
         return jsonify({'success': False, 'error': 'Missing content or board_id'}), 400
-    if uuid_re.match(str(board_id)):
-        # JSON board
-        try:
-            board = board_store.get_board(board_id)
-            print("DEBUG: Looking for board_id:", board_id)
-            if hasattr(board_store, 'list_board_ids'):
-                print("DEBUG: All board IDs:", board_store.list_board_ids())
-            else:
-                print("DEBUG: board_store has no 'list_board_ids' method.")
-            if not board:
-                print("Returning error: Board not found")
-                return jsonify({'success': False, 'error': 'Board not found'}), 404
-            thoughts = board.get('thoughts', [])
-            new_id = str(uuid.uuid4())
-            new_thought = {'id': new_id, 'content': content, 'quadrant': quadrant}
-            thoughts.append(new_thought)
-            board['thoughts'] = thoughts
-            board_store.save_board(board)
-            print("Returning success: JSON board thought added")
-            return jsonify({'success': True, 'thought': new_thought})
-        except Exception as e:
-            import traceback
-            print('IN JSON BOARD EXCEPTION HANDLER')
-            print('ADD_THOUGHT ERROR (JSON board):', e)
-            traceback.print_exc()
-            print("Returning error: Exception in JSON board flow")
-            return jsonify({'success': False, 'error': str(e)}), 500
-    # DB board
-    if quadrant not in ['status', 'goal', 'analysis', 'plan']:
-        quadrant = 'status'
+    repo, board_id = resolve_board(board_id)
     try:
-        # Prevent duplicate: same content, quadrant, and board_id
-        existing = Thought.query.filter_by(content=content, quadrant=quadrant, board_id=board_id).first()
-        if existing:
-            print("Duplicate thought detected; not adding.")
+        if repo.get(board_id) is None:
+            thoughts_log.info("add_thought: %s board %s not found", repo.kind, board_id)
+            return jsonify({'success': False, 'error': 'Board not found'}), 404
+        # Prevent duplicate: same normalized content, quadrant, and board_id (hash index lookup)
+        exact, near_duplicates = repo.find_duplicates(board_id, content, quadrant)
+        if exact:
+            thoughts_log.debug("Duplicate thought detected on board %s; not adding", board_id)
             return jsonify({'success': False, 'error': 'Duplicate thought: this thought already exists in this quadrant.'}), 409
-        thought = Thought(content=content, quadrant=quadrant, board_id=board_id)
-        db.session.add(thought)
-        db.session.commit()
-        minute = MeetingMinute(board_id=board_id, action='add', detail=f"Added thought: '{content}' to '{quadrant}'")
-        db.session.add(minute)
-        db.session.commit()
-        print("Returning success: DB board thought added")
-        return jsonify({'success': True, 'thought': {'id': thought.id, 'content': thought.content, 'quadrant': thought.quadrant}})
+        # Near-duplicates are allowed but reported so the UI can warn
+        thought = repo.add_thought(board_id, content, quadrant, expected_revision=expected_revision(data))
+        response = {'success': True, 'thought': thought}
+        if near_duplicates:
+            response['near_duplicates'] = [{'id': tid, 'similarity': sim} for tid, sim in near_duplicates]
+        return jsonify(with_revision(response, repo, board_id))
+    except RevisionConflict as e:
+        return revision_conflict(e)
     except Exception as e:
-        print('IN DB BOARD EXCEPTION HANDLER')
-        print('ADD_THOUGHT ERROR (DB board):', e)
-        import traceback
-        traceback.print_exc()
-        print("Returning error: Exception in DB board flow")
+        thoughts_log.exception("add_thought error (%s board): %s", repo.kind, e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/move_thought', methods=['POST'])
 def move_thought():
-    print("=== ENTERED MOVE_THOUGHT ROUTE ===")
     # ... existing code ...
-    import re
     data = request.get_json()
     thought_id = data.get('thought_id')
     new_quadrant = data.get('quadrant')
     board_id = data.get('board_id')
-    uuid_re = re.compile(r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$')
     if not (thought_id and new_quadrant and board_id):
         return jsonify({'success': False, 'error': 'Missing data'}), 400
-    if uuid_re.match(str(board_id)):
-        # JSON board
-        board = board_store.get_board(board_id)
-        if not board:
-            return jsonify({'success': False, 'error': 'Board not found'}), 404
-        found = False
-        for t in board.get('thoughts', []):
-            if str(t.get('id')) == str(thought_id):
-                t['quadrant'] = new_quadrant
-                found = True
-                break
-        if found:
-            board_store.save_board(board)
-            return jsonify({'success': True})
-        else:
-            return jsonify({'success': False, 'error': 'Thought not found'}), 404
-    else:
-        # DB board
-        thought = Thought.query.get(thought_id)
-        if thought and new_quadrant in ['status', 'goal', 'analysis', 'plan']:
-            old_quadrant = thought.quadrant
-            thought.quadrant = new_quadrant
-            db.session.commit()
-            # Log meeting minute
-            minute = MeetingMinute(board_id=board_id, action='move', detail=f"Moved thought ID {thought_id} from '{old_quadrant}' to '{new_quadrant}'")
-            db.session.add(minute)
-            db.session.commit()
-            return jsonify({'success': True})
-    return jsonify({'success': False}), 400
+    if new_quadrant not in ['status', 'goal', 'analysis', 'plan']:
+        return jsonify({'success': False, 'error': 'Invalid quadrant'}), 400
+    repo, board_id = resolve_board(board_id)
+    try:
+        moved = repo.move_thought(board_id, thought_id, new_quadrant, expected_revision=expected_revision(data))
+    except RevisionConflict as e:
+        return revision_conflict(e)
+    if moved:
+        return jsonify(with_revision({'success': True}, repo, board_id))
+    return jsonify({'success': False, 'error': 'Thought not found'}), 404
 
 @app.route('/delete_thought', methods=['POST'])
 def delete_thought():
-    print("=== ENTERED DELETE_THOUGHT ROUTE ===", flush=True)
     data = request.get_json()
-    print(f"[DEBUG] Delete thought received data: {data}", flush=True)
     thought_id = data.get('thought_id')
-    print(f"[DEBUG] Looking for thought_id: {thought_id}", flush=True)
-    
-    if not thought_id:
-        print("[DEBUG] No thought_id provided", flush=True)
-        return jsonify({'success': False, 'error': 'No thought_id provided'}), 400
-    
-    thought = Thought.query.get(thought_id)
-    print(f"[DEBUG] Found thought: {thought}", flush=True)
-    
-    if thought:
-        board_id = thought.board_id
-        print(f"[DEBUG] Deleting thought {thought_id} from board {board_id}", flush=True)
-        db.session.delete(thought)
-        db.session.commit()
-        # Log meeting minute
-        minute = MeetingMinute(board_id=board_id, action='delete', detail=f"Deleted thought ID {thought_id}")
-        db.session.add(minute)
-        db.session.commit()
-        print(f"[DEBUG] Successfully deleted thought {thought_id}", flush=True)
-        return jsonify({'success': True})
-    
-    print(f"[DEBUG] Thought {thought_id} not found in database", flush=True)
-    return jsonify({'success': False, 'error': f'Thought {thought_id} not found'}), 400
+    board_id = data.get('board_id')
+    thoughts_log.debug("Delete thought requested: %s (board %s)", thought_id, board_id)
+    if not (thought_id and board_id):
+        return jsonify({'success': False, 'error': 'Missing thought_id or board_id'}), 400
+    repo, board_id = resolve_board(board_id)
+    try:
+        deleted = repo.delete_thought(board_id, thought_id, expected_revision=expected_revision(data))
+    except RevisionConflict as e:
+        return revision_conflict(e)
+    if deleted:
+        thoughts_log.debug("Deleted thought %s from %s board %s", thought_id, repo.kind, board_id)
+        return jsonify(with_revision({'success': True}, repo, board_id))
+    thoughts_log.info("Thought %s not found on %s board %s", thought_id, repo.kind, board_id)
+    return jsonify({'success': False, 'error': f'Thought {thought_id} not found'}), 404
 
 @app.route('/update_thought', methods=['POST'])
 def update_thought():
-    # ... existing code ...
     data = request.get_json()
     thought_id = data.get('thought_id')
     content = data.get('content', '').strip()
-    thought = Thought.query.get(thought_id)
-    if thought and content:
-        old_content = thought.content
-        thought.content = content
-        db.session.commit()
-        # Log meeting minute
-        minute = MeetingMinute(board_id=thought.board_id, action='edit', detail=f"Edited thought ID {thought_id}: '{old_content}' → '{content}'")
-        db.session.add(minute)
-        db.session.commit()
-        return jsonify({'success': True})
-    return jsonify({'success': False}), 400
+    board_id = data.get('board_id')
+    if not (thought_id and content and board_id):
+        return jsonify({'success': False, 'error': 'Missing data'}), 400
+    repo, board_id = resolve_board(board_id)
+    try:
+        updated = repo.update_thought(board_id, thought_id, content, expected_revision=expected_revision(data))
+    except RevisionConflict as e:
+        return revision_conflict(e)
+    if updated:
+        return jsonify(with_revision({'success': True}, repo, board_id))
+    return jsonify({'success': False, 'error': 'Thought not found'}), 404
+
+@app.route('/thoughts/batch', methods=['POST'])
+@login_required
+def thoughts_batch():
+    """
+    Apply several thought operations to one board in a single transaction with one
+    meeting minute: {"board_id", "ops": [{"op": "add"|"move"|"update"|"delete", ...}],
+    "atomic": false}. Each op gets a result; with atomic, none apply if any fails.
+    """
+    data = request.get_json(silent=True) or {}
+    board_id = data.get('board_id')
+    ops = data.get('ops')
+    if not board_id or not isinstance(ops, list) or not ops:
+        return jsonify({'success': False, 'error': 'Missing board_id or ops'}), 400
+    if len(ops) > THOUGHT_BATCH_MAX_OPS:
+        return jsonify({'success': False, 'error': f'At most {THOUGHT_BATCH_MAX_OPS} operations per batch'}), 400
+    repo, board_id = resolve_board(board_id)
+    board = repo.get(board_id)
+    if board is None:
+        return jsonify({'success': False, 'error': 'Board not found'}), 404
+    if repo.kind == 'db' and board['user_id'] != current_user.id:
+        return jsonify({'success': False, 'error': 'Not authorized'}), 403
+    try:
+        results = repo.apply_batch(board['id'], ops, atomic=bool(data.get('atomic')),
+                                   expected_revision=expected_revision(data))
+    except RevisionConflict as e:
+        return revision_conflict(e)
+    except Exception as e:
+        db.session.rollback()
+        thoughts_log.exception("thoughts_batch error (%s board %s): %s", repo.kind, board_id, e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+    applied = sum(1 for r in results if r['success'])
+    thoughts_log.debug("Batch on %s board %s: %d of %d ops applied", repo.kind, board_id, applied, len(ops))
+    return jsonify(with_revision({'success': applied == len(results), 'applied': applied, 'results': results},
+                                 repo, board['id']))
+
+@app.route('/boards/<board_id>/events')
+@login_required
+def board_event_stream(board_id):
+    """
+    Server-Sent Events stream of the board's changes (thought_added, thought_moved,
+    thought_updated, thought_deleted, board_renamed, board_deleted; 'resync' when the
+    client must refetch). Reconnects resume from the Last-Event-ID header.
+    """
+    from flask import Response
+    if not BOARD_EVENTS_ENABLED:
+        return jsonify({'success': False, 'error': 'Board events are disabled'}), 404
+    repo, board_id = resolve_board(board_id)
+    board = repo.get(board_id)
+    if board is None:
+        return jsonify({'success': False, 'error': 'Board not found'}), 404
+    if repo.kind == 'db' and board['user_id'] != current_user.id:
+        return jsonify({'success': False, 'error': 'Not authorized'}), 403
+    # The stream holds no database connection: the board was checked above
+    stream = board_events.stream(board['id'], request.headers.get('Last-Event-ID'))
+    return Response(stream, mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/export_board')
 def export_board():
@@ -1313,48 +1153,25 @@ def export_board():
     if not board_id:
         return jsonify({'success': False, 'error': 'No board_id provided'}), 400
     
-    # Check if it's a UUID (JSON board) or integer (DB board)
-    import re
-    import json
-    from flask import Response
-    uuid_re = re.compile(r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$')
+    fmt = export_format(request.args.get('format'))
+    if fmt is None:
+        return jsonify({'success': False, 'error': 'Unknown format'}), 400
+
+    repo, board_id = resolve_board(board_id)
+    board = repo.get(board_id)
+    if not board:
+        return jsonify({'success': False, 'error': 'Board not found'}), 404
+    header = {'success': True, 'title': board['title']}
+    thoughts = repo.iter_thoughts(board_id)
+    filename = f"{(board['title'] or 'board').replace(' ', '_')}_{str(board_id)[:8]}.{fmt}"
     
-    if uuid_re.match(str(board_id)):
-        # JSON board
-        board = board_store.get_board(board_id)
-        if not board:
-            return jsonify({'success': False, 'error': 'Board not found'}), 404
-        board_data = board
-        filename = f"{board.get('title', 'board')}_{board_id[:8]}.json"
+    # Stream the download: the board document with its thoughts array written item by item,
+    # or NDJSON with the board fields on the first line and one thought per line
+    if fmt == 'ndjson':
+        pieces = itertools.chain(ndjson([{'type': 'board', **header}]), ndjson(thoughts))
     else:
-        # DB board
-        try:
-            board_id_int = int(board_id)
-            board = Board.query.get(board_id_int)
-            if not board:
-                return jsonify({'success': False, 'error': 'Board not found'}), 404
-            thoughts = [
-                {'id': t.id, 'content': t.content, 'quadrant': t.quadrant}
-                for t in board.thoughts
-            ]
-            board_data = {'success': True, 'title': board.title, 'thoughts': thoughts}
-            filename = f"{board.title.replace(' ', '_')}_{board_id}.json"
-        except ValueError:
-            return jsonify({'success': False, 'error': 'Invalid board_id format'}), 400
-    
-    # Create downloadable JSON response
-    json_output = json.dumps(board_data, indent=2, ensure_ascii=False)
-    
-    response = Response(
-        json_output,
-        mimetype='application/json',
-        headers={
-            'Content-Disposition': f'attachment; filename="{filename}"',
-            'Content-Type': 'application/json; charset=utf-8'
-        }
-    )
-    
-    return response
+        pieces = json_object(header, 'thoughts', thoughts)
+    return stream_export(pieces, filename, fmt, wants_gzip(request))
 
 @app.route('/import_board', methods=['POST'])
 def import_board():
@@ -1364,61 +1181,65 @@ def import_board():
         thoughts = data.get('thoughts', [])
         if not title or not isinstance(thoughts, list):
             return jsonify({'success': False, 'error': 'Invalid data'}), 400
-        # Create new board with unique title
-        orig_title = title
-        i = 1
-        while Board.query.filter_by(title=title).first():
-            title = f"{orig_title} ({i})"
-            i += 1
         # Ensure user is authenticated
         if not current_user.is_authenticated:
             return jsonify({'success': False, 'error': 'User not logged in'}), 401
-        board = Board(title=title, user_id=current_user.id)
-        db.session.add(board)
-        db.session.commit()
-        for t in thoughts:
-            if t.get('content') and t.get('quadrant') in ['status', 'goal', 'analysis', 'plan']:
-                thought = Thought(content=t['content'], quadrant=t['quadrant'], board_id=board.id)
-                db.session.add(thought)
-        db.session.commit()
-        return jsonify({'success': True, 'board_id': board.id, 'title': board.title})
+        # Same pipeline as /import_boards: unique title, thoughts with a valid quadrant inserted in one batch
+        events = list(import_boards([('board 1', data)], current_user.id))
+        if events[-1]['type'] == 'error' or not events[0].get('created'):
+            return jsonify({'success': False, 'error': events[-1].get('error') or 'Invalid data'}), 400
+        created = events[0]['created'][0]
+        return jsonify({'success': True, 'board_id': created['board_id'], 'title': created['title']})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 400
 
+@app.route('/import_boards', methods=['POST'])
+@login_required
+def import_boards_bulk():
+    """
+    Bulk import of many boards from a JSON, NDJSON or CSV body or file upload (?format= or
+    detected from the file name / content type; ?store=json for the JSON board store).
+    Streams NDJSON progress events, one per committed chunk, ending with 'done' or 'error'.
+    """
+    from flask import Response, stream_with_context
+    upload = request.files.get('file')
+    fmt = request.args.get('format') or detect_import_format(upload.filename if upload else '',
+                                                             upload.mimetype if upload else request.content_type)
+    if fmt not in IMPORT_READERS:
+        return jsonify({'success': False, 'error': 'Unknown format'}), 400
+    store = request.args.get('store', 'db')
+    if store not in ('db', 'json'):
+        return jsonify({'success': False, 'error': 'Unknown store'}), 400
+    records = IMPORT_READERS[fmt](upload.stream if upload else request.stream)
+    events = import_json_store(records) if store == 'json' else import_boards(records, current_user.id)
+    return Response(stream_with_context(ndjson(events)), content_type='application/x-ndjson; charset=utf-8')
+
 @app.route('/classify_thought', methods=['POST'])
+@rate_limited()
 def classify_thought():
-    import traceback
-    print("=== classify_thought route called ===")
     data = request.get_json()
     content = data.get('content', '').strip()
-    print(f"Received content: {content}")
     if not content:
-        print("No content provided to classify_thought")
         return jsonify({'success': False, 'error': 'No content provided'}), 400
     try:
-        print(f"AI_PROVIDER: {AI_PROVIDER}")
         # Use the pluggable AI backend
         if AI_PROVIDER == 'gemini':
             result = ai_api.classify_thought_with_gemini(content)
         else:
             result = ai_api.classify_thought_with_openai(content)
-        print(f"AI result: {result}")
+        thoughts_log.debug("classify_thought (%s) result: %s", AI_PROVIDER, result)
         if isinstance(result, list):
             # Multiple thoughts returned
-            print(f"Returning multiple thoughts: {result}")
             return jsonify({'success': True, 'thoughts': result})
         else:
             quadrant = result.get('quadrant')
             thought = result.get('thought', content)
             if quadrant in ['status', 'goal', 'analysis', 'plan']:
-                print(f"Returning: quadrant={quadrant}, thought={thought}")
                 return jsonify({'success': True, 'quadrant': quadrant, 'thought': thought})
             else:
-                print("AI did not return a valid quadrant")
                 return jsonify({'success': False, 'error': 'AI did not return a valid quadrant'}), 200
     except Exception as e:
-        print("ERROR in classify_thought:", e)
-        traceback.print_exc()
+        thoughts_log.exception("Error in classify_thought: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
@@ -1426,24 +1247,58 @@ def classify_thought():
 @app.route('/list_boards', methods=['GET'])
 @login_required
 def list_boards_json():
-    db_boards = Board.query.filter_by(user_id=current_user.id).order_by(Board.title).all()
-    boards = []
-    for b in db_boards:
-        boards.append({
-            'id': b.id,
-            'title': b.title,
-            'name': getattr(b, 'name', None) or b.title,  # for compatibility
-            'created_at': b.created_at.isoformat() if hasattr(b, 'created_at') and b.created_at else None,
-        })
-    return jsonify({'boards': boards})
+    limit = page_limit(request.args.get('limit'))
+    cursor = request.args.get('cursor')
+
+    def build():
+        try:
+            db_boards, next_cursor = keyset_page(Board.query.filter_by(user_id=current_user.id), [Board.title, Board.id],
+                                                 cursor, limit)
+        except InvalidCursor as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        boards = []
+        for b in db_boards:
+            boards.append({
+                'id': b.id,
+                'title': b.title,
+                'name': getattr(b, 'name', None) or b.title,  # for compatibility
+                'created_at': b.created_at.isoformat() if hasattr(b, 'created_at') and b.created_at else None,
+            })
+        return jsonify({'boards': boards, 'limit': limit, 'next_cursor': next_cursor})
+
+    # Any create, rename or delete changes the count, newest id or latest updated_at
+    count, newest_id, updated_at = sql_boards.listing_validators(current_user.id)
+    return conditional(build, hashed_etag('boards', current_user.id, count, newest_id, updated_at, cursor, limit),
+                       updated_at)
+
+@app.route('/search', methods=['GET'])
+@login_required
+def search():
+    """Ranked full-text search over the user's boards, thoughts, minutes and conversations"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'success': False, 'error': 'Missing q'}), 400
+    kinds = [k for k in request.args.get('kind', '').split(',') if k]
+    unknown = [k for k in kinds if k not in SEARCH_KINDS]
+    if unknown:
+        return jsonify({'success': False, 'error': f"Unknown kind: {', '.join(unknown)}"}), 400
+    limit = request.args.get('limit', 20, type=int)
+    cursor = request.args.get('cursor', 0, type=int)
+    result = search_index.search(query, current_user.id, kinds=kinds, board_id=request.args.get('board_id') or None,
+                                 limit=limit, offset=cursor)
+    return jsonify({'success': True, 'query': query, **result})
 
 # Debug endpoint to list all DB boards
 @app.route('/debug_list_boards', methods=['GET'])
 def debug_list_boards():
-    boards = Board.query.all()
-    return jsonify([
+    limit = page_limit(request.args.get('limit'))
+    try:
+        boards, next_cursor = keyset_page(Board.query, [Board.id], request.args.get('cursor'), limit)
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'boards': [
         {'id': str(b.id), 'title': b.title if hasattr(b, 'title') else None} for b in boards
-    ])
+    ], 'limit': limit, 'next_cursor': next_cursor})
 
 @app.route('/create_board', methods=['POST'])
 @login_required
@@ -1477,27 +1332,17 @@ def import_board_json():
 
 @app.route('/delete_board', methods=['POST'])
 def delete_board():
-    import re
     data = request.get_json()
     board_id = data.get('board_id')
-    uuid_re = re.compile(r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$')
     if not board_id:
         return jsonify({'success': False, 'error': 'No board_id provided'}), 400
-    if uuid_re.match(str(board_id)):
-        # JSON board
-        try:
-            board_store.delete_board(board_id)
-            return jsonify({'success': True})
-        except Exception as e:
-            return jsonify({'success': False, 'error': str(e)}), 500
-    else:
-        # DB board
-        board = Board.query.get(board_id)
-        if not board:
+    repo, board_id = resolve_board(board_id)
+    try:
+        if not repo.delete_board(board_id):
             return jsonify({'success': False, 'error': 'Board not found'}), 404
-        db.session.delete(board)
-        db.session.commit()
         return jsonify({'success': True})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/board_summary', methods=['GET'])
 @login_required
@@ -1505,42 +1350,45 @@ def board_summary():
     """Return counts and recent thoughts per quadrant for a DB-backed board.
     For now, JSON-store boards are not supported by this endpoint.
     """
-    import re
     board_id = request.args.get('board_id')
     if not board_id:
         return jsonify({'success': False, 'error': 'Missing board_id'}), 400
-    # Reject UUID-style IDs (JSON boards) for now
-    uuid_re = re.compile(r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$')
-    if uuid_re.match(str(board_id)):
+    # JSON boards are not supported here yet
+    board_repo, board_id = resolve_board(board_id)
+    if board_repo.kind == 'json':
         return jsonify({'success': False, 'error': 'Board summary not supported for JSON boards yet'}), 400
     try:
         # Validate board exists and belongs to current user
-        b = Board.query.get(board_id)
-        if not b:
+        validators = board_repo.validators(board_id)
+        if not validators:
             return jsonify({'success': False, 'error': 'Board not found'}), 404
-        if hasattr(b, 'user_id') and b.user_id != current_user.id:
+        if validators['user_id'] != current_user.id:
             return jsonify({'success': False, 'error': 'Forbidden'}), 403
-        quadrants_list = ['status', 'goal', 'analysis', 'plan']
-        summary = {}
-        for q in quadrants_list:
-            q_query = Thought.query.filter_by(board_id=board_id, quadrant=q)
-            count = q_query.count()
-            recent = [t.content for t in q_query.order_by(Thought.id.desc()).limit(5).all()]
-            summary[q] = {'count': count, 'recent': recent}
-        return jsonify({'success': True, 'summary': summary})
+
+        def build():
+            quadrants_list = ['status', 'goal', 'analysis', 'plan']
+            summary = {}
+            for q in quadrants_list:
+                q_query = Thought.query.filter_by(board_id=board_id, quadrant=q)
+                count = q_query.count()
+                recent = [t.content for t in q_query.order_by(Thought.id.desc()).limit(5).all()]
+                summary[q] = {'count': count, 'recent': recent}
+            return jsonify({'success': True, 'summary': summary})
+
+        return conditional(build, 'summary-' + revision_etag(validators['revision']), validators['updated_at'])
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/board_ai_summary', methods=['GET'])
 @login_required
+@rate_limited()
 def board_ai_summary():
     """Return an AI-generated executive summary for a DB-backed board."""
-    import re
     board_id = request.args.get('board_id')
     if not board_id:
         return jsonify({'success': False, 'error': 'Missing board_id'}), 400
-    uuid_re = re.compile(r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$')
-    if uuid_re.match(str(board_id)):
+    board_repo, board_id = resolve_board(board_id)
+    if board_repo.kind == 'json':
         return jsonify({'success': False, 'error': 'AI summary not supported for JSON boards yet'}), 400
     try:
         b = Board.query.get(board_id)
@@ -1558,7 +1406,7 @@ def board_ai_summary():
         length = (request.args.get('length') or 'medium').lower()
         ai_res = ai_api.summarize_board(quadrants_data, tone=tone, length=length)
         if ai_res.get('error'):
-            code = 429 if ai_res.get('code') == 'insufficient_quota' else 500
+            code = AI_ERROR_STATUS.get(ai_res.get('code'), 500)
             return jsonify({'success': False, 'error': ai_res['error']}), code
         return jsonify({'success': True, 'summary': ai_res.get('summary', '')})
     except Exception as e:
@@ -1567,15 +1415,15 @@ def board_ai_summary():
 
 @app.route('/board_alignment', methods=['GET'])
 @login_required
+@rate_limited()
 def board_alignment():
     """Return an AI-computed Goals↔Status alignment score and rationale for a DB-backed board."""
-    import re
     board_id = request.args.get('board_id')
     if not board_id:
         return jsonify({'success': False, 'error': 'Missing board_id'}), 400
-    # Reject UUID-style IDs (JSON boards) for now
-    uuid_re = re.compile(r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$')
-    if uuid_re.match(str(board_id)):
+    # JSON boards are not supported here yet
+    board_repo, board_id = resolve_board(board_id)
+    if board_repo.kind == 'json':
         return jsonify({'success': False, 'error': 'Alignment not supported for JSON boards yet'}), 400
     try:
         b = Board.query.get(board_id)
@@ -1590,7 +1438,7 @@ def board_alignment():
         }
         ai_res = ai_api.assess_goals_status_alignment(quadrants_data)
         if ai_res.get('error'):
-            code = 429 if ai_res.get('code') == 'insufficient_quota' else 500
+            code = AI_ERROR_STATUS.get(ai_res.get('code'), 500)
             return jsonify({'success': False, 'error': ai_res['error']}), code
         return jsonify({'success': True, 'alignment': {
             'score': ai_res.get('score', 0),
@@ -1603,7 +1451,6 @@ def board_alignment():
 @login_required
 def rename_board():
     """Rename a DB-backed board. Enforces unique title per user."""
-    import re
     data = request.get_json() or {}
     board_id = data.get('board_id')
     new_name = (data.get('name') or '').strip()
@@ -1611,9 +1458,9 @@ def rename_board():
         return jsonify({'success': False, 'error': 'Missing board_id'}), 400
     if not new_name:
         return jsonify({'success': False, 'error': 'Missing new name'}), 400
-    # Prevent renaming JSON boards for now
-    uuid_re = re.compile(r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$')
-    if uuid_re.match(str(board_id)):
+    # Renaming is only implemented for DB boards
+    board_repo, board_id = resolve_board(board_id)
+    if board_repo.kind == 'json':
         return jsonify({'success': False, 'error': 'Renaming JSON boards is not supported yet'}), 400
     try:
         # Enforce per-user uniqueness
@@ -1636,6 +1483,7 @@ from flask import session
 
 @app.route('/ai_conversation', methods=['POST'])
 @login_required
+@rate_limited()
 def ai_conversation():
     user_input = request.json.get('content', '').strip()
     board_id = request.json.get('board_id')
@@ -1653,41 +1501,15 @@ def ai_conversation():
     # Compose prompt for the AI
     prompt = build_conversational_prompt(history, state)
 
-    # DEBUG: Log the full prompt sent to OpenAI
-    print("=== AI PROMPT SENT ===")
-    print(prompt)
-    print("======================")
-
-    # === PROMPT ENGINEERING DEBUG LOGGING ===
-    print("\n" + "="*80, flush=True)
-    print(" PROMPT ENGINEERING DEBUG - COMPLETE FLOW", flush=True)
-    print("="*80, flush=True)
-    print(f" USER INPUT: {user_input}", flush=True)
-    print(f" AI PROVIDER: {os.environ.get('AI_PROVIDER', 'openai')}", flush=True)
-    print(f" CURRENT QUADRANTS: {quadrants}", flush=True)
-    print("\n FULL PROMPT BEING SENT TO AI:", flush=True)
-    print("-" * 60, flush=True)
-    print(prompt, flush=True)
-    print("-" * 60, flush=True)
+    interactive_log.debug("ai_conversation: calling %s facilitator (%d prompt chars)", AI_PROVIDER, len(prompt))
 
     # Call your AI (Gemini or OpenAI)
     try:
         conversational_facilitator = ai_api.conversational_facilitator
         ai_result = conversational_facilitator(prompt)
-        
-        # DEBUG: Log the AI response
-        print(f"\n RAW AI RESPONSE:", flush=True)
-        print("-" * 60, flush=True)
-        print(ai_result, flush=True)
-        print("-" * 60, flush=True)
-        print(f"AI Result Type: {type(ai_result)}")
-        print(f"AI Result: {ai_result}")
-        print(f"AI Action: {ai_result.get('action')}")
-        print(f"AI Thoughts Count: {len(ai_result.get('thoughts', []))}")
-        print("==================")
-        
+        interactive_log.debug("ai_conversation raw AI result: %r", ai_result)
     except Exception as e:
-        print(f"AI ERROR: {str(e)}")
+        interactive_log.exception("ai_conversation AI error: %s", e)
         return jsonify({'success': False, 'error': f'AI error: {str(e)}'}), 500
 
     # Parse AI response for intent
@@ -1698,21 +1520,27 @@ def ai_conversation():
         return jsonify({'success': True, 'followup': ai_result['question']})
 
     elif ai_result.get('action') == 'classify_and_add':
-        # Add thoughts to quadrants as directed by AI
-        print(f"[DEBUG] Adding {len(ai_result['thoughts'])} thoughts to database...")
-        for i, thought in enumerate(ai_result['thoughts']):
-            print(f"[DEBUG] Thought {i+1}: '{thought['thought']}' -> {thought['quadrant']} quadrant (board_id: {board_id})")
-            t = Thought(content=thought['thought'], quadrant=thought['quadrant'], board_id=board_id)
-            db.session.add(t)
-            print(f"[DEBUG] Added thought to session: {t}")
-        
-        print("[DEBUG] Committing to database...")
-        db.session.commit()
-        print("[DEBUG] Database commit successful!")
+        # Add thoughts to quadrants as directed by AI, in one repository batch
+        repo, repo_board_id = resolve_board(board_id)
+        if repo.get(repo_board_id) is None:
+            return jsonify({'success': False, 'error': 'Board not found'}), 404
+        candidates, skipped = [], []
+        for thought in ai_result['thoughts']:
+            # Skip thoughts already on the board (exact or near-duplicate); the batch skips repeats
+            exact, near = repo.find_duplicates(repo_board_id, thought['thought'], thought['quadrant'])
+            if exact or near:
+                skipped.append(thought)
+            else:
+                candidates.append(thought)
+        results = repo.apply_batch(repo_board_id, [{'op': 'add', 'content': t['thought'], 'quadrant': t['quadrant']}
+                                                   for t in candidates]) if candidates else []
+        added = [t for t, r in zip(candidates, results) if r['success']]
+        skipped += [t for t, r in zip(candidates, results) if not r['success']]
+        thoughts_log.debug("ai_conversation added %d thoughts to board %s (%d duplicates skipped)", len(added), board_id, len(skipped))
         
         session['conversation_state'] = 'awaiting_initial'
         # Do NOT reset session['conversation_history'] here; preserve full history for context
-        return jsonify({'success': True, 'message': 'Thought(s) added!', 'thoughts': ai_result['thoughts']})
+        return jsonify({'success': True, 'message': 'Thought(s) added!', 'thoughts': added, 'skipped_duplicates': skipped})
 
     else:
         # Always return something useful to the frontend
@@ -1731,7 +1559,6 @@ import os
 
 def build_conversational_prompt(history, state, latest_user_message=None):
     import json
-    print("STATE TYPE:", type(state), "VALUE:", state)
     # Ensure state is a dict
     if isinstance(state, str):
         try:
@@ -1748,37 +1575,46 @@ def build_conversational_prompt(history, state, latest_user_message=None):
     for turn in history:
         role = role_map.get(turn['role'].lower(), turn['role'].capitalize())
         conversation_history += f"{role}: {turn['content']}\n"
-    # Format quadrant state
+    if latest_user_message is None and history:
+        # Default to last user turn
+        for turn in reversed(history):
+            if turn['role'].lower() == 'user':
+                latest_user_message = turn['content']
+                break
+    # Format quadrant state; large boards are trimmed to the items relevant to the latest message
     if state:
+        from board_context import board_context, omitted_note
+        selected, counts = board_context.select(state, latest_user_message or '')
         quadrant_lines = []
         for q in ['status', 'goal', 'analysis', 'plan']:
-            items = state.get(q, [])
+            items = selected.get(q, [])
             quadrant_lines.append(f"{q.capitalize()}:")
             if items:
                 for item in items:
                     quadrant_lines.append(f"  - {item}")
             else:
-                quadrant_lines.append("  (empty)")
+                quadrant_lines.append("  (empty)" if not counts[q] else "  (none relevant)")
+            note = omitted_note(len(items), counts[q])
+            if note:
+                quadrant_lines.append(f"  {note}")
         quadrant_state = "\n".join(quadrant_lines)
     else:
         quadrant_state = "(No quadrant data provided)"
     # Fill in placeholders
     prompt = template.replace('{conversation_history}', conversation_history.strip())
     prompt = prompt.replace('{quadrant_state}', quadrant_state.strip())
-    if latest_user_message is None and history:
-        # Default to last user turn
-        for turn in reversed(history):
-            if turn['role'].lower() == 'user':
-                latest_user_message = turn['content']
-                break
     prompt = prompt.replace('{latest_user_message}', (latest_user_message or '').strip())
+    if '{kb_context}' in prompt:
+        # Only the knowledge-base passages relevant to this turn (BM25 over KB sections)
+        from utils.knowledge_base import knowledge_base
+        prompt = prompt.replace('{kb_context}', knowledge_base.context(latest_user_message or '') or '(none)')
     return prompt
 
 
 # --- Dummy AI endpoints for frontend integration ---
 @app.route('/rewrite_thought', methods=['POST'])
+@rate_limited()
 def rewrite_thought():
-    import traceback
     data = request.get_json() or {}
     thought = data.get('thought')
     board_id = data.get('board_id')
@@ -1788,7 +1624,6 @@ def rewrite_thought():
         return jsonify({'success': False, 'error': 'Missing board_id'}), 400
     try:
         if AI_PROVIDER == 'openai':
-            print("Using OpenAI for rewrite_thought")
             result = ai_api.rewrite_thought_with_openai(thought)
             return jsonify({'success': True, 'suggestions': result.get('suggestions', [])})
         else:
@@ -1810,17 +1645,16 @@ def rewrite_thought():
                 filtered = [text]
             return jsonify({'success': True, 'suggestions': filtered})
     except Exception as e:
-        print("ERROR in rewrite_thought:", e)
-        traceback.print_exc()
+        log.exception("Error in rewrite_thought: %s", e)
         # Use a more generic error response that could be customized via prompt if needed
         return jsonify({"reply": "An error occurred while processing your request. Please try again.", "suggestions": {"add_to_quadrant": []}}), 200
 
 
 @app.route('/suggest_solution/', methods=['POST'])
+@rate_limited()
 def suggest_solution():
     data = request.get_json()
-    print("/suggest_solution received data:", data)
-    import traceback
+    log.debug("/suggest_solution received data: %s", data)
     data = data or {}
     problems = data.get('problems', [])
     obstacles = data.get('obstacles', [])
@@ -1828,10 +1662,8 @@ def suggest_solution():
         return jsonify({'success': False, 'error': 'Problems and obstacles must be lists.'}), 400
     try:
         if AI_PROVIDER == 'openai':
-            print("Using OpenAI for suggest_solution")
             result = ai_api.suggest_solution_with_openai(problems, obstacles)
         else:
-            print("Using Gemini for suggest_solution")
             result = ai_api.suggest_solution_with_gemini(problems, obstacles)
         if 'suggestions' in result:
             suggestions = result['suggestions']
@@ -1856,11 +1688,11 @@ def suggest_solution():
         else:
             return jsonify({'success': False, 'error': result.get('error', 'Unknown error')})
     except Exception as e:
-        print("ERROR in suggest_solution:", e)
-        traceback.print_exc()
+        log.exception("Error in suggest_solution: %s", e)
         return jsonify({'success': False, 'error': f'AI error: {str(e)}'}), 500
 
 @app.route('/brainstorm', methods=['POST'])
+@rate_limited()
 def brainstorm():
     data = request.get_json() or {}
     topic = data.get('topic')
@@ -1895,47 +1727,26 @@ def brainstorm():
             return jsonify({'success': False, 'error': f'OpenAI error: {str(e)}'}), 500
 
 @app.route('/meeting_minutes', methods=['POST'])
+@rate_limited()
 def meeting_minutes():
     data = request.get_json() or {}
     summary = data.get('summary')
     board_id = data.get('board_id')
     if not board_id:
         return jsonify({'success': False, 'error': 'No board selected. Please select a board and try again.'}), 400
-    import re
-    uuid_re = re.compile(r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$')
     if not summary:
         transcript = []
-        if uuid_re.match(str(board_id)):
-            # JSON board
-            board = board_store.get_board(board_id)
-            if board:
-                thoughts = board.get('thoughts', [])
-                if thoughts:
-                    transcript.append('Thoughts:')
-                    for t in thoughts:
-                        quadrant = t.get('quadrant', 'status')
-                        content = t.get('content', '')
-                        transcript.append(f"- [{quadrant}] {content}")
-                events = board.get('events', []) or []
-                if events:
-                    transcript.append('\nSession Events:')
-                    for e in events:
-                        timestamp = e.get('timestamp', '')
-                        action = e.get('action', '')
-                        detail = e.get('detail', '')
-                        transcript.append(f"- [{timestamp}] {action}: {detail}")
-        else:
-            # DB board
-            thoughts = Thought.query.filter_by(board_id=board_id).all()
-            minutes = MeetingMinute.query.filter_by(board_id=board_id).order_by(MeetingMinute.timestamp.asc()).all()
-            if thoughts:
-                transcript.append('Thoughts:')
-                for t in thoughts:
-                    transcript.append(f"- [{t.quadrant}] {t.content}")
-            if minutes:
-                transcript.append('\nSession Events:')
-                for m in minutes:
-                    transcript.append(f"- [{m.timestamp.strftime('%Y-%m-%d %H:%M')}] {m.action}: {m.detail}")
+        repo, board_id = resolve_board(board_id)
+        thoughts = repo.thoughts(board_id)
+        events = repo.events(board_id)
+        if thoughts:
+            transcript.append('Thoughts:')
+            for t in thoughts:
+                transcript.append(f"- [{t['quadrant']}] {t['content']}")
+        if events:
+            transcript.append('\nSession Events:')
+            for e in events:
+                transcript.append(f"- [{e['timestamp']}] {e['action']}: {e['detail']}")
         if not transcript:
             return jsonify({'success': False, 'error': 'No data found for this board to generate meeting minutes.'}), 400
         summary = '\n'.join(transcript)
@@ -1965,11 +1776,19 @@ def meeting_minutes():
 
 @app.route('/get_meeting_minutes', methods=['GET'])
 def get_meeting_minutes():
+    """Newest minutes first, one page at a time (?limit=, ?cursor= from the previous next_cursor)"""
     board_id = request.args.get('board_id', type=int)
     if not board_id:
         return jsonify({'success': False, 'error': 'Missing board_id'}), 400
-    minutes = MeetingMinute.query.filter_by(board_id=board_id).order_by(MeetingMinute.timestamp.desc()).all()
-    return jsonify({'success': True, 'minutes': [
+    limit = page_limit(request.args.get('limit'))
+    # Buffered minutes of edits already made show up in the list
+    minute_log.flush()
+    try:
+        minutes, next_cursor = keyset_page(MeetingMinute.query.filter_by(board_id=board_id), [MeetingMinute.id],
+                                           request.args.get('cursor'), limit, descending=True)
+    except InvalidCursor as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return jsonify({'success': True, 'limit': limit, 'next_cursor': next_cursor, 'minutes': [
         {
             'timestamp': m.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
             'action': m.action,
@@ -2406,17 +2225,57 @@ def debug_page():
 @app.route('/api/debug/logs')
 @login_required
 def get_debug_logs():
-    """API endpoint to get recent debug logs"""
+    """API endpoint to get debug logs newer than ?since=<seq> (all recent logs by default)"""
     from debug_logger import debug_logger
     
     limit = request.args.get('limit', 50, type=int)
-    logs = debug_logger.get_logs(limit=limit)
+    since = request.args.get('since', 0, type=int)
+    logs, cursor = debug_logger.get_logs_since(since, limit=limit)
     
     return jsonify({
         'logs': logs,
-        'total_count': len(logs)
+        'total_count': len(logs),
+        'cursor': cursor,
+        # The buffer restarted (e.g. server restart): the client should reload from scratch
+        'reset': since > debug_logger.logs.last_seq
     })
 
+@app.route('/api/debug/providers')
+@login_required
+def get_provider_breakers():
+    """API endpoint with the routing policy and the circuit breaker state of every provider/model called so far"""
+    return jsonify({
+        'provider': AI_PROVIDER,
+        'breakers': llm_provider.breaker_states(),
+        'routing': llm_provider.routing_state(),
+        'models': {
+            'default': openai_api.OPENAI_MODEL,
+            'endpoints': openai_api.OPENAI_ENDPOINT_MODELS,
+            'escalation': {
+                'endpoints': sorted(openai_api.OPENAI_ESCALATE_ENDPOINTS),
+                'small_model': openai_api.OPENAI_SMALL_MODEL,
+                'min_confidence': openai_api.OPENAI_ESCALATE_MIN_CONFIDENCE,
+            },
+        },
+        'retry': {
+            'attempts': llm_provider.LLM_RETRY_ATTEMPTS,
+            'base_delay': llm_provider.LLM_RETRY_BASE_DELAY,
+            'max_delay': llm_provider.LLM_RETRY_MAX_DELAY,
+            'request_deadline': llm_provider.LLM_REQUEST_DEADLINE,
+            'attempt_timeout': llm_provider.LLM_ATTEMPT_TIMEOUT,
+        }
+    })
+
+@app.route('/api/debug/semantic_cache', methods=['GET', 'DELETE'])
+@login_required
+@csrf.exempt  # Temporary for experimental environment
+def semantic_cache_stats():
+    """API endpoint with semantic cache hit-rate metrics; DELETE empties the cache"""
+    from semantic_cache import semantic_cache
+    if request.method == 'DELETE':
+        semantic_cache.clear()
+    return jsonify(semantic_cache.stats())
+
 @app.route('/api/debug/clear', methods=['POST'])
 @login_required
 @csrf.exempt  # Temporary for experimental environment
@@ -2432,21 +2291,17 @@ def clear_debug_logs():
 def rule_categorize():
     """API endpoint for rule-based categorization"""
     try:
-        print(f"[DEBUG] Rule categorize called, request content type: {request.content_type}", flush=True)
-        
         # Check if request has JSON data
         if not request.is_json:
-            print(f"[DEBUG] Request is not JSON, raw data: {request.get_data()}", flush=True)
+            rules_log.debug("Rule categorize request is not JSON (content type %s)", request.content_type)
             return jsonify({'error': 'Request must be JSON'}), 400
         
         data = request.get_json()
-        print(f"[DEBUG] Received JSON data: {data}", flush=True)
         
         if not data:
             return jsonify({'error': 'No JSON data provided'}), 400
         
         text = data.get('text', '')
-        print(f"[DEBUG] Extracted text: '{text}'", flush=True)
         
         if not text.strip():
             return jsonify({'error': 'No text provided'}), 400
@@ -2462,7 +2317,7 @@ def rule_categorize():
         end_time = time.time()
         processing_time_ms = (end_time - start_time) * 1000
         
-        print(f"[DEBUG] Categorization result: {result}", flush=True)
+        rules_log.debug("Categorized %r in %.2fms: %s", text, processing_time_ms, result)
         
         # Convert 'quadrant' key to 'category' for frontend compatibility
         if 'quadrant' in result:
@@ -2485,10 +2340,10 @@ def rule_categorize():
         
         return jsonify(result)
     except ImportError as e:
-        print(f"[DEBUG] Import error: {str(e)}", flush=True)
+        rules_log.error("Rule categorizer import failed: %s", e)
         return jsonify({'error': f'Rule categorizer import failed: {str(e)}'}), 500
     except Exception as e:
-        print(f"[DEBUG] Categorization exception: {str(e)}", flush=True)
+        rules_log.exception("Categorization exception: %s", e)
         return jsonify({'error': f'Categorization failed: {str(e)}'}), 500
 
 @app.route('/api/rule-performance', methods=['POST'])
@@ -2660,7 +2515,7 @@ def prompt_debug():
     """Web-based debug console for prompt engineering"""
     if not current_user.is_admin:
         return "Unauthorized", 403
-    return render_template('prompt_debug.html')
+    return render_template('prompt_debug.html', max_entries=MAX_DEBUG_ENTRIES)
 
 @app.route('/admin/debug_entries')
 @login_required
@@ -2669,10 +2524,15 @@ def get_debug_entries():
     if not current_user.is_admin:
         return jsonify({'error': 'Unauthorized'}), 403
     
+    since = request.args.get('since', 0, type=int)
+    limit = request.args.get('limit', None, type=int)
+    entries, cursor = debug_entries.since(since, limit)
     # Return debug entries in reverse order (newest first)
     return jsonify({
-        'entries': list(reversed(debug_entries)),
-        'count': len(debug_entries)
+        'entries': list(reversed(entries)),
+        'count': len(entries),
+        'cursor': cursor,
+        'reset': since > debug_entries.last_seq
     })
 
 @app.route('/admin/clear_debug_log', methods=['POST'])
@@ -2682,9 +2542,8 @@ def clear_debug_log():
     if not current_user.is_admin:
         return jsonify({'error': 'Unauthorized'}), 403
     
-    global debug_entries
     debug_entries.clear()
-    print("[DEBUG STORAGE] Debug log cleared by admin", flush=True)
+    log.info("Debug storage cleared by admin")
     
     return jsonify({'success': True, 'message': 'Debug log cleared'})
 
@@ -0,0 +1,171 @@
+"""
+Board Context Retrieval
+Compact quadrant context for facilitator prompts: instead of every thought on the board,
+the thoughts most relevant to the latest user message (BM25 over a per-board index),
+the most recent items of each quadrant and per-quadrant counts, within a token budget
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from utils.text_index import BM25Index
+
+QUADRANTS = ('status', 'goal', 'analysis', 'plan')
+
+# Boards whose full quadrant state fits the budget are sent unchanged
+BOARD_CONTEXT_ENABLED = os.environ.get('BOARD_CONTEXT_ENABLED', 'true').lower() == 'true'
+BOARD_CONTEXT_TOKEN_BUDGET = int(os.environ.get('BOARD_CONTEXT_TOKEN_BUDGET', '800'))
+# Thoughts retrieved for the latest user message, and newest items kept per quadrant
+BOARD_CONTEXT_TOP_K = int(os.environ.get('BOARD_CONTEXT_TOP_K', '12'))
+BOARD_CONTEXT_RECENT = int(os.environ.get('BOARD_CONTEXT_RECENT', '3'))
+# Per-board indexes kept in memory (LRU)
+BOARD_CONTEXT_MAX_BOARDS = int(os.environ.get('BOARD_CONTEXT_MAX_BOARDS', '256'))
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text)."""
+    return (len(text or '') + 3) // 4
+
+
+def _item_tokens(text: str) -> int:
+    # "  - item\n" in the rendered state
+    return estimate_tokens(text) + 2
+
+
+def board_signature(quadrants: Dict[str, List[str]]) -> str:
+    """Content hash of the board state; any added, moved or edited thought changes it."""
+    h = hashlib.blake2b(digest_size=16)
+    for q in QUADRANTS:
+        h.update(q.encode('utf-8') + b'\x00')
+        for item in quadrants.get(q) or []:
+            h.update(str(item).encode('utf-8') + b'\x01')
+    return h.hexdigest()
+
+
+class _BoardIndex:
+    """BM25 index over one board state; items keep their position in each quadrant list."""
+
+    def __init__(self, quadrants: Dict[str, List[str]]):
+        self.items: List[Tuple[str, int, str]] = [
+            (q, pos, str(item)) for q in QUADRANTS for pos, item in enumerate(quadrants.get(q) or [])
+        ]
+        self.bm25 = BM25Index(text for _, _, text in self.items)
+
+
+class BoardContext:
+    """LRU of per-board-state indexes plus the selection policy."""
+
+    def __init__(self, budget: int = BOARD_CONTEXT_TOKEN_BUDGET, top_k: int = BOARD_CONTEXT_TOP_K,
+                 recent: int = BOARD_CONTEXT_RECENT, max_boards: int = BOARD_CONTEXT_MAX_BOARDS,
+                 enabled: bool = BOARD_CONTEXT_ENABLED):
+        self.budget = budget
+        self.top_k = top_k
+        self.recent = recent
+        self.max_boards = max_boards
+        self.enabled = enabled
+        self._indexes: "OrderedDict[str, _BoardIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _index(self, signature: str, quadrants: Dict[str, List[str]]) -> _BoardIndex:
+        with self._lock:
+            index = self._indexes.get(signature)
+            if index is not None:
+                self._indexes.move_to_end(signature)
+                return index
+        index = _BoardIndex(quadrants)
+        with self._lock:
+            self._indexes[signature] = index
+            while len(self._indexes) > self.max_boards:
+                self._indexes.popitem(last=False)
+        return index
+
+    def select(self, quadrants: Optional[Dict[str, List[str]]], query: Optional[str] = None,
+               budget: Optional[int] = None) -> Tuple[Dict[str, List[str]], Dict[str, int]]:
+        """
+        (selected, counts): the items to show per quadrant, in board order, and the
+        total number of items per quadrant. Relevant items come first, then the newest
+        items of each quadrant (later in the list = newer), until the budget is spent.
+
+        With query=None the selection made earlier in the same request for the same
+        board state is reused, so the prompt and the provider call agree.
+        """
+        quadrants = {q: list((quadrants or {}).get(q) or []) for q in QUADRANTS}
+        counts = {q: len(items) for q, items in quadrants.items()}
+        budget = self.budget if budget is None else budget
+        total = sum(_item_tokens(str(i)) for items in quadrants.values() for i in items)
+        if not self.enabled or total <= budget:
+            return quadrants, counts
+
+        signature = board_signature(quadrants)
+        cached = _request_selection(signature, budget)
+        if query is None and cached is not None:
+            return cached, counts
+
+        index = self._index(signature, quadrants)
+        chosen, used = set(), 0
+
+        def take(key) -> bool:
+            nonlocal used
+            if key in chosen:
+                return True
+            cost = _item_tokens(index.items[key][2])
+            if used + cost > budget:
+                return False
+            chosen.add(key)
+            used += cost
+            return True
+
+        for i, _ in index.bm25.search(query or '', self.top_k):
+            take(i)
+        # Newest items, round-robin across quadrants so every quadrant stays represented
+        by_quadrant = {q: [i for i, item in enumerate(index.items) if item[0] == q] for q in QUADRANTS}
+        for depth in range(1, self.recent + 1):
+            for q in QUADRANTS:
+                if len(by_quadrant[q]) >= depth:
+                    take(by_quadrant[q][-depth])
+
+        selected = {q: [] for q in QUADRANTS}
+        for i in sorted(chosen):
+            q, _, text = index.items[i]
+            selected[q].append(text)
+        _remember_selection(signature, budget, selected)
+        return selected, counts
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+
+def _request_selection(signature: str, budget: int):
+    try:
+        from flask import g, has_request_context
+        if has_request_context():
+            return getattr(g, 'board_context_selection', {}).get((signature, budget))
+    except Exception:
+        pass
+    return None
+
+
+def _remember_selection(signature: str, budget: int, selected: Dict[str, List[str]]):
+    try:
+        from flask import g, has_request_context
+        if has_request_context():
+            if not hasattr(g, 'board_context_selection'):
+                g.board_context_selection = {}
+            g.board_context_selection[(signature, budget)] = selected
+    except Exception:
+        pass
+
+
+def omitted_note(shown: int, total: int) -> Optional[str]:
+    """Line telling the model that a quadrant was trimmed, or None."""
+    if total > shown:
+        return f"(+{total - shown} more not shown; these are the most relevant and most recent)"
+    return None
+
+
+# Global board context instance
+board_context = BoardContext()
@@ -0,0 +1,325 @@
+"""
+Board Events
+Per-board change events (thought added, moved, edited, deleted; board renamed or deleted)
+with the board's new revision, pushed to open boards over Server-Sent Events, so clients apply deltas instead of
+refetching or reloading the board. Database changes are collected from the ORM on flush
+and published once the transaction commits; JSON-store boards publish from the repository.
+The 'memory' broker fans out within one process; the 'sqlite' broker is a local stand-in
+for Redis-style pub/sub when several workers serve the app: every worker appends to a
+shared SQLite file and polls it for events from the others.
+"""
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from debug_logger import get_logger
+from models import Board, Thought
+
+# Push board changes to open boards (/boards/<id>/events)
+BOARD_EVENTS_ENABLED = os.environ.get('BOARD_EVENTS_ENABLED', 'true').lower() == 'true'
+# 'memory' (one worker) or 'sqlite' (several workers on one host share BOARD_EVENTS_PATH)
+BOARD_EVENTS_BROKER = os.environ.get('BOARD_EVENTS_BROKER', 'memory').lower()
+BOARD_EVENTS_PATH = os.environ.get('BOARD_EVENTS_PATH', os.path.join('instance', 'board_events.db'))
+BOARD_EVENTS_POLL_SECONDS = float(os.environ.get('BOARD_EVENTS_POLL_SECONDS', '0.25'))
+# Recent events the memory broker keeps so a reconnecting client (Last-Event-ID) catches
+# up without a reload; the sqlite broker replays from its table
+BOARD_EVENTS_REPLAY = int(os.environ.get('BOARD_EVENTS_REPLAY', '1000'))
+# A stream sends a comment this often to keep proxies from closing it, and ends after
+# BOARD_EVENTS_STREAM_SECONDS (the browser reconnects) so abandoned streams free their thread
+BOARD_EVENTS_HEARTBEAT_SECONDS = float(os.environ.get('BOARD_EVENTS_HEARTBEAT_SECONDS', '15'))
+BOARD_EVENTS_STREAM_SECONDS = float(os.environ.get('BOARD_EVENTS_STREAM_SECONDS', '300'))
+# Rows older than this are pruned from the sqlite broker
+BOARD_EVENTS_RETENTION_SECONDS = float(os.environ.get('BOARD_EVENTS_RETENTION_SECONDS', '3600'))
+
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+log = get_logger('board_events')
+
+
+class Subscription:
+    """One open stream; a subscriber that falls too far behind is told to resync."""
+
+    def __init__(self, board_id: str):
+        self.board_id = board_id
+        self.queue: "queue.Queue" = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+    def put(self, evt: dict):
+        try:
+            self.queue.put_nowait(evt)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout: float) -> Optional[dict]:
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class MemoryBroker:
+    """Delivers events straight to the subscribers of this process."""
+
+    def __init__(self, replay: int = BOARD_EVENTS_REPLAY):
+        self._ids = 0
+        self._recent: deque = deque(maxlen=replay)
+        self._lock = threading.Lock()
+
+    def publish(self, hub: "BoardEventHub", events: List[dict]):
+        with self._lock:
+            for evt in events:
+                self._ids += 1
+                evt['id'] = self._ids
+                self._recent.append(evt)
+        for evt in events:
+            hub.dispatch(evt)
+
+    def start(self, hub: "BoardEventHub"):
+        pass
+
+    def since(self, board_id: str, last_id: int) -> Optional[List[dict]]:
+        with self._lock:
+            # Ids restart with the process; older ones have left the buffer
+            if last_id > self._ids or (self._recent and self._recent[0]['id'] > last_id + 1):
+                return None
+            return [evt for evt in self._recent if evt['id'] > last_id and evt['board_id'] == board_id]
+
+
+class SQLiteBroker:
+    """
+    Appends events to a shared SQLite file; a poller thread in every worker dispatches
+    new rows to its own subscribers. Event ids are the row ids, the same in all workers.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS board_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ts REAL NOT NULL,
+        board_id TEXT NOT NULL,
+        payload TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS ix_board_events_ts ON board_events (ts);
+    """
+
+    def __init__(self, path: str = BOARD_EVENTS_PATH, poll_seconds: float = BOARD_EVENTS_POLL_SECONDS):
+        self.path = path
+        self.poll_seconds = poll_seconds
+        self._local = threading.local()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(self.SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def publish(self, hub: "BoardEventHub", events: List[dict]):
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            conn.executemany('INSERT INTO board_events (ts, board_id, payload) VALUES (?, ?, ?)',
+                             [(now, evt['board_id'], json.dumps(evt)) for evt in events])
+            if now - self._last_prune > 60:
+                self._last_prune = now
+                conn.execute('DELETE FROM board_events WHERE ts < ?', (now - BOARD_EVENTS_RETENTION_SECONDS,))
+
+    def start(self, hub: "BoardEventHub"):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                last_id = self._connect().execute('SELECT COALESCE(MAX(id), 0) FROM board_events').fetchone()[0]
+                self._thread = threading.Thread(target=self._poll, args=(hub, last_id),
+                                                name='board-events-poller', daemon=True)
+                self._thread.start()
+
+    def since(self, board_id: str, last_id: int) -> Optional[List[dict]]:
+        conn = self._connect()
+        first, last = conn.execute('SELECT MIN(id), MAX(id) FROM board_events').fetchone()
+        if last is None or last_id > last or first > last_id + 1:
+            return None if last_id else []
+        rows = conn.execute('SELECT id, payload FROM board_events WHERE board_id = ? AND id > ? ORDER BY id',
+                            (board_id, last_id)).fetchall()
+        return [dict(json.loads(payload), id=row_id) for row_id, payload in rows]
+
+    def _poll(self, hub: "BoardEventHub", last_id: int):
+        while True:
+            time.sleep(self.poll_seconds)
+            try:
+                rows = self._connect().execute(
+                    'SELECT id, payload FROM board_events WHERE id > ? ORDER BY id', (last_id,)).fetchall()
+            except sqlite3.Error as e:
+                log.warning("Board event poll failed: %s", e)
+                continue
+            for row_id, payload in rows:
+                last_id = row_id
+                evt = json.loads(payload)
+                evt['id'] = row_id
+                hub.dispatch(evt)
+
+
+class BoardEventHub:
+    """In-process pub/sub: the open streams of each board, fed by the broker."""
+
+    def __init__(self, broker=None):
+        self.broker = broker
+        self.published = 0
+        self._subscribers: Dict[str, List[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def _get_broker(self):
+        if self.broker is None:
+            self.broker = SQLiteBroker() if BOARD_EVENTS_BROKER == 'sqlite' else MemoryBroker()
+        return self.broker
+
+    def publish(self, events: List[dict]):
+        """Send events ({'type', 'board_id', ...}) to every open stream of their boards."""
+        if not (BOARD_EVENTS_ENABLED and events):
+            return
+        for evt in events:
+            evt['board_id'] = str(evt['board_id'])
+            evt.setdefault('ts', time.time())
+        try:
+            self._get_broker().publish(self, events)
+            self.published += len(events)
+        except Exception as e:
+            log.error("Could not publish %d board events: %s", len(events), e)
+
+    def dispatch(self, evt: dict):
+        with self._lock:
+            subscribers = list(self._subscribers.get(evt['board_id'], ()))
+        for sub in subscribers:
+            sub.put(evt)
+
+    def subscribe(self, board_id) -> Subscription:
+        self._get_broker().start(self)
+        sub = Subscription(str(board_id))
+        with self._lock:
+            self._subscribers.setdefault(sub.board_id, []).append(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            subs = self._subscribers.get(sub.board_id, [])
+            if sub in subs:
+                subs.remove(sub)
+            if not subs:
+                self._subscribers.pop(sub.board_id, None)
+
+    def since(self, board_id, last_id: int) -> Optional[List[dict]]:
+        """The board's events after last_id, or None if some of them are no longer kept."""
+        try:
+            return self._get_broker().since(str(board_id), last_id)
+        except Exception as e:
+            log.warning("Could not replay board %s events: %s", board_id, e)
+            return None
+
+    def stream(self, board_id, last_event_id: Optional[str] = None) -> Iterator[str]:
+        """Server-Sent Events text for one client, starting with anything it missed."""
+        sub = self.subscribe(board_id)
+        try:
+            yield "retry: 3000\n\n"
+            if last_event_id and last_event_id.isdigit():
+                missed = self.since(board_id, int(last_event_id))
+                if missed is None:
+                    yield _sse({'type': 'resync', 'board_id': str(board_id)})
+                for evt in missed or ():
+                    yield _sse(evt)
+            deadline = time.monotonic() + BOARD_EVENTS_STREAM_SECONDS
+            while time.monotonic() < deadline:
+                evt = sub.get(timeout=BOARD_EVENTS_HEARTBEAT_SECONDS)
+                if sub.overflowed:
+                    yield _sse({'type': 'resync', 'board_id': str(board_id)})
+                    return
+                yield _sse(evt) if evt else ": keep-alive\n\n"
+        finally:
+            self.unsubscribe(sub)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'boards': len(self._subscribers), 'streams': sum(len(s) for s in self._subscribers.values()),
+                    'published': self.published}
+
+
+def _sse(evt: dict) -> str:
+    lines = f"event: {evt['type']}\ndata: {json.dumps(evt)}\n\n"
+    return f"id: {evt['id']}\n{lines}" if evt.get('id') else lines
+
+
+def thought_event(kind: str, board_id, thought: dict, **extra) -> dict:
+    return dict({'type': kind, 'board_id': board_id, 'thought': thought}, **extra)
+
+
+# Global board event hub instance
+board_events = BoardEventHub()
+
+
+# --- Collect thought and board changes on flush, publish them after commit ---
+
+def _thought_dict(obj) -> dict:
+    return {'id': obj.id, 'content': obj.content, 'quadrant': obj.quadrant}
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_board_events(session, flush_context):
+    if not BOARD_EVENTS_ENABLED:
+        return
+    events = session.info.setdefault('board_events', [])
+    for obj in session.new:
+        if isinstance(obj, Thought):
+            events.append(thought_event('thought_added', obj.board_id, _thought_dict(obj)))
+    for obj in session.dirty:
+        if isinstance(obj, Thought) and session.is_modified(obj):
+            state = inspect(obj)
+            old_board = state.attrs.board_id.history.deleted
+            if old_board and old_board[0] != obj.board_id:
+                events.append(thought_event('thought_deleted', old_board[0], {'id': obj.id}))
+                events.append(thought_event('thought_added', obj.board_id, _thought_dict(obj)))
+                continue
+            old_quadrant = state.attrs.quadrant.history.deleted
+            if old_quadrant and old_quadrant[0] != obj.quadrant:
+                events.append(thought_event('thought_moved', obj.board_id, _thought_dict(obj),
+                                            from_quadrant=old_quadrant[0]))
+            if state.attrs.content.history.deleted:
+                events.append(thought_event('thought_updated', obj.board_id, _thought_dict(obj)))
+        elif isinstance(obj, Board) and inspect(obj).attrs.title.history.deleted:
+            events.append({'type': 'board_renamed', 'board_id': obj.id, 'title': obj.title})
+    for obj in session.deleted:
+        if isinstance(obj, Thought):
+            events.append(thought_event('thought_deleted', obj.board_id, {'id': obj.id}))
+        elif isinstance(obj, Board):
+            events.append({'type': 'board_deleted', 'board_id': obj.id})
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_board_events(session):
+    events = session.info.pop('board_events', None)
+    if events:
+        # The revision each board is at now (board_repository), so clients keep theirs current
+        revisions = dict(session.info.get('board_revisions', {}), **session.info.get('pending_revisions', {}))
+        for evt in events:
+            if evt['board_id'] in revisions:
+                evt['revision'] = revisions[evt['board_id']]
+        board_events.publish(events)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_board_events(session):
+    session.info.pop('board_events', None)
@@ -0,0 +1,331 @@
+"""
+Bulk Board Import
+Many boards at once from JSON, NDJSON or CSV: records are validated and quadrants
+normalized in one pass, names are made unique against a single query of the user's
+boards, and boards and thoughts are written with executemany, one transaction per
+chunk. import_boards() yields progress events so callers can stream them.
+"""
+
+import csv
+import io
+import json
+import os
+import uuid
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from debug_logger import get_logger
+
+log = get_logger('import')
+
+# A chunk is committed once it holds this many boards or this many thoughts
+IMPORT_CHUNK_BOARDS = int(os.environ.get('IMPORT_CHUNK_BOARDS', '100'))
+IMPORT_CHUNK_THOUGHTS = int(os.environ.get('IMPORT_CHUNK_THOUGHTS', '5000'))
+# Thoughts longer than the column allows are rejected rather than truncated
+THOUGHT_MAX_CHARS = 500
+
+FORMATS = ('json', 'ndjson', 'csv')
+QUADRANTS = ('status', 'goal', 'analysis', 'plan')
+QUADRANT_ALIASES = {
+    'status': 'status', 'statuses': 'status', 'current': 'status', 'current state': 'status', 's': 'status',
+    'goal': 'goal', 'goals': 'goal', 'target': 'goal', 'g': 'goal',
+    'analysis': 'analysis', 'analyses': 'analysis', 'gap': 'analysis', 'gaps': 'analysis', 'a': 'analysis',
+    'plan': 'plan', 'plans': 'plan', 'action': 'plan', 'actions': 'plan', 'next steps': 'plan', 'p': 'plan',
+}
+
+
+class InvalidImport(ValueError):
+    """The input could not be read at all (as opposed to individual invalid records)."""
+
+
+def normalize_quadrant(value) -> Optional[str]:
+    """Canonical quadrant name for value ('Goals', ' STATUS ', 'A', ...) or None."""
+    if not isinstance(value, str):
+        return None
+    return QUADRANT_ALIASES.get(' '.join(value.lower().replace('_', ' ').split()))
+
+
+def normalize_board(record, where: str) -> Tuple[Optional[dict], List[dict]]:
+    """
+    ({'title', 'thoughts': [(content, quadrant)], 'merge'}, problems) for one raw record;
+    the board is None when the record itself is unusable. Accepts the /export_board shape
+    ({'title' or 'name', 'thoughts': [{'content', 'quadrant'}]}) and quadrant lists
+    ({'title', 'quadrants': {'status': ['...'], ...}}).
+    """
+    if not isinstance(record, dict):
+        return None, [{'where': where, 'error': 'Board record must be an object'}]
+    title = ' '.join(str(record.get('title') or record.get('name') or '').split())
+    if not title:
+        return None, [{'where': where, 'error': 'Missing title'}]
+    if len(title) > 100:
+        return None, [{'where': where, 'error': 'Title longer than 100 characters'}]
+    raw = []
+    for t in record.get('thoughts') or []:
+        if isinstance(t, dict):
+            raw.append((t.get('content') or t.get('thought') or t.get('text'), t.get('quadrant')))
+        else:
+            raw.append((None, None))
+    quadrants = record.get('quadrants')
+    if isinstance(quadrants, dict):
+        for q, items in quadrants.items():
+            raw.extend((item, q) for item in (items if isinstance(items, list) else []))
+    thoughts, problems = [], []
+    for i, (content, quadrant) in enumerate(raw):
+        content = ' '.join(content.split()) if isinstance(content, str) else ''
+        q = normalize_quadrant(quadrant)
+        error = ('Empty thought' if not content else
+                 f'Thought longer than {THOUGHT_MAX_CHARS} characters' if len(content) > THOUGHT_MAX_CHARS else
+                 f'Unknown quadrant {quadrant!r}' if q is None else None)
+        if error:
+            problems.append({'where': f'{where} thought {i + 1}', 'error': error})
+        else:
+            thoughts.append((content, q))
+    return {'title': title, 'thoughts': thoughts, 'merge': bool(record.get('merge'))}, problems
+
+
+# --- readers: yield (where, raw board record) ---
+
+def read_json(stream) -> Iterator[Tuple[str, dict]]:
+    """A board, a list of boards, or {'boards': [...]}."""
+    try:
+        data = json.load(io.TextIOWrapper(stream, encoding='utf-8-sig') if _is_binary(stream) else stream)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidImport(f'Invalid JSON: {e}') from e
+    if isinstance(data, dict) and isinstance(data.get('boards'), list):
+        data = data['boards']
+    for i, record in enumerate(data if isinstance(data, list) else [data]):
+        yield f'board {i + 1}', record
+
+
+def read_ndjson(stream) -> Iterator[Tuple[str, dict]]:
+    """
+    One board per line, or the /export_board?format=ndjson layout: a {"type": "board"}
+    line followed by one thought per line.
+    """
+    current, where = None, None
+    for n, line in enumerate(_lines(stream), 1):
+        if not line.strip():
+            continue
+        try:
+            obj = json.loads(line)
+        except ValueError:
+            if current is not None:
+                yield where, current
+                current = None
+            yield f'line {n}', {'_error': 'Invalid JSON'}
+            continue
+        if isinstance(obj, dict) and obj.get('type') == 'board':
+            if current is not None:
+                yield where, current
+            current, where = {**obj, 'thoughts': list(obj.get('thoughts') or [])}, f'line {n}'
+        elif current is not None and isinstance(obj, dict) and 'title' not in obj and 'name' not in obj:
+            current['thoughts'].append(obj)
+        else:
+            if current is not None:
+                yield where, current
+                current = None
+            yield f'line {n}', obj
+    if current is not None:
+        yield where, current
+
+
+def read_csv(stream) -> Iterator[Tuple[str, dict]]:
+    """
+    Columns board (or title), quadrant, content (or thought). Consecutive rows of the same
+    board form one record; rows of a board that reappears later are added to it.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='') if _is_binary(stream) else stream
+    reader = csv.DictReader(text)
+    columns = {(c or '').strip().lower(): c for c in reader.fieldnames or []}
+    title_col = columns.get('board') or columns.get('title') or columns.get('board_title')
+    content_col = columns.get('content') or columns.get('thought') or columns.get('text')
+    quadrant_col = columns.get('quadrant')
+    if not (title_col and content_col and quadrant_col):
+        raise InvalidImport('CSV needs board, quadrant and content columns')
+    current, where = None, None
+    for n, row in enumerate(reader, 2):
+        title = (row.get(title_col) or '').strip()
+        if current is None or title != current['title']:
+            if current is not None:
+                yield where, current
+            current, where = {'title': title, 'thoughts': [], 'merge': True}, f'row {n}'
+        current['thoughts'].append({'content': row.get(content_col), 'quadrant': row.get(quadrant_col)})
+    if current is not None:
+        yield where, current
+
+
+READERS = {'json': read_json, 'ndjson': read_ndjson, 'csv': read_csv}
+
+
+def detect_format(filename: str = '', content_type: str = '') -> str:
+    """Format from an explicit extension or content type; JSON when nothing says otherwise."""
+    name, content_type = (filename or '').lower(), (content_type or '').lower()
+    if name.endswith(('.ndjson', '.jsonl')) or 'ndjson' in content_type or 'jsonl' in content_type:
+        return 'ndjson'
+    if name.endswith('.csv') or 'csv' in content_type:
+        return 'csv'
+    return 'json'
+
+
+def _is_binary(stream) -> bool:
+    return not isinstance(stream, io.TextIOBase)
+
+
+def _lines(stream) -> Iterator[str]:
+    for line in stream:
+        yield line.decode('utf-8-sig') if isinstance(line, bytes) else line
+
+
+# --- writers ---
+
+def unique_titles(existing: set):
+    """Allocator of 'Title', 'Title (1)', ... against existing (updated as names are taken)."""
+    def allocate(title: str) -> str:
+        name, i = title, 1
+        while name in existing:
+            name = f"{title} ({i})"
+            i += 1
+        existing.add(name)
+        return name
+    return allocate
+
+
+def import_boards(records: Iterable[Tuple[str, dict]], user_id: int, chunk_boards: int = IMPORT_CHUNK_BOARDS,
+                  chunk_thoughts: int = IMPORT_CHUNK_THOUGHTS) -> Iterator[dict]:
+    """
+    Import raw (where, record) pairs as database boards owned by user_id. Yields a
+    'progress' event after every committed chunk ({'boards', 'thoughts', 'skipped',
+    'created': [...], 'problems': [...]}) and finally 'done', or 'error' if a chunk
+    failed (earlier chunks stay committed).
+    """
+    from sqlalchemy import insert, update
+    from models import db, Board, Thought
+    from dedup_index import thought_index, content_hash
+
+    existing = {title for (title,) in db.session.query(Board.title).filter(Board.user_id == user_id)}
+    allocate = unique_titles(existing)
+    merged: Dict[str, int] = {}
+    totals = {'boards': 0, 'thoughts': 0, 'skipped': 0}
+    chunk, chunk_size, problems = [], 0, []
+
+    def flush():
+        nonlocal chunk, chunk_size, problems
+        # CSV rows of a board seen before (in this chunk or an earlier one) go to that board
+        new, pending = [], set()
+        for b in chunk:
+            if b['merge'] and (b['title'] in merged or b['title'] in pending):
+                continue
+            new.append(b)
+            if b['merge']:
+                pending.add(b['title'])
+        try:
+            if new:
+                rows = [{'title': allocate(b['title']), 'user_id': user_id} for b in new]
+                ids = db.session.execute(insert(Board).returning(Board.id, sort_by_parameter_order=True), rows).scalars().all()
+                for b, row, board_id in zip(new, rows, ids):
+                    b['board_id'], b['name'] = board_id, row['title']
+                    if b['merge']:
+                        merged[b['title']] = board_id
+            for b in chunk:
+                if 'board_id' not in b:
+                    b['board_id'] = merged[b['title']]
+            thoughts = [{'content': c, 'quadrant': q, 'board_id': b['board_id'], 'content_hash': content_hash(c)}
+                        for b in chunk for c, q in b['thoughts']]
+            thought_ids = db.session.execute(
+                insert(Thought).returning(Thought.id, sort_by_parameter_order=True), thoughts).scalars().all() if thoughts else []
+            # Boards from an earlier chunk that got more rows may be open already
+            earlier = {b['board_id'] for b in chunk} - {b['board_id'] for b in new}
+            if earlier:
+                db.session.execute(update(Board.__table__).where(Board.__table__.c.id.in_(earlier))
+                                   .values(revision=Board.__table__.c.revision + 1))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            log.exception("Bulk import chunk failed for user %s: %s", user_id, e)
+            return {'type': 'error', 'error': str(e), **totals}
+        _sync_indexes(new, thoughts, thought_ids, user_id)
+        for board_id in {b['board_id'] for b in chunk}:
+            thought_index.invalidate(board_id)
+        totals['boards'] += len(new)
+        totals['thoughts'] += len(thoughts)
+        event = {'type': 'progress', **totals,
+                 'created': [{'board_id': b['board_id'], 'title': b['name'], 'source_title': b['title'],
+                              'thoughts': len(b['thoughts'])} for b in new],
+                 'problems': problems}
+        chunk, chunk_size, problems = [], 0, []
+        return event
+
+    try:
+        for where, record in records:
+            board, found = _normalize(where, record)
+            problems.extend(found)
+            totals['skipped'] += len(found)
+            if board is None:
+                continue
+            chunk.append(board)
+            chunk_size += len(board['thoughts'])
+            if len(chunk) >= chunk_boards or chunk_size >= chunk_thoughts:
+                event = flush()
+                yield event
+                if event['type'] == 'error':
+                    return
+    except (InvalidImport, UnicodeDecodeError, csv.Error) as e:
+        # The rest of the input is unreadable; boards of the current chunk are not written
+        yield {'type': 'error', 'error': str(e), **totals}
+        return
+    if chunk or problems:
+        event = flush()
+        yield event
+        if event['type'] == 'error':
+            return
+    log.info("Bulk import for user %s: %d boards, %d thoughts, %d skipped",
+             user_id, totals['boards'], totals['thoughts'], totals['skipped'])
+    yield {'type': 'done', **totals}
+
+
+def _normalize(where, record):
+    if isinstance(record, dict) and '_error' in record:
+        return None, [{'where': where, 'error': record['_error']}]
+    return normalize_board(record, where)
+
+
+def _sync_indexes(new, thoughts, thought_ids, user_id):
+    # Core inserts bypass the session hooks that keep the search index in step
+    try:
+        from search_index import search_index
+        if not search_index.enabled:
+            return
+        ops = [('upsert', 'board', b['board_id'], b['board_id'], user_id, b['name'], None, None) for b in new]
+        ops.extend(('upsert', 'thought', thought_id, t['board_id'], user_id, t['content'], t['quadrant'], None)
+                   for t, thought_id in zip(thoughts, thought_ids))
+        search_index.enqueue(ops)
+    except Exception as e:
+        log.warning("Search index not updated after bulk import: %s", e)
+
+
+def import_json_store(records: Iterable[Tuple[str, dict]]) -> Iterator[dict]:
+    """Same events as import_boards, for the JSON board store (boards.json written once)."""
+    import board_store
+    boards, problems, merged = [], [], {}
+    try:
+        for where, record in records:
+            board, found = _normalize(where, record)
+            problems.extend(found)
+            if board is None:
+                continue
+            thoughts = [{'id': str(uuid.uuid4()), 'content': c, 'quadrant': q} for c, q in board['thoughts']]
+            if board['merge'] and board['title'] in merged:
+                merged[board['title']]['thoughts'].extend(thoughts)
+                continue
+            boards.append({'name': board['title'], 'thoughts': thoughts})
+            if board['merge']:
+                merged[board['title']] = boards[-1]
+    except (InvalidImport, UnicodeDecodeError, csv.Error) as e:
+        yield {'type': 'error', 'error': str(e), 'boards': 0, 'thoughts': 0, 'skipped': len(problems)}
+        return
+    ids = board_store.import_boards(boards)
+    thoughts = sum(len(b['thoughts']) for b in boards)
+    yield {'type': 'progress', 'boards': len(ids), 'thoughts': thoughts, 'skipped': len(problems),
+           'created': [{'board_id': board_id, 'source_title': b['name'], 'thoughts': len(b['thoughts'])}
+                       for b, board_id in zip(boards, ids)],
+           'problems': problems}
+    yield {'type': 'done', 'boards': len(ids), 'thoughts': thoughts, 'skipped': len(problems)}
@@ -0,0 +1,667 @@
+"""
+Board Repository
+One storage interface over the two board backends: SQL boards (integer ids, owned by a
+user) and the JSON-file boards of board_store (UUID ids, no owner). Routes resolve a
+board id once with resolve() and call the same methods whichever backend holds it;
+JSON boards already moved by scripts/migrate_json_boards.py resolve to their SQL copy.
+"""
+
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event, func, inspect, select, update
+from sqlalchemy.orm import Session
+
+import board_store
+from board_store import RevisionConflict
+from dedup_index import content_hash, jaccard, shingles, NEAR_DUPLICATE_THRESHOLD
+from models import Board, Thought
+
+QUADRANTS = ('status', 'goal', 'analysis', 'plan')
+
+# Most operations one /thoughts/batch request may carry
+THOUGHT_BATCH_MAX_OPS = int(os.environ.get('THOUGHT_BATCH_MAX_OPS', '200'))
+BATCH_OPS = ('add', 'move', 'update', 'delete')
+
+# JSON boards are identified by UUIDs; compiled once instead of per request
+UUID_RE = re.compile(r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$')
+
+
+def is_json_board_id(board_id) -> bool:
+    return bool(board_id) and UUID_RE.match(str(board_id)) is not None
+
+
+class BoardRepository:
+    """
+    Boards and their thoughts as plain dicts: boards {'id', 'title', 'user_id'},
+    thoughts {'id', 'content', 'quadrant'}, events {'timestamp', 'action', 'detail'}.
+    Every change to a board's thoughts bumps its revision; writes given an
+    expected_revision raise RevisionConflict if the board has moved on since.
+    """
+    kind = None
+
+    def get(self, board_id) -> Optional[dict]:
+        raise NotImplementedError
+
+    def revision(self, board_id) -> Optional[int]:
+        """Current revision, or None if there is no such board."""
+        raise NotImplementedError
+
+    def committed_revision(self, board_id) -> Optional[int]:
+        """Revision this thread's last write left the board at."""
+        raise NotImplementedError
+
+    def validators(self, board_id) -> Optional[dict]:
+        """
+        {'revision', 'updated_at', 'user_id'} for HTTP caching, read without loading the
+        board or its thoughts; None if there is no such board.
+        """
+        raise NotImplementedError
+
+    def list_boards(self, user_id) -> List[dict]:
+        raise NotImplementedError
+
+    def thoughts(self, board_id) -> List[dict]:
+        """The board's thoughts in the order they were added."""
+        raise NotImplementedError
+
+    def iter_thoughts(self, board_id) -> Iterator[dict]:
+        """Like thoughts(), for exports; backends may stream instead of loading the list."""
+        return iter(self.thoughts(board_id))
+
+    def quadrants(self, board_id) -> Dict[str, List[str]]:
+        """Thought texts per quadrant, the shape the facilitator prompts use."""
+        quadrants = {q: [] for q in QUADRANTS}
+        for t in self.thoughts(board_id):
+            if t['quadrant'] in quadrants:
+                quadrants[t['quadrant']].append(t['content'])
+        return quadrants
+
+    def thoughts_by_quadrant(self, board_id) -> Dict[str, List[dict]]:
+        grouped = {q: [] for q in QUADRANTS}
+        for t in self.thoughts(board_id):
+            if t['quadrant'] in grouped:
+                grouped[t['quadrant']].append(t)
+        return grouped
+
+    def find_duplicates(self, board_id, content: str, quadrant: str) -> Tuple[bool, List[Tuple[object, float]]]:
+        """(exact duplicate exists, [(thought id, similarity)] near-duplicates) in the quadrant."""
+        raise NotImplementedError
+
+    def add_thought(self, board_id, content: str, quadrant: str, expected_revision: Optional[int] = None) -> dict:
+        raise NotImplementedError
+
+    def move_thought(self, board_id, thought_id, quadrant: str, expected_revision: Optional[int] = None) -> bool:
+        """False if the board has no such thought."""
+        raise NotImplementedError
+
+    def update_thought(self, board_id, thought_id, content: str, expected_revision: Optional[int] = None) -> bool:
+        """False if the board has no such thought."""
+        raise NotImplementedError
+
+    def delete_thought(self, board_id, thought_id, expected_revision: Optional[int] = None) -> bool:
+        """False if the board has no such thought."""
+        raise NotImplementedError
+
+    def apply_batch(self, board_id, ops: List[dict], atomic: bool = False,
+                    expected_revision: Optional[int] = None) -> List[dict]:
+        """
+        Apply add/move/update/delete operations (see parse_batch_op) in one transaction
+        with one meeting minute. Returns a result per operation; operations that fail are
+        skipped, or with atomic=True nothing is applied if any fails.
+        """
+        raise NotImplementedError
+
+    def delete_board(self, board_id) -> bool:
+        """False if there is no such board."""
+        raise NotImplementedError
+
+    def events(self, board_id) -> List[dict]:
+        """Session events (meeting minutes), oldest first."""
+        raise NotImplementedError
+
+
+class SqlBoardRepository(BoardRepository):
+    kind = 'db'
+
+    def get(self, board_id) -> Optional[dict]:
+        from models import db, Board
+        board = db.session.get(Board, _int_id(board_id)) if _int_id(board_id) is not None else None
+        return _board_dict(board) if board else None
+
+    def revision(self, board_id) -> Optional[int]:
+        from models import db
+        if _int_id(board_id) is None:
+            return None
+        return db.session.query(Board.revision).filter(Board.id == _int_id(board_id)).scalar()
+
+    def committed_revision(self, board_id) -> Optional[int]:
+        from models import db
+        return db.session.info.get('board_revisions', {}).get(_int_id(board_id))
+
+    def validators(self, board_id) -> Optional[dict]:
+        from models import db
+        if _int_id(board_id) is None:
+            return None
+        board = Board.__table__
+        row = db.session.execute(select(board.c.revision, board.c.updated_at, board.c.user_id)
+                                 .where(board.c.id == _int_id(board_id))).first()
+        return dict(row._mapping) if row else None
+
+    def listing_validators(self, user_id) -> tuple:
+        """(board count, newest id, latest updated_at) of the user's boards; changes whenever the list does."""
+        from models import db
+        board = Board.__table__
+        return tuple(db.session.execute(select(func.count(), func.max(board.c.id), func.max(board.c.updated_at))
+                                        .where(board.c.user_id == user_id)).one())
+
+    def claim_revision(self, board_id, expected: int) -> int:
+        """
+        Bump the board's revision in the current transaction if it is still `expected`,
+        before changing its thoughts; the row stays locked until commit.
+        """
+        from models import db
+        board = Board.__table__
+        new = db.session.execute(update(board).where(board.c.id == _int_id(board_id), board.c.revision == expected)
+                                 .values(revision=board.c.revision + 1).returning(board.c.revision)).scalar()
+        if new is None:
+            current = self.revision(board_id)
+            db.session.rollback()
+            raise RevisionConflict(board_id, expected, current)
+        db.session.info.setdefault('pending_revisions', {})[_int_id(board_id)] = new
+        return new
+
+    def list_boards(self, user_id) -> List[dict]:
+        from models import Board
+        if user_id is None:
+            return []
+        return [_board_dict(b) for b in Board.query.filter_by(user_id=user_id).order_by(Board.title).all()]
+
+    def _thought_rows(self, board_id):
+        from models import db, Thought
+        return (db.session.query(Thought.id, Thought.content, Thought.quadrant)
+                .filter(Thought.board_id == _int_id(board_id)).order_by(Thought.id))
+
+    def thoughts(self, board_id) -> List[dict]:
+        return [{'id': r.id, 'content': r.content, 'quadrant': r.quadrant} for r in self._thought_rows(board_id)]
+
+    def iter_thoughts(self, board_id) -> Iterator[dict]:
+        from exporters import iter_rows
+        return ({'id': r.id, 'content': r.content, 'quadrant': r.quadrant}
+                for r in iter_rows(self._thought_rows(board_id)))
+
+    def _exact_duplicate(self, board_id, content, quadrant) -> bool:
+        # Indexed lookup on Thought.content_hash, so thoughts committed by other workers count too
+        from models import Thought
+        return Thought.query.filter_by(board_id=_int_id(board_id), quadrant=quadrant,
+                                       content_hash=content_hash(content)).first() is not None
+
+    def find_duplicates(self, board_id, content, quadrant):
+        from dedup_index import thought_index
+        if self._exact_duplicate(board_id, content, quadrant):
+            return True, []
+        # The in-memory LSH index is per process: near-duplicates are a best-effort hint
+        return False, thought_index.find_similar(board_id, content, quadrant=quadrant)
+
+    def add_thought(self, board_id, content, quadrant, expected_revision=None):
+        from models import db, Thought
+        from minutes_log import minute_log
+        if expected_revision is not None:
+            self.claim_revision(board_id, expected_revision)
+        thought = Thought(content=content, quadrant=quadrant, board_id=board_id)
+        db.session.add(thought)
+        minute_log.record(board_id, 'add', f"Added thought: '{content}' to '{quadrant}'")
+        db.session.commit()
+        return {'id': thought.id, 'content': thought.content, 'quadrant': thought.quadrant}
+
+    def _get_thought(self, board_id, thought_id):
+        from models import db, Thought
+        thought = db.session.get(Thought, _int_id(thought_id)) if _int_id(thought_id) is not None else None
+        return thought if thought and str(thought.board_id) == str(board_id) else None
+
+    def move_thought(self, board_id, thought_id, quadrant, expected_revision=None):
+        from models import db
+        from minutes_log import minute_log
+        thought = self._get_thought(board_id, thought_id)
+        if not thought:
+            return False
+        if expected_revision is not None:
+            self.claim_revision(board_id, expected_revision)
+        old_quadrant = thought.quadrant
+        thought.quadrant = quadrant
+        minute_log.record(thought.board_id, 'move', f"Moved thought ID {thought_id} from '{old_quadrant}' to '{quadrant}'")
+        db.session.commit()
+        return True
+
+    def update_thought(self, board_id, thought_id, content, expected_revision=None):
+        from models import db
+        from minutes_log import minute_log
+        thought = self._get_thought(board_id, thought_id)
+        if not thought:
+            return False
+        if expected_revision is not None:
+            self.claim_revision(board_id, expected_revision)
+        old_content = thought.content
+        thought.content = content
+        minute_log.record(thought.board_id, 'edit', f"Edited thought ID {thought_id}: '{old_content}' → '{content}'")
+        db.session.commit()
+        return True
+
+    def delete_thought(self, board_id, thought_id, expected_revision=None):
+        from models import db
+        from minutes_log import minute_log
+        thought = self._get_thought(board_id, thought_id)
+        if not thought:
+            return False
+        if expected_revision is not None:
+            self.claim_revision(board_id, expected_revision)
+        db.session.delete(thought)
+        # The minute commits with the delete
+        minute_log.record(thought.board_id, 'delete', f"Deleted thought ID {thought_id}")
+        db.session.commit()
+        return True
+
+    def apply_batch(self, board_id, ops, atomic=False, expected_revision=None):
+        from models import db, Thought
+        from dedup_index import thought_index
+        from minutes_log import minute_log
+        if expected_revision is not None:
+            self.claim_revision(board_id, expected_revision)
+        parsed = [_parse_or_error(op) for op in ops]
+        ids = {_int_id(op['thought_id']) for op, _ in parsed if op and 'thought_id' in op}
+        thoughts = {t.id: t for t in Thought.query.filter(Thought.board_id == board_id, Thought.id.in_(ids - {None}))}
+        results, changes, added, seen = [], [], [], set()
+        for i, (op, error) in enumerate(parsed):
+            result = {'index': i, 'op': op['op'] if op else None, 'success': False}
+            results.append(result)
+            if error:
+                result['error'] = error
+                continue
+            if op['op'] == 'add':
+                key = (content_hash(op['content']), op['quadrant'])
+                if key in seen or self._exact_duplicate(board_id, op['content'], op['quadrant']):
+                    result['error'] = 'Duplicate thought: this thought already exists in this quadrant.'
+                    continue
+                seen.add(key)
+                near = thought_index.find_similar(board_id, op['content'], quadrant=op['quadrant'])
+                if near:
+                    result['near_duplicates'] = [{'id': tid, 'similarity': sim} for tid, sim in near]
+                thought = Thought(content=op['content'], quadrant=op['quadrant'], board_id=board_id)
+                db.session.add(thought)
+                added.append((result, thought))
+                changes.append(f"Added thought: '{op['content']}' to '{op['quadrant']}'")
+            else:
+                thought = thoughts.get(_int_id(op['thought_id']))
+                if thought is None:
+                    result['error'] = 'Thought not found'
+                    continue
+                result['thought_id'] = thought.id
+                if op['op'] == 'move':
+                    changes.append(f"Moved thought ID {thought.id} from '{thought.quadrant}' to '{op['quadrant']}'")
+                    thought.quadrant = op['quadrant']
+                elif op['op'] == 'update':
+                    changes.append(f"Edited thought ID {thought.id}: '{thought.content}' → '{op['content']}'")
+                    thought.content = op['content']
+                else:
+                    db.session.delete(thought)
+                    del thoughts[thought.id]
+                    changes.append(f"Deleted thought ID {thought.id}")
+            result['success'] = True
+        if atomic and not all(r['success'] for r in results):
+            db.session.rollback()
+            return _rolled_back(results)
+        if changes:
+            minute_log.record(board_id, 'batch', _batch_detail(changes))
+            db.session.flush()
+            for result, thought in added:
+                result['thought'] = {'id': thought.id, 'content': thought.content, 'quadrant': thought.quadrant}
+            db.session.commit()
+        else:
+            db.session.rollback()
+        return results
+
+    def delete_board(self, board_id):
+        from models import db, Board
+        board = db.session.get(Board, _int_id(board_id)) if _int_id(board_id) is not None else None
+        if not board:
+            return False
+        db.session.delete(board)
+        db.session.commit()
+        return True
+
+    def events(self, board_id):
+        from models import MeetingMinute
+        from minutes_log import minute_log
+        minute_log.flush()
+        minutes = (MeetingMinute.query.filter_by(board_id=_int_id(board_id))
+                   .order_by(MeetingMinute.timestamp.asc(), MeetingMinute.id.asc()).all())
+        return [{'timestamp': m.timestamp.strftime('%Y-%m-%d %H:%M'), 'action': m.action, 'detail': m.detail}
+                for m in minutes]
+
+
+class JsonBoardRepository(BoardRepository):
+    kind = 'json'
+
+    def get(self, board_id):
+        board = board_store.get_board(board_id)
+        return _json_board_dict(board) if board else None
+
+    def revision(self, board_id):
+        board = board_store.get_board(board_id)
+        return board.get('revision', 0) if board else None
+
+    def committed_revision(self, board_id):
+        return getattr(_json_writes, 'revisions', {}).get(str(board_id))
+
+    def validators(self, board_id):
+        board = board_store.get_board(board_id)
+        if board is None:
+            return None
+        return {'revision': board.get('revision', 0), 'updated_at': board_store.modified_at(board_id), 'user_id': None}
+
+    def list_boards(self, user_id):
+        # JSON boards have no owner; everyone sees all of them
+        return [{'id': b['id'], 'title': b.get('name'), 'name': b.get('name'), 'user_id': None}
+                for b in board_store.list_boards()]
+
+    def thoughts(self, board_id):
+        board = board_store.get_board(board_id) or {}
+        return [_json_thought(t) for t in board.get('thoughts', [])]
+
+    def find_duplicates(self, board_id, content, quadrant):
+        same_quadrant = [t for t in self.thoughts(board_id) if t['quadrant'] == quadrant]
+        h = content_hash(content)
+        if any(content_hash(t['content']) == h for t in same_quadrant):
+            return True, []
+        tokens = shingles(content)
+        near = [(t['id'], round(jaccard(tokens, shingles(t['content'])), 3)) for t in same_quadrant] if tokens else []
+        near = sorted((m for m in near if m[1] >= NEAR_DUPLICATE_THRESHOLD), key=lambda m: m[1], reverse=True)
+        return False, near[:5]
+
+    def add_thought(self, board_id, content, quadrant, expected_revision=None):
+        import uuid
+        with board_store.locked():
+            board = board_store.get_board(board_id)
+            if board is None:
+                raise KeyError(board_id)
+            _check_revision(board, expected_revision)
+            thought = {'id': str(uuid.uuid4()), 'content': content, 'quadrant': quadrant}
+            board.setdefault('thoughts', []).append(thought)
+            _add_event(board, 'add', f"Added thought: '{content}' to '{quadrant}'")
+            _save(board)
+        _publish([{'type': 'thought_added', 'board_id': board_id, 'thought': dict(thought), 'revision': board['revision']}])
+        return thought
+
+    def move_thought(self, board_id, thought_id, quadrant, expected_revision=None):
+        with board_store.locked():
+            board = board_store.get_board(board_id)
+            thought = next((t for t in (board or {}).get('thoughts', []) if str(t.get('id')) == str(thought_id)), None)
+            if thought is None:
+                return False
+            _check_revision(board, expected_revision)
+            old_quadrant = thought.get('quadrant')
+            thought['quadrant'] = quadrant
+            _add_event(board, 'move', f"Moved thought ID {thought_id} from '{old_quadrant}' to '{quadrant}'")
+            _save(board)
+        _publish([{'type': 'thought_moved', 'board_id': board_id, 'thought': _json_thought(thought),
+                   'from_quadrant': old_quadrant, 'revision': board['revision']}])
+        return True
+
+    def update_thought(self, board_id, thought_id, content, expected_revision=None):
+        with board_store.locked():
+            board = board_store.get_board(board_id)
+            thought = next((t for t in (board or {}).get('thoughts', []) if str(t.get('id')) == str(thought_id)), None)
+            if thought is None:
+                return False
+            _check_revision(board, expected_revision)
+            old_content = thought.get('content')
+            thought['content'] = content
+            _add_event(board, 'edit', f"Edited thought ID {thought_id}: '{old_content}' → '{content}'")
+            _save(board)
+        _publish([{'type': 'thought_updated', 'board_id': board_id, 'thought': _json_thought(thought),
+                   'revision': board['revision']}])
+        return True
+
+    def delete_thought(self, board_id, thought_id, expected_revision=None):
+        with board_store.locked():
+            board = board_store.get_board(board_id)
+            thoughts = (board or {}).get('thoughts', [])
+            thought = next((t for t in thoughts if str(t.get('id')) == str(thought_id)), None)
+            if thought is None:
+                return False
+            _check_revision(board, expected_revision)
+            board['thoughts'] = [t for t in thoughts if t is not thought]
+            _add_event(board, 'delete', f"Deleted thought ID {thought_id}")
+            _save(board)
+        _publish([{'type': 'thought_deleted', 'board_id': board_id, 'thought': {'id': thought['id']},
+                   'revision': board['revision']}])
+        return True
+
+    def apply_batch(self, board_id, ops, atomic=False, expected_revision=None):
+        import uuid
+        with board_store.locked():
+            board = board_store.get_board(board_id)
+            if board is None:
+                raise KeyError(board_id)
+            _check_revision(board, expected_revision)
+            thoughts = board.setdefault('thoughts', [])
+            by_id = {str(t.get('id')): t for t in thoughts}
+            seen = {(content_hash(t.get('content', '')), t.get('quadrant')) for t in thoughts}
+            results, changes, deleted, events = [], [], set(), []
+            for i, op in enumerate(ops):
+                op, error = _parse_or_error(op)
+                result = {'index': i, 'op': op['op'] if op else None, 'success': False}
+                results.append(result)
+                if error:
+                    result['error'] = error
+                    continue
+                if op['op'] == 'add':
+                    key = (content_hash(op['content']), op['quadrant'])
+                    if key in seen:
+                        result['error'] = 'Duplicate thought: this thought already exists in this quadrant.'
+                        continue
+                    seen.add(key)
+                    thought = {'id': str(uuid.uuid4()), 'content': op['content'], 'quadrant': op['quadrant']}
+                    thoughts.append(thought)
+                    by_id[thought['id']] = thought
+                    result['thought'] = dict(thought)
+                    changes.append(f"Added thought: '{op['content']}' to '{op['quadrant']}'")
+                    events.append({'type': 'thought_added', 'thought': dict(thought)})
+                else:
+                    thought = by_id.get(str(op['thought_id']))
+                    if thought is None:
+                        result['error'] = 'Thought not found'
+                        continue
+                    result['thought_id'] = thought['id']
+                    if op['op'] == 'move':
+                        changes.append(f"Moved thought ID {thought['id']} from '{thought.get('quadrant')}' to '{op['quadrant']}'")
+                        events.append({'type': 'thought_moved', 'from_quadrant': thought.get('quadrant')})
+                        thought['quadrant'] = op['quadrant']
+                    elif op['op'] == 'update':
+                        changes.append(f"Edited thought ID {thought['id']}: '{thought.get('content')}' → '{op['content']}'")
+                        events.append({'type': 'thought_updated'})
+                        thought['content'] = op['content']
+                    else:
+                        del by_id[str(thought['id'])]
+                        deleted.add(id(thought))
+                        changes.append(f"Deleted thought ID {thought['id']}")
+                        events.append({'type': 'thought_deleted', 'thought': {'id': thought['id']}})
+                    events[-1].setdefault('thought', _json_thought(thought))
+                result['success'] = True
+            if atomic and not all(r['success'] for r in results):
+                return _rolled_back(results)
+            if changes:
+                board['thoughts'] = [t for t in thoughts if id(t) not in deleted]
+                _add_event(board, 'batch', _batch_detail(changes))
+                _save(board)
+        _publish([dict(evt, board_id=board_id, revision=board['revision']) for evt in events] if changes else [])
+        return results
+
+    def delete_board(self, board_id):
+        if board_store.get_board(board_id) is None:
+            return False
+        board_store.delete_board(board_id)
+        _publish([{'type': 'board_deleted', 'board_id': board_id}])
+        return True
+
+    def events(self, board_id):
+        board = board_store.get_board(board_id) or {}
+        return [{'timestamp': e.get('timestamp', ''), 'action': e.get('action', ''), 'detail': e.get('detail', '')}
+                for e in board.get('events', []) or []]
+
+
+def parse_batch_op(op) -> dict:
+    """
+    Normalized batch operation, or ValueError:
+    {'op': 'add', 'content', 'quadrant'}, {'op': 'move', 'thought_id', 'quadrant'},
+    {'op': 'update', 'thought_id', 'content'} or {'op': 'delete', 'thought_id'}.
+    """
+    from board_import import normalize_quadrant
+    if not isinstance(op, dict) or op.get('op') not in BATCH_OPS:
+        raise ValueError(f"op must be one of {', '.join(BATCH_OPS)}")
+    parsed = {'op': op['op']}
+    if op['op'] != 'add':
+        if op.get('thought_id') in (None, ''):
+            raise ValueError('Missing thought_id')
+        parsed['thought_id'] = op['thought_id']
+    if op['op'] in ('add', 'update'):
+        content = op.get('content')
+        if not isinstance(content, str) or not content.strip():
+            raise ValueError('Missing content')
+        parsed['content'] = content.strip()
+    if op['op'] in ('add', 'move'):
+        quadrant = op.get('quadrant')
+        # As in /add_thought, an add without a quadrant (or 'auto') goes to status
+        if op['op'] == 'add' and quadrant in (None, '', 'auto'):
+            quadrant = 'status'
+        parsed['quadrant'] = normalize_quadrant(quadrant)
+        if parsed['quadrant'] is None:
+            raise ValueError('Invalid quadrant')
+    return parsed
+
+
+def _parse_or_error(op) -> Tuple[Optional[dict], Optional[str]]:
+    try:
+        return parse_batch_op(op), None
+    except ValueError as e:
+        return (op if isinstance(op, dict) and op.get('op') in BATCH_OPS else None), str(e)
+
+
+def _rolled_back(results: List[dict]) -> List[dict]:
+    for result in results:
+        if result['success']:
+            result.update(success=False, error='Not applied: another operation in the batch failed')
+            result.pop('thought', None)
+    return results
+
+
+def _batch_detail(changes: List[str]) -> str:
+    if len(changes) == 1:
+        return changes[0]
+    return f"{len(changes)} changes: " + '; '.join(changes)
+
+
+def _int_id(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _board_dict(board) -> dict:
+    return {'id': board.id, 'title': board.title, 'name': board.title, 'user_id': board.user_id,
+            'created_at': board.created_at, 'revision': board.revision}
+
+
+def _json_board_dict(board: dict) -> dict:
+    name = board.get('title') or board.get('name')
+    return {'id': board['id'], 'title': name, 'name': name, 'user_id': None, 'revision': board.get('revision', 0)}
+
+
+def _json_thought(t: dict) -> dict:
+    return {'id': t.get('id'), 'content': t.get('content', ''), 'quadrant': t.get('quadrant', 'status')}
+
+
+def _check_revision(board: dict, expected: Optional[int]):
+    if expected is not None and board.get('revision', 0) != expected:
+        raise RevisionConflict(board['id'], expected, board.get('revision', 0))
+
+
+# Revisions this thread's JSON-board writes left boards at (committed_revision)
+_json_writes = threading.local()
+
+
+def _save(board: dict):
+    board_store.save_board(board)
+    if not hasattr(_json_writes, 'revisions'):
+        _json_writes.revisions = {}
+    _json_writes.revisions[str(board['id'])] = board['revision']
+
+
+def _publish(events: List[dict]):
+    # Database boards publish from the ORM session hooks in board_events
+    from board_events import board_events
+    board_events.publish(events)
+
+
+def _add_event(board: dict, action: str, detail: str):
+    board.setdefault('events', []).append({
+        'timestamp': datetime.utcnow().strftime('%Y-%m-%d %H:%M'), 'action': action, 'detail': detail,
+    })
+
+
+# Global repository instances
+sql_boards = SqlBoardRepository()
+json_boards = JsonBoardRepository()
+
+
+def resolve(board_id) -> Tuple[BoardRepository, object]:
+    """
+    (repository, board id within it) for a board id from a request. UUIDs of JSON boards
+    that have been migrated resolve to the SQL board that replaced them.
+    """
+    if is_json_board_id(board_id):
+        migrated = board_store.migrated_id(str(board_id))
+        if migrated is not None:
+            return sql_boards, migrated
+        return json_boards, str(board_id)
+    return sql_boards, board_id
+
+
+# --- Database boards: bump the revision of every board whose thoughts change ---
+
+@event.listens_for(Session, 'after_flush')
+def _bump_board_revisions(session, flush_context):
+    boards = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Thought) and (obj not in session.dirty or session.is_modified(obj)):
+            boards.add(obj.board_id)
+            old_board = inspect(obj).attrs.board_id.history.deleted
+            if old_board:
+                boards.add(old_board[0])
+    deleted = {obj.id for obj in session.deleted if isinstance(obj, Board)}
+    pending = session.info.setdefault('pending_revisions', {})
+    # Once per transaction: claim_revision or an earlier flush may have bumped it already
+    boards = {b for b in boards if b is not None and b not in pending and b not in deleted}
+    if not boards:
+        return
+    board = Board.__table__
+    rows = session.connection().execute(update(board).where(board.c.id.in_(boards))
+                                        .values(revision=board.c.revision + 1)
+                                        .returning(board.c.id, board.c.revision))
+    pending.update({board_id: revision for board_id, revision in rows})
+
+
+@event.listens_for(Session, 'after_commit')
+def _commit_board_revisions(session):
+    pending = session.info.pop('pending_revisions', None)
+    if pending:
+        session.info.setdefault('board_revisions', {}).update(pending)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_board_revisions(session):
+    session.info.pop('pending_revisions', None)
@@ -1,11 +1,79 @@
 import os
 import json
+import shutil
 import threading
+from contextlib import contextmanager
+from datetime import datetime
 from uuid import uuid4
 
+try:
+    import fcntl
+except ImportError:  # Windows: the store is only locked within one process
+    fcntl = None
+
 DATA_DIR = os.path.join(os.path.dirname(__file__), 'boards_data')
 BOARDS_INDEX = os.path.join(DATA_DIR, 'boards.json')
+# Boards moved into the database: {json board id: db board id}, and their old files
+ALIASES = os.path.join(DATA_DIR, 'migrated.json')
+MIGRATED_DIR = os.path.join(DATA_DIR, 'migrated')
 LOCK = threading.RLock()
+_held = threading.local()  # this thread's lock depth
+_aliases = {'signature': None, 'map': {}}
+
+
+class RevisionConflict(Exception):
+    """A write was based on a board revision that is no longer the current one."""
+
+    def __init__(self, board_id, expected, current):
+        super().__init__(f"Board {board_id} is at revision {current}, not {expected}")
+        self.board_id = board_id
+        self.expected = expected
+        self.current = current
+
+
+@contextmanager
+def locked(shared=False):
+    # Writers get exclusive access across threads and (with fcntl) processes such as the
+    # migration tool; shared=True is for plain reads, which only wait for writers.
+    # Re-entrant within a thread; a thread holding the shared lock must not ask for the
+    # exclusive one
+    depth = getattr(_held, 'depth', 0)
+    if depth:
+        _held.depth = depth + 1
+        try:
+            yield
+        finally:
+            _held.depth = depth
+        return
+    if fcntl is None:
+        with LOCK:
+            _held.depth = 1
+            try:
+                yield
+            finally:
+                _held.depth = 0
+        return
+    ensure_data_dir()
+    # flock locks belong to the open file, so threads of one process exclude each other too
+    with open(os.path.join(DATA_DIR, '.lock'), 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        _held.depth = 1
+        try:
+            yield
+        finally:
+            _held.depth = 0
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def _reindex(board=None, board_id=None):
+    # Keep the full-text search index in step with the JSON store
+    try:
+        from search_index import search_index
+        if board is not None:
+            search_index.index_json_board(board)
+        else:
+            search_index.remove_board(board_id)
+    except Exception:
+        pass
 
 # Ensure data dir exists
 def ensure_data_dir():
@@ -17,7 +85,7 @@ def ensure_data_dir():
 
 def list_boards():
     ensure_data_dir()
-    with LOCK:
+    with locked(shared=True):
         with open(BOARDS_INDEX, 'r') as f:
             return json.load(f)
 
@@ -25,34 +93,54 @@ def create_board(name):
     ensure_data_dir()
     board_id = str(uuid4())
     board = {'id': board_id, 'name': name, 'thoughts': []}
-    with LOCK:
+    with locked():
         boards = list_boards()
         boards.append({'id': board_id, 'name': name})
         with open(BOARDS_INDEX, 'w') as f:
             json.dump(boards, f)
         with open(os.path.join(DATA_DIR, f'{board_id}.json'), 'w') as f:
             json.dump(board, f)
+    _reindex(board)
     return board_id
 
 def get_board(board_id):
     ensure_data_dir()
     path = os.path.join(DATA_DIR, f'{board_id}.json')
-    if not os.path.exists(path):
-        return None
-    with LOCK:
+    with locked(shared=True):
+        if not os.path.exists(path):
+            return None
         with open(path, 'r') as f:
             return json.load(f)
 
+def modified_at(board_id):
+    """UTC time the board's file was last written (naive, like database timestamps), or None."""
+    try:
+        return datetime.utcfromtimestamp(os.path.getmtime(os.path.join(DATA_DIR, f'{board_id}.json')))
+    except OSError:
+        return None
+
 def save_board(board):
+    """
+    Write a board read with get_board, bumping its 'revision'. Raises RevisionConflict if
+    the board was saved by someone else since it was read, instead of overwriting that write.
+    """
     ensure_data_dir()
     path = os.path.join(DATA_DIR, f"{board['id']}.json")
-    with LOCK:
+    with locked():
+        current = 0
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                current = json.load(f).get('revision', 0)
+        if board.get('revision', 0) != current:
+            raise RevisionConflict(board['id'], board.get('revision', 0), current)
+        board['revision'] = current + 1
         with open(path, 'w') as f:
             json.dump(board, f)
+    _reindex(board)
 
 def delete_board(board_id):
     ensure_data_dir()
-    with LOCK:
+    with locked():
         # Remove from boards.json
         boards = list_boards()
         boards = [b for b in boards if b['id'] != board_id]
@@ -62,23 +150,75 @@ def delete_board(board_id):
         board_file = os.path.join(DATA_DIR, f'{board_id}.json')
         if os.path.exists(board_file):
             os.remove(board_file)
+    _reindex(board_id=board_id)
 
 def import_board(board_data):
+    return import_boards([board_data])[0]
+
+def import_boards(boards_data):
+    """Import many boards, writing boards.json once; returns the new board ids in order."""
     ensure_data_dir()
-    orig_name = board_data.get('name', 'Imported Board')
-    name = orig_name
-    boards = list_boards()
-    names = {b['name'] for b in boards}
-    i = 1
-    while name in names:
-        name = f"{orig_name} ({i})"
-        i += 1
-    board_id = str(uuid4())
-    board = {'id': board_id, 'name': name, 'thoughts': board_data.get('thoughts', [])}
-    with LOCK:
-        boards.append({'id': board_id, 'name': name})
+    imported = []
+    with locked():
+        boards = list_boards()
+        names = {b['name'] for b in boards}
+        for board_data in boards_data:
+            orig_name = board_data.get('name', 'Imported Board')
+            name = orig_name
+            i = 1
+            while name in names:
+                name = f"{orig_name} ({i})"
+                i += 1
+            names.add(name)
+            board_id = str(uuid4())
+            board = {'id': board_id, 'name': name, 'thoughts': board_data.get('thoughts', [])}
+            with open(os.path.join(DATA_DIR, f'{board_id}.json'), 'w') as f:
+                json.dump(board, f)
+            boards.append({'id': board_id, 'name': name})
+            imported.append(board)
         with open(BOARDS_INDEX, 'w') as f:
             json.dump(boards, f)
-        with open(os.path.join(DATA_DIR, f'{board_id}.json'), 'w') as f:
-            json.dump(board, f)
-    return board_id
+    for board in imported:
+        _reindex(board)
+    return [board['id'] for board in imported]
+
+def migrated_id(board_id):
+    """Database id of a JSON board moved by scripts/migrate_json_boards.py, or None."""
+    try:
+        st = os.stat(ALIASES)
+    except OSError:
+        return None
+    signature = (st.st_mtime_ns, st.st_size)
+    if _aliases['signature'] != signature:
+        with locked(shared=True):
+            with open(ALIASES, 'r') as f:
+                _aliases['map'] = json.load(f)
+        _aliases['signature'] = signature
+    return _aliases['map'].get(str(board_id))
+
+def retire_boards(mapping):
+    """
+    Record JSON boards as migrated ({json id: db id}): aliases are written, the boards
+    leave boards.json and their files move to boards_data/migrated/. Call inside locked()
+    together with the copy so no write to those boards can slip in between.
+    """
+    ensure_data_dir()
+    with locked():
+        aliases = {}
+        if os.path.exists(ALIASES):
+            with open(ALIASES, 'r') as f:
+                aliases = json.load(f)
+        aliases.update({str(k): v for k, v in mapping.items()})
+        with open(ALIASES + '.tmp', 'w') as f:
+            json.dump(aliases, f)
+        os.replace(ALIASES + '.tmp', ALIASES)
+        boards = [b for b in list_boards() if b['id'] not in mapping]
+        with open(BOARDS_INDEX, 'w') as f:
+            json.dump(boards, f)
+        os.makedirs(MIGRATED_DIR, exist_ok=True)
+        for board_id in mapping:
+            board_file = os.path.join(DATA_DIR, f'{board_id}.json')
+            if os.path.exists(board_file):
+                shutil.move(board_file, os.path.join(MIGRATED_DIR, f'{board_id}.json'))
+    for board_id in mapping:
+        _reindex(board_id=board_id)
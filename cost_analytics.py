@@ -0,0 +1,350 @@
+"""
+Cost and Latency Analytics
+Aggregates the cost ledger (costs/ledger.db) by day, endpoint, model, user, board or
+route from a daily rollup table: the ledger writer adds each batch to the rollups, so a
+report reads rollup rows only and dashboards stay fast over months of data
+"""
+
+import json
+import math
+import os
+import re
+import sqlite3
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from flask import Blueprint, jsonify, request
+from flask_login import current_user, login_required
+
+from cost_ledger import COST_LEDGER_DIR, COST_LEDGER_PATH, FIELDS, ensure_schema
+
+cost_analytics_bp = Blueprint('cost_analytics', __name__, url_prefix='/admin/costs')
+
+# Dimensions a report can be grouped by (name -> rollup column)
+GROUP_COLUMNS = {
+    'day': 'day',
+    'endpoint': 'endpoint',
+    'model': 'model',
+    'provider': 'provider',
+    'user': 'user_id',
+    'board': 'board_id',
+    'route': 'route',
+}
+
+# Rollup key columns, in primary key order
+ROLLUP_KEYS = ('day', 'provider', 'model', 'endpoint', 'user_id', 'board_id', 'route')
+ROLLUP_SUMS = ('calls', 'input_tokens', 'cached_tokens', 'output_tokens', 'total_cost', 'cache_savings',
+               'latency_ms_sum', 'latency_count')
+
+# Percentiles come from log-scale histograms kept per rollup row: bucket i counts values
+# up to HIST_BASE ** i, so an estimate is at most 5% above the exact value
+HIST_BASE = 1.05
+
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_costs_daily (
+    day TEXT NOT NULL,
+    provider TEXT NOT NULL DEFAULT '',
+    model TEXT NOT NULL DEFAULT '',
+    endpoint TEXT NOT NULL DEFAULT '',
+    user_id TEXT NOT NULL DEFAULT '',
+    board_id TEXT NOT NULL DEFAULT '',
+    route TEXT NOT NULL DEFAULT '',
+    calls INTEGER NOT NULL,
+    input_tokens INTEGER NOT NULL,
+    cached_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    total_cost REAL NOT NULL,
+    cache_savings REAL NOT NULL,
+    latency_ms_sum REAL NOT NULL,
+    latency_count INTEGER NOT NULL,
+    tokens_hist TEXT NOT NULL DEFAULT '{}',
+    latency_hist TEXT NOT NULL DEFAULT '{}',
+    PRIMARY KEY (day, provider, model, endpoint, user_id, board_id, route)
+);
+CREATE INDEX IF NOT EXISTS ix_llm_costs_daily_endpoint ON llm_costs_daily (endpoint, day);
+CREATE INDEX IF NOT EXISTS ix_llm_costs_daily_model ON llm_costs_daily (model, day);
+CREATE TABLE IF NOT EXISTS llm_cost_imports (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    rows INTEGER NOT NULL
+);
+"""
+
+
+def ensure_rollup_schema(conn: sqlite3.Connection):
+    """Create the rollup tables; rollups from before histograms are rebuilt from the ledger."""
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(llm_costs_daily)')}
+    rebuild = 'tokens_hist' not in columns
+    if rebuild:
+        conn.execute('DROP TABLE IF EXISTS llm_costs_daily')
+    conn.executescript(ROLLUP_SCHEMA)
+    if rebuild:
+        days = [row[0] for row in conn.execute('SELECT DISTINCT day FROM llm_costs')]
+        refresh_rollups(conn, days)
+
+
+def connect(path: str = COST_LEDGER_PATH) -> sqlite3.Connection:
+    """Open the ledger database, creating the ledger and rollup tables if needed."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    ensure_schema(conn)
+    ensure_rollup_schema(conn)
+    return conn
+
+
+def _cache_savings(model: str, cached_tokens: int) -> float:
+    """Dollars saved by cached prompt tokens compared with the full input rate."""
+    if not cached_tokens:
+        return 0.0
+    from openai_api import MODEL_COSTS
+    costs = MODEL_COSTS.get(model or '')
+    if not costs or 'cached_input' not in costs:
+        return 0.0
+    return (cached_tokens / 1000) * (costs['input'] - costs['cached_input'])
+
+
+def _hist_bucket(value: float) -> str:
+    # JSON object keys are strings
+    return '0' if value <= 1 else str(math.ceil(math.log(value, HIST_BASE)))
+
+
+def _merge_hist(into: Dict[str, int], other: Dict[str, int]):
+    for bucket, count in other.items():
+        into[bucket] = into.get(bucket, 0) + count
+
+
+def _hist_percentile(hist: Dict[str, int], pct: float, digits: Optional[int] = None) -> Optional[float]:
+    """Nearest-rank percentile estimated from a histogram (the bucket's upper bound)."""
+    total = sum(hist.values())
+    if not total:
+        return None
+    rank = min(total, max(1, math.ceil(pct / 100.0 * total)))
+    seen = 0
+    for bucket in sorted(hist, key=int):
+        seen += hist[bucket]
+        if seen >= rank:
+            return round(HIST_BASE ** int(bucket), digits)
+    return None
+
+
+def _aggregate(records: Iterable[Any]) -> Dict[tuple, Dict[str, Any]]:
+    """Rollup rows (key -> sums and histograms) for ledger records (dicts or sqlite3.Row)."""
+    rollups: Dict[tuple, Dict[str, Any]] = {}
+    for r in records:
+        key = tuple('' if r[k] is None else str(r[k]) for k in ROLLUP_KEYS)
+        row = rollups.get(key)
+        if row is None:
+            row = rollups[key] = {**{k: 0 for k in ROLLUP_SUMS}, 'tokens_hist': {}, 'latency_hist': {}}
+        tokens = (r['input_tokens'] or 0) + (r['output_tokens'] or 0)
+        row['calls'] += 1
+        row['input_tokens'] += r['input_tokens'] or 0
+        row['cached_tokens'] += r['cached_tokens'] or 0
+        row['output_tokens'] += r['output_tokens'] or 0
+        row['total_cost'] += r['total_cost'] or 0
+        row['cache_savings'] += _cache_savings(r['model'], r['cached_tokens'] or 0)
+        _merge_hist(row['tokens_hist'], {_hist_bucket(tokens): 1})
+        if r['latency_ms'] is not None:
+            row['latency_ms_sum'] += r['latency_ms']
+            row['latency_count'] += 1
+            _merge_hist(row['latency_hist'], {_hist_bucket(r['latency_ms']): 1})
+    return rollups
+
+
+def _write_rollups(conn: sqlite3.Connection, rollups: Dict[tuple, Dict[str, Any]]):
+    columns = ROLLUP_KEYS + ROLLUP_SUMS + ('tokens_hist', 'latency_hist')
+    conn.executemany(
+        f"INSERT OR REPLACE INTO llm_costs_daily ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+        [key + tuple(row[c] for c in ROLLUP_SUMS) + (json.dumps(row['tokens_hist']), json.dumps(row['latency_hist']))
+         for key, row in rollups.items()])
+
+
+def add_to_rollups(conn: sqlite3.Connection, records: List[Dict[str, Any]]):
+    """
+    Add a batch of new ledger records to the rollups. Called by the ledger writer inside
+    the (BEGIN IMMEDIATE) transaction that inserts the records, so the two never disagree.
+    """
+    rollups = _aggregate({f: r.get(f) for f in FIELDS} for r in records)
+    if not rollups:
+        return
+    where = ' AND '.join(f'{k} = ?' for k in ROLLUP_KEYS)
+    for key, row in rollups.items():
+        existing = conn.execute(f"SELECT {', '.join(ROLLUP_SUMS)}, tokens_hist, latency_hist "
+                                f"FROM llm_costs_daily WHERE {where}", key).fetchone()
+        if existing is None:
+            continue
+        for i, column in enumerate(ROLLUP_SUMS):
+            row[column] += existing[i]
+        _merge_hist(row['tokens_hist'], json.loads(existing[len(ROLLUP_SUMS)]))
+        _merge_hist(row['latency_hist'], json.loads(existing[len(ROLLUP_SUMS) + 1]))
+    _write_rollups(conn, rollups)
+
+
+def refresh_rollups(conn: sqlite3.Connection, days: Optional[List[str]] = None) -> int:
+    """
+    Rebuild daily rollup rows from the ledger (after imports, or with the CLI's --refresh
+    for ledger rows written without the rollups). By default the most recent rolled-up day
+    onwards is recomputed; pass `days` to rebuild specific days.
+    Returns the number of rollup rows written.
+    """
+    if days is None:
+        latest = conn.execute('SELECT MAX(day) FROM llm_costs_daily').fetchone()[0]
+        where, params = ('day >= ?', [latest]) if latest else ('1 = 1', [])
+    else:
+        if not days:
+            return 0
+        where, params = f"day IN ({', '.join('?' for _ in days)})", list(days)
+    conn.commit()
+    with conn:
+        conn.execute('BEGIN IMMEDIATE')
+        cursor = conn.execute(f"""
+            SELECT {', '.join(ROLLUP_KEYS)}, input_tokens, cached_tokens, output_tokens, total_cost, latency_ms
+            FROM llm_costs WHERE {where}""", params)
+        cursor.row_factory = sqlite3.Row
+        rollups = _aggregate(cursor)
+        conn.execute(f'DELETE FROM llm_costs_daily WHERE {where}', params)
+        _write_rollups(conn, rollups)
+    return len(rollups)
+
+
+def report(conn: sqlite3.Connection, group_by: str = 'endpoint', start: Optional[str] = None,
+           end: Optional[str] = None) -> Dict:
+    """
+    Cost report between two days (inclusive, YYYY-MM-DD) grouped by one dimension, read
+    from the rollup table only (totals, and percentiles from the merged histograms).
+    """
+    if group_by not in GROUP_COLUMNS:
+        raise ValueError(f"group_by must be one of {sorted(GROUP_COLUMNS)}")
+    end = end or date.today().isoformat()
+    start = start or (date.fromisoformat(end) - timedelta(days=29)).isoformat()
+    column = GROUP_COLUMNS[group_by]
+
+    groups: Dict[str, Dict] = {}
+    hists: Dict[str, Dict[str, Dict[str, int]]] = {}
+    for r in conn.execute(f"""
+            SELECT {column} AS key, calls, input_tokens, cached_tokens, output_tokens, total_cost,
+                   cache_savings, tokens_hist, latency_hist
+            FROM llm_costs_daily WHERE day BETWEEN ? AND ?""", (start, end)):
+        key = r['key'] or 'unknown'
+        group = groups.setdefault(key, {group_by: key, 'calls': 0, 'input_tokens': 0, 'cached_tokens': 0,
+                                        'output_tokens': 0, 'total_cost': 0.0, 'cache_savings': 0.0})
+        group['calls'] += r['calls']
+        group['input_tokens'] += r['input_tokens'] or 0
+        group['cached_tokens'] += r['cached_tokens'] or 0
+        group['output_tokens'] += r['output_tokens'] or 0
+        group['total_cost'] = round(group['total_cost'] + (r['total_cost'] or 0), 6)
+        group['cache_savings'] = round(group['cache_savings'] + (r['cache_savings'] or 0), 6)
+        hist = hists.setdefault(key, {'tokens': {}, 'latency': {}})
+        _merge_hist(hist['tokens'], json.loads(r['tokens_hist']))
+        _merge_hist(hist['latency'], json.loads(r['latency_hist']))
+    for key, hist in hists.items():
+        groups[key].update({
+            'tokens_p50': _hist_percentile(hist['tokens'], 50),
+            'tokens_p95': _hist_percentile(hist['tokens'], 95),
+            'tokens_p99': _hist_percentile(hist['tokens'], 99),
+            'latency_p50_ms': _hist_percentile(hist['latency'], 50, 1),
+            'latency_p95_ms': _hist_percentile(hist['latency'], 95, 1),
+        })
+
+    rows = sorted(groups.values(), key=lambda g: g.get('total_cost') or 0, reverse=True)
+    totals = {
+        'calls': sum(g.get('calls') or 0 for g in rows),
+        'input_tokens': sum(g.get('input_tokens') or 0 for g in rows),
+        'cached_tokens': sum(g.get('cached_tokens') or 0 for g in rows),
+        'output_tokens': sum(g.get('output_tokens') or 0 for g in rows),
+        'total_cost': round(sum(g.get('total_cost') or 0 for g in rows), 6),
+        'cache_savings': round(sum(g.get('cache_savings') or 0 for g in rows), 6),
+    }
+    return {'group_by': group_by, 'start': start, 'end': end, 'groups': rows, 'totals': totals}
+
+
+# Lines written by the old fixed-width text logger, with or without an endpoint tag:
+# 05:54:57 | gpt-4o       [conversation] | In: 7589tok($ 0.0190) | Out:  48tok($ 0.0005) | Total:$ 0.0195
+_TEXT_LINE_RE = re.compile(
+    r'^(\d\d:\d\d:\d\d) \| (\S+)\s*(?:\[([^\]]*)\])?\s*\| In:\s*(\d+)tok\(\$\s*([\d.]+)\) '
+    r'\| Out:\s*(\d+)tok\(\$\s*([\d.]+)\) \| Total:\$\s*([\d.]+)')
+_TEXT_FILE_RE = re.compile(r'llm_costs_(\d{4}-\d{2}-\d{2})\.txt$')
+
+
+def import_text_logs(conn: sqlite3.Connection, directory: str = COST_LEDGER_DIR) -> Dict[str, int]:
+    """
+    Import costs/llm_costs_<date>.txt files into the ledger. Files already imported at the
+    same size are skipped; a file that grew since is re-imported in full.
+    """
+    imported = {'files': 0, 'rows': 0, 'skipped_files': 0}
+    if not os.path.isdir(directory):
+        return imported
+    touched_days = []
+    for name in sorted(os.listdir(directory)):
+        match = _TEXT_FILE_RE.search(name)
+        if not match:
+            continue
+        path = os.path.join(directory, name)
+        day = match.group(1)
+        size = os.path.getsize(path)
+        known = conn.execute('SELECT size FROM llm_cost_imports WHERE path = ?', (name,)).fetchone()
+        if known and known['size'] == size:
+            imported['skipped_files'] += 1
+            continue
+        records = []
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                m = _TEXT_LINE_RE.match(line)
+                if not m:
+                    continue
+                clock, model, endpoint, in_tok, in_cost, out_tok, out_cost, total = m.groups()
+                ts = datetime.strptime(f'{day} {clock}', '%Y-%m-%d %H:%M:%S').timestamp()
+                records.append((ts, day, 'gemini' if model.startswith('gemini') else 'openai', model,
+                                endpoint or None, int(in_tok), int(out_tok), float(in_cost),
+                                float(out_cost), float(total), name))
+        with conn:
+            conn.execute('DELETE FROM llm_costs WHERE source = ?', (name,))
+            conn.executemany("""
+                INSERT INTO llm_costs (ts, day, provider, model, endpoint, input_tokens, output_tokens,
+                                       input_cost, output_cost, total_cost, source)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""", records)
+            conn.execute('INSERT OR REPLACE INTO llm_cost_imports (path, size, rows) VALUES (?, ?, ?)',
+                         (name, size, len(records)))
+        touched_days.append(day)
+        imported['files'] += 1
+        imported['rows'] += len(records)
+    refresh_rollups(conn, touched_days)
+    return imported
+
+
+# --- Admin API ---
+
+def _is_admin():
+    return current_user.is_authenticated and getattr(current_user, 'is_admin', False)
+
+
+@cost_analytics_bp.route('/report', methods=['GET'])
+@login_required
+def cost_report():
+    """GET /admin/costs/report?group_by=endpoint&start=YYYY-MM-DD&end=YYYY-MM-DD"""
+    if not _is_admin():
+        return jsonify({'error': 'Unauthorized'}), 403
+    conn = connect()
+    try:
+        return jsonify(report(conn, request.args.get('group_by', 'endpoint'),
+                              request.args.get('start'), request.args.get('end')))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    finally:
+        conn.close()
+
+
+@cost_analytics_bp.route('/import', methods=['POST'])
+@login_required
+def cost_import():
+    """Import the legacy costs/llm_costs_*.txt logs into the ledger."""
+    if not _is_admin():
+        return jsonify({'error': 'Unauthorized'}), 403
+    conn = connect()
+    try:
+        return jsonify({'success': True, **import_text_logs(conn)})
+    finally:
+        conn.close()
@@ -0,0 +1,303 @@
+"""
+LLM Cost Ledger
+Structured per-call cost records (model, endpoint, user, board, tokens, latency, cost)
+queued in memory on the request path and written in batches by a background thread,
+which also keeps the daily rollups of cost_analytics up to date
+"""
+
+import atexit
+import contextlib
+import contextvars
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from debug_logger import get_logger
+
+# Where cost records go: 'sqlite' (COST_LEDGER_PATH database) or 'ndjson'
+# (one costs/llm_costs_<date>.ndjson file per day under COST_LEDGER_DIR)
+COST_LEDGER_BACKEND = os.environ.get('COST_LEDGER_BACKEND', 'sqlite').lower()
+COST_LEDGER_DIR = os.environ.get('COST_LEDGER_DIR', 'costs')
+COST_LEDGER_PATH = os.environ.get('COST_LEDGER_PATH', os.path.join(COST_LEDGER_DIR, 'ledger.db'))
+
+# In-memory queue bound; records beyond it are dropped (and counted) rather than blocking a request
+COST_LEDGER_QUEUE_SIZE = int(os.environ.get('COST_LEDGER_QUEUE_SIZE', '10000'))
+# Writer batching: flush when this many records are waiting or after this many seconds
+COST_LEDGER_BATCH_SIZE = int(os.environ.get('COST_LEDGER_BATCH_SIZE', '200'))
+COST_LEDGER_FLUSH_SECONDS = float(os.environ.get('COST_LEDGER_FLUSH_SECONDS', '2.0'))
+
+log = get_logger('costs')
+
+# Column order of the llm_costs table and of NDJSON records
+FIELDS = (
+    'ts', 'day', 'provider', 'model', 'endpoint', 'user_id', 'board_id',
+    'input_tokens', 'cached_tokens', 'output_tokens', 'latency_ms',
+    'input_cost', 'output_cost', 'total_cost', 'route', 'route_reason',
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_costs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    day TEXT NOT NULL,
+    provider TEXT,
+    model TEXT,
+    endpoint TEXT,
+    user_id INTEGER,
+    board_id TEXT,
+    input_tokens INTEGER DEFAULT 0,
+    cached_tokens INTEGER DEFAULT 0,
+    output_tokens INTEGER DEFAULT 0,
+    latency_ms REAL,
+    input_cost REAL DEFAULT 0,
+    output_cost REAL DEFAULT 0,
+    total_cost REAL DEFAULT 0,
+    source TEXT,
+    route TEXT,
+    route_reason TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_llm_costs_ts ON llm_costs (ts);
+CREATE INDEX IF NOT EXISTS ix_llm_costs_day_endpoint ON llm_costs (day, endpoint);
+"""
+
+# Columns added after the first release of the table (added in place to existing ledgers)
+ADDED_COLUMNS = {'source': 'TEXT', 'route': 'TEXT', 'route_reason': 'TEXT'}
+
+_STOP = object()
+
+# Routing decision of the provider call in progress (set by llm_provider, copied into its records)
+_route: contextvars.ContextVar = contextvars.ContextVar('llm_route', default=None)
+
+
+@contextlib.contextmanager
+def route_context(route: str, reason: Optional[str] = None):
+    """Tag every cost record made inside the block with a routing decision
+    (e.g. route='failover', reason='openai:provider_unavailable')."""
+    token = _route.set({'route': route, 'route_reason': reason})
+    try:
+        yield
+    finally:
+        _route.reset(token)
+
+
+def ensure_schema(conn: sqlite3.Connection):
+    """Create the llm_costs table and add columns missing from older ledgers."""
+    conn.executescript(SCHEMA)
+    existing = {row[1] for row in conn.execute('PRAGMA table_info(llm_costs)')}
+    for column, kind in ADDED_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f'ALTER TABLE llm_costs ADD COLUMN {column} {kind}')
+    conn.commit()
+
+
+def _request_context() -> Dict[str, Any]:
+    """User and board of the current Flask request, if any (cheap, no I/O)."""
+    try:
+        from flask import has_request_context, request
+        if not has_request_context():
+            return {}
+        context = {}
+        try:
+            from flask_login import current_user
+            if current_user and current_user.is_authenticated:
+                context['user_id'] = current_user.id
+        except Exception:
+            pass
+        board_id = (request.view_args or {}).get('board_id') or request.args.get('board_id')
+        if board_id is None and request.is_json:
+            body = request.get_json(silent=True)
+            if isinstance(body, dict):
+                board_id = body.get('board_id')
+        if board_id is not None:
+            context['board_id'] = str(board_id)
+        return context
+    except Exception:
+        return {}
+
+
+class SQLiteSink:
+    """Appends batches to the llm_costs table (connection owned by the writer thread)."""
+
+    def __init__(self, path: str = COST_LEDGER_PATH):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            ensure_schema(self._conn)
+            from cost_analytics import ensure_rollup_schema
+            ensure_rollup_schema(self._conn)
+        return self._conn
+
+    def write(self, records: List[Dict[str, Any]]):
+        from cost_analytics import add_to_rollups
+        conn = self.connect()
+        placeholders = ', '.join('?' for _ in FIELDS)
+        with conn:
+            # Ledger rows and their daily rollups commit together; IMMEDIATE serializes
+            # the rollup read-modify-write between workers
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany(
+                f"INSERT INTO llm_costs ({', '.join(FIELDS)}) VALUES ({placeholders})",
+                [tuple(r.get(f) for f in FIELDS) for r in records])
+            add_to_rollups(conn, records)
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class NDJSONSink:
+    """Appends batches to one NDJSON file per day."""
+
+    def __init__(self, directory: str = COST_LEDGER_DIR):
+        self.directory = directory
+
+    def write(self, records: List[Dict[str, Any]]):
+        os.makedirs(self.directory, exist_ok=True)
+        by_day: Dict[str, List[str]] = {}
+        for r in records:
+            by_day.setdefault(r['day'], []).append(json.dumps(r, ensure_ascii=False))
+        for day, lines in by_day.items():
+            with open(os.path.join(self.directory, f'llm_costs_{day}.ndjson'), 'a', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+
+    def close(self):
+        pass
+
+
+class CostLedger:
+    """
+    Bounded, non-blocking cost recorder.
+
+    record() only builds a dict and puts it on a queue; a daemon thread started on first
+    use drains the queue in batches into the configured sink. When the queue is full the
+    record is dropped and counted instead of stalling the request.
+    """
+
+    def __init__(self, sink=None, maxsize: int = COST_LEDGER_QUEUE_SIZE,
+                 batch_size: int = COST_LEDGER_BATCH_SIZE, flush_seconds: float = COST_LEDGER_FLUSH_SECONDS):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.dropped = 0
+        self.written = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=maxsize)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_writer(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                if self.sink is None:
+                    self.sink = NDJSONSink() if COST_LEDGER_BACKEND == 'ndjson' else SQLiteSink()
+                self._thread = threading.Thread(target=self._run, name='cost-ledger-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def record(self, model: str, endpoint: Optional[str], input_tokens: int = 0, output_tokens: int = 0,
+               cached_tokens: int = 0, latency_ms: Optional[float] = None, input_cost: float = 0.0,
+               output_cost: float = 0.0, total_cost: float = 0.0, provider: Optional[str] = None,
+               user_id=None, board_id=None, **extra) -> bool:
+        """Queue one cost record; user/board default to the current request. Never blocks."""
+        now = time.time()
+        entry = {
+            'ts': now,
+            'day': datetime.fromtimestamp(now).strftime('%Y-%m-%d'),
+            'provider': provider,
+            'model': model,
+            'endpoint': endpoint,
+            'user_id': user_id,
+            'board_id': str(board_id) if board_id is not None else None,
+            'input_tokens': int(input_tokens or 0),
+            'cached_tokens': int(cached_tokens or 0),
+            'output_tokens': int(output_tokens or 0),
+            'latency_ms': round(latency_ms, 1) if latency_ms is not None else None,
+            'input_cost': input_cost,
+            'output_cost': output_cost,
+            'total_cost': total_cost,
+        }
+        if user_id is None or board_id is None:
+            context = _request_context()
+            if entry['user_id'] is None:
+                entry['user_id'] = context.get('user_id')
+            if entry['board_id'] is None:
+                entry['board_id'] = context.get('board_id')
+        route = _route.get()
+        if route:
+            entry.update(route)
+        entry.update(extra)
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(entry)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_seconds)
+            except queue.Empty:
+                continue
+            batch = []
+            stop = item is _STOP
+            if not stop:
+                batch.append(item)
+            deadline = time.monotonic() + self.flush_seconds
+            while not stop and len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                else:
+                    batch.append(item)
+            if batch:
+                self._write(batch)
+            if stop:
+                self.sink.close()
+                return
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        try:
+            self.sink.write(batch)
+            self.written += len(batch)
+        except Exception as e:
+            log.error("Could not write %d cost records: %s", len(batch), e)
+
+    def close(self, timeout: float = 5.0):
+        """Flush pending records and stop the writer thread."""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        thread.join(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        return {'queued': self._queue.qsize(), 'written': self.written, 'dropped': self.dropped}
+
+
+# Global cost ledger instance
+cost_ledger = CostLedger()
@@ -1,44 +1,293 @@
 """
 Debug Logger for Hybrid Interactive Mode
-Captures processing logs for in-app visibility
+Captures processing logs for in-app visibility and provides the app-wide
+structured logging layer (levels, per-category sampling, queue-backed output)
 """
 
+import atexit
 import datetime
-from collections import deque
-from typing import Dict, List, Any
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from typing import Dict, List, Any, Optional, Tuple
 import threading
 
+# Minimum level written to the log stream (DEBUG, INFO, WARNING, ERROR)
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+
+# Output format of the log stream: 'json' (one object per line) or 'text'
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json').lower()
+
+# Per-category sampling of DEBUG/INFO records, e.g. "filtering=0.1,rule_based=0.5,*=1".
+# Warnings and errors are never sampled out.
+LOG_SAMPLE_RATES = os.environ.get('LOG_SAMPLE_RATES', '')
+
+# Keep DebugLogger entries in memory for the /debug page (off by default; enable in development)
+DEBUG_CAPTURE = os.environ.get('DEBUG_CAPTURE', 'false').lower() == 'true'
+
+# Debug capture buffers: longest string kept per entry field, and optional spill of
+# every captured entry to size-rotated NDJSON files (DEBUG_SPILL_DIR empty = off)
+DEBUG_MAX_FIELD_CHARS = int(os.environ.get('DEBUG_MAX_FIELD_CHARS', '20000'))
+DEBUG_SPILL_DIR = os.environ.get('DEBUG_SPILL_DIR', '')
+DEBUG_SPILL_MAX_BYTES = int(os.environ.get('DEBUG_SPILL_MAX_BYTES', str(5 * 1024 * 1024)))
+DEBUG_SPILL_BACKUPS = int(os.environ.get('DEBUG_SPILL_BACKUPS', '3'))
+
+ROOT_LOGGER = 'gaps'
+
+
+def _parse_sample_rates(spec: str) -> Dict[str, float]:
+    rates = {}
+    for part in spec.split(','):
+        name, _, value = part.partition('=')
+        if not name.strip() or not value.strip():
+            continue
+        try:
+            rates[name.strip()] = min(1.0, max(0.0, float(value)))
+        except ValueError:
+            continue
+    return rates
+
+
+class CategorySampler(logging.Filter):
+    """Drop a fraction of low-level records per category (the logger name below 'gaps.')."""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self.default = rates.get('*', 1.0)
+
+    def rate(self, category: str) -> float:
+        return self.rates.get(category, self.default)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        category = getattr(record, 'category', None) or record.name.rpartition('.')[2]
+        rate = self.rate(category)
+        return rate >= 1.0 or random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, category, message and structured data."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'category': getattr(record, 'category', None) or record.name.rpartition('.')[2],
+            'message': record.getMessage(),
+        }
+        data = getattr(record, 'data', None)
+        if data:
+            entry['data'] = data
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+sampler = CategorySampler(_parse_sample_rates(LOG_SAMPLE_RATES))
+_listener: Optional[logging.handlers.QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+def configure_logging(level: Optional[str] = None, stream=None) -> logging.Logger:
+    """
+    Configure the 'gaps' logger once: records are filtered by level and sampling in the
+    calling thread, then handed to a queue; a background listener does the formatting
+    and the actual write, so request threads never block on log I/O.
+    """
+    global _listener
+    root = logging.getLogger(ROOT_LOGGER)
+    with _setup_lock:
+        if _listener is not None:
+            return root
+        root.setLevel(getattr(logging, (level or LOG_LEVEL), logging.INFO))
+        root.propagate = False
+
+        output = logging.StreamHandler(stream or sys.stderr)
+        if LOG_FORMAT == 'text':
+            output.setFormatter(logging.Formatter('%(asctime)s %(levelname)s [%(name)s] %(message)s'))
+        else:
+            output.setFormatter(JsonFormatter())
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.addFilter(sampler)
+        root.handlers[:] = [queue_handler]
+
+        _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+    return root
+
+
+def get_logger(category: str) -> logging.Logger:
+    """Logger for one category (e.g. 'interactive', 'thoughts'); use %-style args so
+    messages below the configured level are never formatted."""
+    configure_logging()
+    return logging.getLogger(f'{ROOT_LOGGER}.{category}')
+
+
+def _truncate(value: Any, limit: int) -> Any:
+    """Cap strings (also inside dicts/lists) at `limit` characters."""
+    if isinstance(value, str):
+        if len(value) > limit:
+            return value[:limit] + f'... [truncated {len(value) - limit} chars]'
+        return value
+    if isinstance(value, dict):
+        return {k: _truncate(v, limit) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_truncate(v, limit) for v in value]
+    return value
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queue the record untouched; captured entries are never mutated, so all
+    serialization can happen on the listener thread."""
+
+    def prepare(self, record):
+        return record
+
+
+class _EntryFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record.msg, default=str, ensure_ascii=False)
+
+
+def _spill_logger(name: str, directory: str) -> logging.Logger:
+    """Logger writing entries to <directory>/<name>.ndjson with size-based rotation."""
+    os.makedirs(directory, exist_ok=True)
+    output = logging.handlers.RotatingFileHandler(
+        os.path.join(directory, f'{name}.ndjson'), maxBytes=DEBUG_SPILL_MAX_BYTES,
+        backupCount=DEBUG_SPILL_BACKUPS, encoding='utf-8')
+    output.setFormatter(_EntryFormatter())
+    spill_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(spill_queue, output)
+    listener.start()
+    atexit.register(listener.stop)
+    logger = logging.getLogger(f'{ROOT_LOGGER}.spill.{name}')
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.handlers[:] = [_DeferredQueueHandler(spill_queue)]
+    return logger
+
+
+class RingBuffer:
+    """
+    Bounded capture buffer shared by the debug consoles.
+
+    Writers claim a sequence number and store the entry in slot seq % capacity under a
+    short lock, so entries are published in sequence order and old ones are overwritten
+    in O(1); readers take no lock. Readers pass the last sequence number they saw (`since`) and
+    only receive newer entries. Oversized string fields are truncated, a sample rate
+    below 1 keeps only that fraction of entries, and with a spill directory every kept
+    entry is also appended to a rotating NDJSON file off the request thread.
+    """
+
+    def __init__(self, capacity: int, name: str = 'debug', max_field_chars: int = DEBUG_MAX_FIELD_CHARS,
+                 sample_rate: float = 1.0, spill_dir: str = DEBUG_SPILL_DIR):
+        self.capacity = max(1, int(capacity))
+        self.name = name
+        self.max_field_chars = max_field_chars
+        self.sample_rate = sample_rate
+        self._slots: List[Optional[Dict[str, Any]]] = [None] * self.capacity
+        self._lock = threading.Lock()
+        self._last_seq = 0
+        self._floor = 0  # entries at or below this sequence number were cleared
+        self._spill = _spill_logger(name, spill_dir) if spill_dir else None
+
+    @property
+    def last_seq(self) -> int:
+        return self._last_seq
+
+    def append(self, entry: Dict[str, Any]) -> Optional[int]:
+        """Store an entry; returns its sequence number, or None if it was sampled out."""
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return None
+        entry = _truncate(entry, self.max_field_chars)
+        with self._lock:
+            seq = self._last_seq + 1
+            entry['seq'] = seq
+            self._slots[seq % self.capacity] = entry
+            # Published only once the slot holds the entry, so readers never skip one
+            self._last_seq = seq
+        if self._spill is not None:
+            self._spill.info(entry)
+        return seq
+
+    def since(self, since: int = 0, limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Entries with seq > since, oldest first (at most `limit`, keeping the newest).
+        Returns (entries, cursor) where cursor is the value to pass as `since` next time.
+        """
+        end = self._last_seq
+        start = max(since, self._floor, end - self.capacity) + 1
+        if limit:
+            start = max(start, end - limit + 1)
+        entries = []
+        for seq in range(start, end + 1):
+            entry = self._slots[seq % self.capacity]
+            # A slot may already hold a newer entry (wrapped)
+            if entry is not None and entry['seq'] == seq:
+                entries.append(entry)
+        return entries, max(end, since)
+
+    def latest(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        return self.since(0, limit)[0]
+
+    def clear(self):
+        with self._lock:
+            self._floor = self._last_seq
+            self._slots = [None] * self.capacity
+
+    def __len__(self) -> int:
+        return len(self.latest())
+
+
 class DebugLogger:
     """Thread-safe debug logger for capturing hybrid system processing"""
-    
-    def __init__(self, max_entries=100):
+
+    def __init__(self, max_entries=100, capture=DEBUG_CAPTURE):
         self.max_entries = max_entries
-        self.logs = deque(maxlen=max_entries)
-        self.lock = threading.Lock()
-    
-    def log(self, category: str, message: str, data: Dict[str, Any] = None):
-        """Add a debug log entry"""
-        with self.lock:
-            entry = {
-                'timestamp': datetime.datetime.now().strftime('%H:%M:%S.%f')[:-3],
-                'category': category,
-                'message': message,
-                'data': data or {}
-            }
-            self.logs.append(entry)
-    
+        self.capture = capture
+        self.logs = RingBuffer(max_entries, name='debug_logs')
+
+    def enabled(self, category: str, level: int = logging.DEBUG) -> bool:
+        """True if an entry for this category would be kept or written anywhere.
+        Callers can check this before building expensive log data."""
+        return self.capture or get_logger(category).isEnabledFor(level)
+
+    def log(self, category: str, message: str, data: Dict[str, Any] = None, level: int = None):
+        """Add a debug log entry (and forward it to the structured log stream)"""
+        if level is None:
+            level = logging.ERROR if category == 'error' else logging.DEBUG
+        logger = get_logger(category)
+        if logger.isEnabledFor(level):
+            logger.log(level, message, extra={'category': category, 'data': data})
+        if not self.capture or (level < logging.WARNING and random.random() >= sampler.rate(category)):
+            return
+        self.logs.append({
+            'timestamp': datetime.datetime.now().strftime('%H:%M:%S.%f')[:-3],
+            'category': category,
+            'message': message,
+            'data': data or {}
+        })
+
     def get_logs(self, limit: int = None) -> List[Dict]:
         """Get recent log entries"""
-        with self.lock:
-            logs_list = list(self.logs)
-            if limit:
-                return logs_list[-limit:]
-            return logs_list
-    
+        return self.logs.latest(limit)
+
+    def get_logs_since(self, since: int = 0, limit: int = None) -> Tuple[List[Dict], int]:
+        """Entries newer than the `since` cursor, plus the cursor for the next read"""
+        return self.logs.since(since, limit)
+
     def clear(self):
         """Clear all logs"""
-        with self.lock:
-            self.logs.clear()
+        self.logs.clear()
 
 # Global debug logger instance
 debug_logger = DebugLogger()
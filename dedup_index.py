@@ -0,0 +1,276 @@
+"""
+Near-Duplicate Thought Index
+Exact duplicates are looked up on the indexed Thought.content_hash column; per-board
+MinHash/LSH signatures find near-duplicates without comparing every pair of words
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from models import db, Board, Thought
+from suggestion_filter import normalize_text, SuggestionFilter
+
+# MinHash parameters: 32 hash functions split into 16 LSH bands of 2 rows.
+# Short thoughts need a permissive band layout; candidates are verified exactly.
+NUM_PERM = 32
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# Default Jaccard similarity above which two thoughts count as near-duplicates
+NEAR_DUPLICATE_THRESHOLD = 0.8
+
+# Number of boards kept in memory (least recently used boards are rebuilt on demand)
+MAX_CACHED_BOARDS = 256
+
+
+def _seeded_params():
+    """Deterministic (a, b) coefficients for the MinHash permutations."""
+    params = []
+    for i in range(NUM_PERM):
+        digest = hashlib.blake2b(f"minhash-{i}".encode(), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], 'big') % (_MERSENNE_PRIME - 1) + 1
+        b = int.from_bytes(digest[8:], 'big') % _MERSENNE_PRIME
+        params.append((a, b))
+    return params
+
+
+_PERMUTATIONS = _seeded_params()
+
+
+def content_hash(text: str) -> str:
+    """Stable 64-bit hash of the normalized thought text (stored in Thought.content_hash)."""
+    return hashlib.blake2b(normalize_text(text).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def shingles(text: str) -> frozenset:
+    """Word shingles of the normalized text with the leading intent prefix removed."""
+    return frozenset(SuggestionFilter.semantic_key(normalize_text(text)).split())
+
+
+def minhash(tokens: frozenset) -> Tuple[int, ...]:
+    """MinHash signature of a shingle set."""
+    if not tokens:
+        return tuple([_MAX_HASH] * NUM_PERM)
+    base = [int.from_bytes(hashlib.blake2b(t.encode('utf-8'), digest_size=8).digest(), 'big') for t in tokens]
+    return tuple(
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in base)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class _BoardIndex:
+    """LSH band buckets for one board, as of the board's `revision`."""
+
+    def __init__(self, revision=None):
+        self.revision = revision
+        self.entries: Dict[object, tuple] = {}  # thought_id -> (quadrant, tokens, bands)
+        self.buckets: Dict[tuple, Set] = {}
+
+    def add(self, thought_id, content: str, quadrant: str):
+        self.remove(thought_id)
+        tokens = shingles(content)
+        sig = minhash(tokens)
+        bands = [(i, sig[i * ROWS:(i + 1) * ROWS]) for i in range(BANDS)]
+        self.entries[thought_id] = (quadrant, tokens, bands)
+        for band in bands:
+            self.buckets.setdefault(band, set()).add(thought_id)
+
+    def remove(self, thought_id):
+        entry = self.entries.pop(thought_id, None)
+        if not entry:
+            return
+        _, _, bands = entry
+        for band in bands:
+            ids = self.buckets.get(band)
+            if ids is not None:
+                ids.discard(thought_id)
+                if not ids:
+                    del self.buckets[band]
+
+
+class NearDuplicateIndex:
+    """
+    Thread-safe registry of per-board LSH indexes.
+
+    Each cached board is tagged with the Board.revision it was built at, and every
+    lookup compares that tag with the database: thoughts committed by another worker
+    bump the revision, so the board is reloaded instead of silently missing them.
+    This process's own commits are applied by the session hooks below and move the
+    tag forward when no other write came in between.
+    """
+
+    def __init__(self, threshold: float = NEAR_DUPLICATE_THRESHOLD, max_boards: int = MAX_CACHED_BOARDS):
+        self.threshold = threshold
+        self.max_boards = max_boards
+        self._boards: "OrderedDict[str, _BoardIndex]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _revision(board_id):
+        return db.session.execute(select(Board.revision).where(Board.id == board_id)).scalar()
+
+    def _load(self, board_id, revision) -> _BoardIndex:
+        index = _BoardIndex(revision)
+        rows = (Thought.query
+                .with_entities(Thought.id, Thought.content, Thought.quadrant)
+                .filter_by(board_id=board_id)
+                .all())
+        for thought_id, content, quadrant in rows:
+            index.add(thought_id, content, quadrant)
+        return index
+
+    def _board(self, board_id) -> _BoardIndex:
+        key = str(board_id)
+        revision = self._revision(board_id)
+        with self._lock:
+            index = self._boards.get(key)
+            if index is not None and index.revision == revision:
+                self._boards.move_to_end(key)
+                return index
+        index = self._load(board_id, revision)
+        with self._lock:
+            current = self._boards.get(key)
+            # Another thread may have loaded the same revision meanwhile; keep the first copy
+            if current is not None and current.revision == revision:
+                index = current
+            self._boards[key] = index
+            self._boards.move_to_end(key)
+            while len(self._boards) > self.max_boards:
+                self._boards.popitem(last=False)
+        return index
+
+    def apply(self, board_id, ops, revision=None):
+        """
+        Apply this process's committed (op, thought_id, content, quadrant) changes to a
+        cached board. If the commit took the board from the cached revision to `revision`
+        the tag moves forward; otherwise the board is dropped and reloaded on next use.
+        """
+        with self._lock:
+            index = self._boards.get(str(board_id))
+            if index is None:
+                return
+            if revision is None or index.revision is None or revision != index.revision + 1:
+                del self._boards[str(board_id)]
+                return
+            for op, thought_id, content, quadrant in ops:
+                if op == 'add':
+                    index.add(thought_id, content, quadrant)
+                else:
+                    index.remove(thought_id)
+            index.revision = revision
+
+    def invalidate(self, board_id=None):
+        """Forget one board (or every board) so it is reloaded on next use."""
+        with self._lock:
+            if board_id is None:
+                self._boards.clear()
+            else:
+                self._boards.pop(str(board_id), None)
+
+    def find_exact(self, board_id, content: str, quadrant: Optional[str] = None) -> List:
+        """Thought ids whose normalized text equals `content` (optionally in one quadrant)."""
+        query = Thought.query.with_entities(Thought.id).filter_by(board_id=board_id, content_hash=content_hash(content))
+        if quadrant is not None:
+            query = query.filter_by(quadrant=quadrant)
+        return [thought_id for (thought_id,) in query]
+
+    def find_similar(self, board_id, content: str, quadrant: Optional[str] = None,
+                     threshold: Optional[float] = None, limit: int = 5) -> List[Tuple[object, float]]:
+        """
+        Thought ids that are near-duplicates of `content`, best match first.
+        LSH buckets give the candidates; each is verified with the exact Jaccard similarity.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        tokens = shingles(content)
+        if not tokens:
+            return []
+        sig = minhash(tokens)
+        index = self._board(board_id)
+        with self._lock:
+            candidates = set()
+            for i in range(BANDS):
+                candidates.update(index.buckets.get((i, sig[i * ROWS:(i + 1) * ROWS]), ()))
+            matches = []
+            for tid in candidates:
+                q, other_tokens, _ = index.entries[tid]
+                if quadrant is not None and q != quadrant:
+                    continue
+                similarity = jaccard(tokens, other_tokens)
+                if similarity >= threshold:
+                    matches.append((tid, round(similarity, 3)))
+        matches.sort(key=lambda m: m[1], reverse=True)
+        return matches[:limit]
+
+    def is_duplicate(self, board_id, content: str, quadrant: Optional[str] = None) -> bool:
+        """True if the board already holds the same or a near-duplicate thought."""
+        return bool(self.find_exact(board_id, content, quadrant) or self.find_similar(board_id, content, quadrant, limit=1))
+
+
+# Global near-duplicate index instance
+thought_index = NearDuplicateIndex()
+
+
+# --- Keep Thought.content_hash and the cached LSH indexes in sync with the ORM ---
+
+@event.listens_for(Thought, 'before_insert')
+@event.listens_for(Thought, 'before_update')
+def _set_content_hash(mapper, connection, target):
+    target.content_hash = content_hash(target.content)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_thought_changes(session, flush_context):
+    ops = session.info.setdefault('thought_index_ops', [])
+    for obj in session.new:
+        if isinstance(obj, Thought):
+            ops.append(('add', obj.board_id, obj.id, obj.content, obj.quadrant))
+    for obj in session.dirty:
+        if isinstance(obj, Thought) and session.is_modified(obj):
+            state = inspect(obj)
+            old_board = state.attrs.board_id.history.deleted
+            if old_board:
+                ops.append(('remove', old_board[0], obj.id, None, None))
+            ops.append(('add', obj.board_id, obj.id, obj.content, obj.quadrant))
+    for obj in session.deleted:
+        if isinstance(obj, Thought):
+            ops.append(('remove', obj.board_id, obj.id, None, None))
+        elif isinstance(obj, Board):
+            # Thoughts go with the board through ON DELETE CASCADE
+            ops.append(('drop', obj.id, None, None, None))
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_thought_changes(session):
+    ops = session.info.pop('thought_index_ops', None)
+    if not ops:
+        return
+    # Revisions this transaction left the boards at (bumped by board_repository's flush hook)
+    revisions = dict(session.info.get('board_revisions', {}))
+    revisions.update(session.info.get('pending_revisions', {}))
+    by_board = OrderedDict()
+    for op, board_id, thought_id, content, quadrant in ops:
+        if op == 'drop':
+            by_board.pop(board_id, None)
+            thought_index.invalidate(board_id)
+        else:
+            by_board.setdefault(board_id, []).append((op, thought_id, content, quadrant))
+    for board_id, board_ops in by_board.items():
+        thought_index.apply(board_id, board_ops, revisions.get(board_id))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_thought_changes(session):
+    session.info.pop('thought_index_ops', None)
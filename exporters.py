@@ -0,0 +1,101 @@
+"""
+Streaming Exporters
+Board and conversation exports written to the response while rows are read through a
+server-side cursor: either the usual JSON document, emitted item by item, or NDJSON,
+gzip-compressed on the fly when the client accepts it. Memory stays flat however large
+the board or history is.
+"""
+
+import json
+import os
+import zlib
+from typing import Iterable, Iterator, Optional
+
+from flask import Response, stream_with_context
+
+# Rows fetched per round trip from the database cursor
+EXPORT_BATCH_ROWS = int(os.environ.get('EXPORT_BATCH_ROWS', '500'))
+# Output is handed to the server (and the compressor) in chunks of about this size
+EXPORT_CHUNK_BYTES = int(os.environ.get('EXPORT_CHUNK_BYTES', '65536'))
+# Compress exports when the request's Accept-Encoding allows gzip
+EXPORT_GZIP = os.environ.get('EXPORT_GZIP', 'true').lower() == 'true'
+
+FORMATS = ('json', 'ndjson')
+
+
+def iter_rows(query, batch_size: int = EXPORT_BATCH_ROWS):
+    """Rows of query fetched batch_size at a time instead of all at once."""
+    return query.yield_per(batch_size)
+
+
+def json_array(items: Iterable[dict]) -> Iterator[str]:
+    """A JSON array, one item per line; parses to the same list json.dumps would give."""
+    first = True
+    for item in items:
+        yield ('[\n  ' if first else ',\n  ') + json.dumps(item, ensure_ascii=False)
+        first = False
+    yield '[]\n' if first else '\n]\n'
+
+
+def json_object(header: dict, key: str, items: Iterable[dict]) -> Iterator[str]:
+    """{**header, key: [items]} with the array streamed."""
+    head = json.dumps(header, ensure_ascii=False)[:-1]
+    yield head + (', ' if header else '') + json.dumps(key) + ': '
+    for piece in json_array(items):
+        yield piece.rstrip('\n')
+    yield '}\n'
+
+
+def ndjson(items: Iterable[dict]) -> Iterator[str]:
+    """One JSON object per line."""
+    for item in items:
+        yield json.dumps(item, ensure_ascii=False) + '\n'
+
+
+def _chunked(pieces: Iterable[str], size: int) -> Iterator[bytes]:
+    buf, buffered = [], 0
+    for piece in pieces:
+        data = piece.encode('utf-8')
+        buf.append(data)
+        buffered += len(data)
+        if buffered >= size:
+            yield b''.join(buf)
+            buf, buffered = [], 0
+    if buf:
+        yield b''.join(buf)
+
+
+def _gzipped(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def wants_gzip(request) -> bool:
+    return EXPORT_GZIP and request.accept_encodings['gzip'] > 0
+
+
+def export_format(value: Optional[str]) -> Optional[str]:
+    """'json' (default) or 'ndjson'; None for anything else."""
+    value = (value or 'json').lower()
+    return value if value in FORMATS else None
+
+
+def stream_export(pieces: Iterable[str], filename: str, fmt: str = 'json', gzip: bool = False) -> Response:
+    """
+    Attachment response streaming pieces (from json_array/json_object/ndjson). The
+    generator runs inside the request context, so it can keep reading from the session.
+    """
+    mimetype = 'application/x-ndjson' if fmt == 'ndjson' else 'application/json'
+    body = _chunked(pieces, EXPORT_CHUNK_BYTES)
+    headers = {
+        'Content-Disposition': f'attachment; filename="{filename}"',
+        'Vary': 'Accept-Encoding',
+    }
+    if gzip:
+        body = _gzipped(body)
+        headers['Content-Encoding'] = 'gzip'
+    return Response(stream_with_context(body), content_type=f'{mimetype}; charset=utf-8', headers=headers)
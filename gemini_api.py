@@ -1,20 +1,27 @@
 import os
 import requests
 
+# Structured-output flag and the shared tolerant JSON parser
+import llm_json
+from debug_logger import get_logger
+
+log = get_logger('gemini')
+
 # Import cost tracking functions from openai_api
 try:
     from openai_api import calculate_cost, log_cost_to_file
 except ImportError:
     # Fallback functions if import fails
-    def calculate_cost(model, input_tokens, output_tokens):
-        print(f"💰 COST: {model} | In:{input_tokens}tok Out:{output_tokens}tok (cost tracking unavailable)")
+    def calculate_cost(model, input_tokens, output_tokens, **kwargs):
+        log.info("COST: %s | In:%dtok Out:%dtok (cost tracking unavailable)", model, input_tokens, output_tokens)
         return 0.0
     
     def log_cost_to_file(model, input_tokens, output_tokens, input_cost, output_cost, total_cost):
         pass
 
 GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
-GEMINI_API_URL = 'https://generativelanguage.googleapis.com/v1/models/gemini-1.5-pro:generateContent'
+GEMINI_MODEL = 'gemini-1.5-pro'
+GEMINI_API_URL = f'https://generativelanguage.googleapis.com/v1/models/{GEMINI_MODEL}:generateContent'
 
 # Map Gemini's output to our quadrant keys
 
@@ -23,6 +30,31 @@ def load_prompt(filename):
     with open(path, 'r', encoding='utf-8') as f:
         return f.read()
 
+def _track_usage(data, resp, endpoint):
+    """Record token usage (including cached content tokens) and request latency in the cost ledger."""
+    usage_metadata = data.get('usageMetadata', {})
+    calculate_cost(GEMINI_MODEL, usage_metadata.get('promptTokenCount', 0),
+                   usage_metadata.get('candidatesTokenCount', 0), endpoint=endpoint,
+                   cached_tokens=usage_metadata.get('cachedContentTokenCount', 0),
+                   latency_ms=resp.elapsed.total_seconds() * 1000, provider='gemini')
+
+def _post(endpoint, payload, params, headers):
+    """POST to generateContent through the provider resilience layer (retry, deadline, circuit breaker)"""
+    import llm_provider
+
+    def attempt(timeout):
+        resp = requests.post(GEMINI_API_URL, json=payload, params=params, headers=headers, timeout=timeout)
+        resp.raise_for_status()
+        return resp
+
+    return llm_provider.guarded_call('gemini', GEMINI_MODEL, endpoint, attempt)
+
+def _json_generation_config():
+    """Ask Gemini for a pure JSON reply (responseMimeType) when structured output is enabled."""
+    if llm_json.STRUCTURED_OUTPUT:
+        return {"responseMimeType": "application/json"}
+    return None
+
 def _sanitize_meta(text: str) -> str:
     try:
         import re
@@ -40,7 +72,6 @@ def _sanitize_meta(text: str) -> str:
 
 
 def conversational_facilitator(prompt, conversation_history=None, quadrants=None):
-    print("[GEMINI] conversational_facilitator called", flush=True)
     """
     Calls Gemini with a conversational prompt and returns a structured dict:
     - {'action': 'ask_clarification', 'question': ...}
@@ -62,37 +93,19 @@ def conversational_facilitator(prompt, conversation_history=None, quadrants=None
     }
     params = {"key": GEMINI_API_KEY}
     try:
-        resp = requests.post(GEMINI_API_URL, json=payload, params=params, headers=headers, timeout=15)
-        resp.raise_for_status()
+        resp = _post('conversation', payload, params, headers)
         data = resp.json()
         
-        # Extract token usage for cost tracking
-        usage_metadata = data.get('usageMetadata', {})
-        input_tokens = usage_metadata.get('promptTokenCount', 0)
-        output_tokens = usage_metadata.get('candidatesTokenCount', 0)
-        
-        # Track cost for this API call (always log, even if zero)
-        try:
-            calculate_cost('gemini-1.5-pro', input_tokens, output_tokens, endpoint='conversation')
-        except TypeError:
-            calculate_cost('gemini-1.5-pro', input_tokens, output_tokens)
+        # Cost tracking (always log, even if zero tokens)
+        _track_usage(data, resp, 'conversation')
         
         candidates = data.get('candidates', [])
         if not candidates:
             return {'error': 'No response from Gemini'}
         text = candidates[0]['content']['parts'][0]['text'].strip()
-        import json as _json
         # Try to parse a structured response
-        try:
-            # Remove code block if present
-            import re
-            text_clean = re.sub(r'^```.*$', '', text, flags=re.MULTILINE).strip()
-            match = re.search(r'\{.*\}', text_clean, re.DOTALL)
-            if match:
-                result = _json.loads(match.group(0))
-            else:
-                result = _json.loads(text_clean)
-        except Exception as e:
+        result = llm_json.extract_json(text, expect=dict)
+        if result is None:
             # Fallback: treat as plain text
             # Heuristic: conversational reply
             conversational_indicators = [
@@ -140,10 +153,8 @@ def conversational_facilitator(prompt, conversation_history=None, quadrants=None
         # Fallback plain reply
         return {'reply_text': _sanitize_meta(text)}
     except Exception as e:
-        import traceback
-        print('Exception in conversational_facilitator:', e)
-        traceback.print_exc()
-        return {'error': str(e)}
+        log.exception("Exception in conversational_facilitator: %s", e)
+        return {'error': str(e), 'code': getattr(e, 'code', 'unknown_error')}
 
 
 # =====================
@@ -198,18 +209,11 @@ def summarize_board_with_openai(quadrants, tone: str = 'neutral', length: str =
     params = {"key": GEMINI_API_KEY}
 
     try:
-        resp = requests.post(GEMINI_API_URL, json=payload, params=params, headers=headers, timeout=15)
-        resp.raise_for_status()
+        resp = _post('board_ai_summary', payload, params, headers)
         data = resp.json()
 
         # Cost tracking (always log, even if zero tokens)
-        usage_metadata = data.get('usageMetadata', {})
-        input_tokens = usage_metadata.get('promptTokenCount', 0)
-        output_tokens = usage_metadata.get('candidatesTokenCount', 0)
-        try:
-            calculate_cost('gemini-1.5-pro', input_tokens, output_tokens, endpoint='board_ai_summary')
-        except TypeError:
-            calculate_cost('gemini-1.5-pro', input_tokens, output_tokens)
+        _track_usage(data, resp, 'board_ai_summary')
 
         candidates = data.get('candidates', [])
         if not candidates:
@@ -219,7 +223,7 @@ def summarize_board_with_openai(quadrants, tone: str = 'neutral', length: str =
     except requests.HTTPError as e:
         return {'error': f'HTTP {e.response.status_code}: {e.response.text[:200]}'}
     except Exception as e:
-        return {'error': str(e)}
+        return {'error': str(e), 'code': getattr(e, 'code', 'unknown_error')}
 
 
 # ==================================
@@ -264,23 +268,19 @@ def assess_goals_status_alignment(quadrants):
             {"role": "user", "parts": [{"text": prompt}]}
         ]
     }
+    generation_config = _json_generation_config()
+    if generation_config:
+        payload["generationConfig"] = generation_config
     params = {"key": GEMINI_API_KEY}
 
     debug_align = os.environ.get('DEBUG_ALIGNMENT') == '1'
 
     try:
-        resp = requests.post(GEMINI_API_URL, json=payload, params=params, headers=headers, timeout=15)
-        resp.raise_for_status()
+        resp = _post('board_alignment', payload, params, headers)
         data = resp.json()
 
         # Cost tracking (always log, even if zero tokens)
-        usage_metadata = data.get('usageMetadata', {})
-        input_tokens = usage_metadata.get('promptTokenCount', 0)
-        output_tokens = usage_metadata.get('candidatesTokenCount', 0)
-        try:
-            calculate_cost('gemini-1.5-pro', input_tokens, output_tokens, endpoint='board_alignment')
-        except TypeError:
-            calculate_cost('gemini-1.5-pro', input_tokens, output_tokens)
+        _track_usage(data, resp, 'board_alignment')
 
         candidates = data.get('candidates', [])
         if not candidates:
@@ -288,19 +288,18 @@ def assess_goals_status_alignment(quadrants):
         raw = candidates[0].get('content', {}).get('parts', [{}])[0].get('text', '').strip()
 
         if debug_align:
-            print('[ALIGNMENT][Gemini] Raw:', repr(raw))
+            log.info("[ALIGNMENT][Gemini] Raw: %r", raw)
 
-        # Try to parse JSON strictly
-        import json as _json, re
+        # Try to parse JSON (tolerates code fences and surrounding prose)
+        import re
         try:
-            # Handle code fences
-            fenced = re.search(r'```(?:json)?\s*({[\s\S]*?})\s*```', raw, re.IGNORECASE)
-            raw_json = fenced.group(1) if fenced else raw
-            data = _json.loads(raw_json)
+            data = llm_json.extract_json(raw, expect=dict)
+            if data is None:
+                raise ValueError('No JSON object in alignment reply')
             score = int(max(0, min(100, int(data.get('score', 0)))))
             rationale = str(data.get('rationale', '')).strip()
             if debug_align:
-                print(f"[ALIGNMENT][Gemini] Parsed score={score} rationale={rationale[:120]}")
+                log.info("[ALIGNMENT][Gemini] Parsed score=%s rationale=%.120s", score, rationale)
             return {'score': score, 'rationale': rationale}
         except Exception:
             # Fallback regex parse avoiding 0 from '0-100'
@@ -310,12 +309,12 @@ def assess_goals_status_alignment(quadrants):
             rationale = raw.strip()
             rationale = re.split(r'\n|(?<=[.!?])\s', rationale, maxsplit=1)[0][:300]
             if debug_align:
-                print(f"[ALIGNMENT][Gemini] Fallback score={score_val} rationale={rationale[:120]}")
+                log.info("[ALIGNMENT][Gemini] Fallback score=%s rationale=%.120s", score_val, rationale)
             return {'score': score_val, 'rationale': rationale}
     except requests.HTTPError as e:
         return {'error': f'HTTP {e.response.status_code}: {e.response.text[:200]}'}
     except Exception as e:
-        return {'error': str(e)}
+        return {'error': str(e), 'code': getattr(e, 'code', 'unknown_error')}
 
 QUADRANT_MAP = {
     'status': 'status',
@@ -344,62 +343,31 @@ def classify_thought_with_gemini(thought):
             {"role": "user", "parts": [{"text": thought}]}
         ]
     }
+    generation_config = _json_generation_config()
+    if generation_config:
+        payload["generationConfig"] = generation_config
     params = {"key": GEMINI_API_KEY}
     try:
-        resp = requests.post(GEMINI_API_URL, json=payload, params=params, headers=headers, timeout=10)
-        print('Gemini API raw response:', resp.status_code, resp.text)  # Debug output
-        resp.raise_for_status()
+        resp = _post('classify_thought', payload, params, headers)
+        log.debug("Gemini API raw response: %s %s", resp.status_code, resp.text)
         data = resp.json()
+        _track_usage(data, resp, 'classify_thought')
         # Extract the model's response
         candidates = data.get('candidates', [])
         if not candidates:
-            print('No candidates in Gemini response:', data)
+            log.warning("No candidates in Gemini response: %s", data)
             return {'error': 'No response from Gemini'}
         text = candidates[0]['content']['parts'][0]['text']
-        import json as _json
-        def parse_gemini_json_response(text):
-            import re, json as _json
-            print('Raw Gemini text:', repr(text))
-            # Remove all lines that start with triple backticks (with or without language hint)
-            text_clean = re.sub(r'^```.*$', '', text, flags=re.MULTILINE).strip()
-            print('Text after code block removal:', repr(text_clean))
-            # Find the first JSON object in the string
-            match = re.search(r'\{.*\}', text_clean, re.DOTALL)
-            if match:
-                print('Extracted JSON:', match.group(0))
-                try:
-                    return _json.loads(match.group(0))
-                except Exception as e:
-                    print('Error parsing extracted JSON:', e)
-            # If not found, try to parse the whole string
-            print('Trying to parse as JSON directly:', repr(text_clean))
-            try:
-                return _json.loads(text_clean)
-            except Exception as e:
-                print('Error parsing text as JSON:', e)
-        try:
-            result = parse_gemini_json_response(text)
-        except Exception as e:
-            print('Error parsing Gemini response as JSON:', text, e)
-            # Try to extract JSON from text
-            import re
-            match = re.search(r'\{.*\}', text, re.DOTALL)
-            if match:
-                try:
-                    result = _json.loads(match.group(0))
-                except Exception as e2:
-                    print('Secondary JSON parse error:', e2)
-                    return {'error': 'Could not parse Gemini response'}
-            else:
-                return {'error': 'Could not parse Gemini response'}
+        result = llm_json.extract_json(text, expect=dict)
+        if result is None:
+            log.warning("Could not parse Gemini response as JSON: %r", text)
+            return {'error': 'Could not parse Gemini response'}
         quadrant = result.get('quadrant', '').strip().lower()
         mapped = QUADRANT_MAP.get(quadrant, 'problem')
         return {'quadrant': mapped, 'thought': result.get('thought', thought)}
     except Exception as e:
-        import traceback
-        print('Exception in classify_thought_with_gemini:', e)
-        traceback.print_exc()
-        return {'error': str(e)}
+        log.exception("Exception in classify_thought_with_gemini: %s", e)
+        return {'error': str(e), 'code': getattr(e, 'code', 'unknown_error')}
 
 
 def suggest_solution_with_gemini(problems, obstacles):
@@ -422,33 +390,24 @@ def suggest_solution_with_gemini(problems, obstacles):
             {"role": "user", "parts": [{"text": prompt}]}
         ]
     }
+    generation_config = _json_generation_config()
+    if generation_config:
+        payload["generationConfig"] = generation_config
     params = {"key": GEMINI_API_KEY}
     try:
-        resp = requests.post(GEMINI_API_URL, json=payload, params=params, headers=headers, timeout=10)
-        print('Gemini API raw response (solution):', resp.status_code, resp.text)  # Debug output
-        resp.raise_for_status()
+        resp = _post('suggest_solution', payload, params, headers)
+        log.debug("Gemini API raw response (solution): %s %s", resp.status_code, resp.text)
         data = resp.json()
+        _track_usage(data, resp, 'suggest_solution')
         candidates = data.get('candidates', [])
         if not candidates:
             return {'error': 'No response from Gemini'}
         text = candidates[0]['content']['parts'][0]['text'].strip()
-        import json as _json
-        try:
-            suggestions = _json.loads(text)
-            if not isinstance(suggestions, list):
-                raise ValueError('Gemini did not return a list')
-        except Exception as e:
-            print('Error parsing Gemini suggestions as JSON list:', text, e)
-            # Try to extract JSON array from text
-            import re
-            match = re.search(r'\[.*\]', text, re.DOTALL)
-            if match:
-                suggestions = _json.loads(match.group(0))
-            else:
-                return {'error': 'Could not parse Gemini suggestions as a list'}
+        suggestions = llm_json.extract_json(text, expect=list)
+        if suggestions is None:
+            log.warning("Error parsing Gemini suggestions as JSON list: %s", text)
+            return {'error': 'Could not parse Gemini suggestions as a list'}
         return {'suggestions': suggestions}
     except Exception as e:
-        import traceback
-        print('Exception in suggest_solution_with_gemini:', e)
-        traceback.print_exc()
-        return {'error': str(e)}
+        log.exception("Exception in suggest_solution_with_gemini: %s", e)
+        return {'error': str(e), 'code': getattr(e, 'code', 'unknown_error')}
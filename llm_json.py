@@ -0,0 +1,240 @@
+"""
+Structured Output Helpers for LLM Replies
+Shared JSON schemas for provider structured-output modes and a single
+linear-time, tolerant parser used as the fallback when a reply is free text.
+"""
+
+import json
+import os
+import re
+from typing import Any, Optional, Tuple
+
+# Structured output (JSON-schema response formats) is used whenever the
+# configured model supports it; set STRUCTURED_OUTPUT=false to always parse free text.
+STRUCTURED_OUTPUT = os.environ.get('STRUCTURED_OUTPUT', 'true').lower() == 'true'
+
+# OpenAI model families that accept response_format={"type": "json_schema", ...}
+_JSON_SCHEMA_MODEL_PREFIXES = ('gpt-5', 'gpt-4o', 'gpt-4.1', 'o1', 'o3', 'o4')
+
+QUADRANTS = ['status', 'goal', 'analysis', 'plan']
+
+_SUGGESTION_ITEM = {
+    "type": "object",
+    "properties": {
+        "quadrant": {"type": "string", "enum": QUADRANTS},
+        "thought": {"type": "string"}
+    },
+    "required": ["quadrant", "thought"],
+    "additionalProperties": False
+}
+
+# Facilitator turn: optional quadrant suggestions plus the user-facing message
+FACILITATOR_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "add_to_quadrant": {"type": "array", "items": _SUGGESTION_ITEM},
+        "message": {"type": "string"}
+    },
+    "required": ["add_to_quadrant", "message"],
+    "additionalProperties": False
+}
+
+# Single-thought classification (one or more rewritten thoughts)
+CLASSIFICATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "thoughts": {"type": "array", "items": _SUGGESTION_ITEM}
+    },
+    "required": ["thoughts"],
+    "additionalProperties": False
+}
+
+# Hybrid categorizer fallback
+CATEGORIZATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "quadrant": {"type": "string", "enum": QUADRANTS},
+        "reasoning": {"type": "string"},
+        "confidence": {"type": "number"}
+    },
+    "required": ["quadrant", "reasoning", "confidence"],
+    "additionalProperties": False
+}
+
+# Goals <-> Status alignment score
+ALIGNMENT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "score": {"type": "integer"},
+        "rationale": {"type": "string"}
+    },
+    "required": ["score", "rationale"],
+    "additionalProperties": False
+}
+
+# Solution suggestions
+SUGGESTIONS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "suggestions": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "content": {"type": "string"},
+                    "quadrant": {"type": "string", "enum": QUADRANTS}
+                },
+                "required": ["content", "quadrant"],
+                "additionalProperties": False
+            }
+        }
+    },
+    "required": ["suggestions"],
+    "additionalProperties": False
+}
+
+
+def supports_json_schema(model: str) -> bool:
+    """True if structured output is enabled and the OpenAI model accepts json_schema response formats."""
+    return STRUCTURED_OUTPUT and bool(model) and model.startswith(_JSON_SCHEMA_MODEL_PREFIXES)
+
+
+def openai_response_format(name: str, schema: dict) -> dict:
+    """Build the OpenAI chat.completions response_format payload for a strict JSON schema."""
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "schema": schema, "strict": True}
+    }
+
+
+_TRAILING_COMMA_RE = re.compile(r',\s*([}\]])')
+_SMART_QUOTES = str.maketrans({'“': '"', '”': '"'})
+
+
+def loads_tolerant(text: str) -> Any:
+    """json.loads with repairs for the mistakes models commonly make (trailing commas, smart quotes)."""
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    repaired = _TRAILING_COMMA_RE.sub(r'\1', text.translate(_SMART_QUOTES))
+    return json.loads(repaired)
+
+
+def _balanced_spans(text: str, openers: str):
+    """
+    Yield (start, end, children) for each top-level balanced {...}/[...] span in one pass.
+
+    Strings and escapes are honoured inside spans so braces in quoted text do not
+    confuse the scanner. ``children`` lists the disjoint direct sub-spans, which lets
+    callers recover a valid inner object when the outer span is broken. A span left
+    unclosed at end of text is yielded with end=None.
+    """
+    stack = []
+    children = []
+    in_string = False
+    escape = False
+    start = -1
+    pairs = {'}': '{', ']': '['}
+    for i, c in enumerate(text):
+        if not stack:
+            if c in openers:
+                stack.append((c, i))
+                start = i
+                children = []
+            continue
+        if in_string:
+            if escape:
+                escape = False
+            elif c == '\\':
+                escape = True
+            elif c == '"':
+                in_string = False
+            continue
+        if c == '"':
+            in_string = True
+        elif c in '{[':
+            stack.append((c, i))
+        elif c in '}]':
+            open_c, open_pos = stack.pop()
+            if open_c != pairs[c]:
+                # Mismatched bracket: the candidate is not JSON, resume scanning after it
+                yield start, None, children
+                stack = []
+                in_string = False
+                continue
+            if not stack:
+                yield start, i + 1, children
+            elif len(stack) == 1:
+                children.append((open_pos, i + 1))
+    if stack:
+        yield start, None, children
+
+
+def find_json(text: str, expect: Optional[type] = None) -> Tuple[Any, int, int]:
+    """
+    Locate the first JSON value embedded in free text.
+
+    Args:
+        text: Model reply, possibly with prose and Markdown code fences around the JSON
+        expect: Optional type (dict or list) the value must have
+
+    Returns:
+        (value, start, end) with the character span of the JSON, or (None, -1, -1)
+    """
+    if not text:
+        return None, -1, -1
+    openers = '{' if expect is dict else '[' if expect is list else '{['
+    for start, end, children in _balanced_spans(text, '{['):
+        candidates = [(start, end)] if end is not None else []
+        candidates.extend(children)
+        for s, e in candidates:
+            if text[s] not in openers:
+                continue
+            try:
+                value = loads_tolerant(text[s:e])
+            except ValueError:
+                continue
+            if expect is None or isinstance(value, expect):
+                return value, s, e
+    return None, -1, -1
+
+
+def extract_json(text: str, expect: Optional[type] = None) -> Any:
+    """Return the first JSON value embedded in text (see find_json), or None."""
+    value, _, _ = find_json(text, expect=expect)
+    return value
+
+
+_FENCE_OPEN_RE = re.compile(r'```[a-zA-Z]*\s*$')
+_FENCE_CLOSE_RE = re.compile(r'^\s*```')
+
+
+def split_json_and_message(text: str, expect: Optional[type] = None) -> Tuple[Any, str]:
+    """
+    Split a reply into its JSON payload and the surrounding user-facing prose.
+
+    Code fences wrapping the JSON are dropped from the message. Returns (None, text)
+    when the reply has no parseable JSON.
+    """
+    if not text:
+        return None, ''
+    value, start, end = find_json(text, expect=expect)
+    if value is None:
+        return None, text.strip()
+    before = _FENCE_OPEN_RE.sub('', text[:start].rstrip())
+    after = _FENCE_CLOSE_RE.sub('', text[end:], count=1)
+    message = ' '.join(part for part in (before.strip(), after.strip()) if part)
+    return value, message
+
+
+def format_facilitator_reply(suggestions: list, message: str) -> str:
+    """
+    Render a structured facilitator turn in the prompt's canonical text form
+    (JSON block first, then the message) so stored history looks the same either way.
+    """
+    message = (message or '').strip()
+    if not suggestions:
+        return message
+    payload = json.dumps({"add_to_quadrant": suggestions}, ensure_ascii=False)
+    return f"{payload}\n\n{message}" if message else payload
@@ -1,4 +1,11 @@
+import collections
+import concurrent.futures
+import contextvars
+import math
 import os
+import random
+import threading
+import time
 import typing as _t
 
 # Provider modules
@@ -8,8 +15,235 @@ try:
 except Exception:  # pragma: no cover
     _gemini = None
 
+from cost_ledger import route_context
+from debug_logger import get_logger
+from rate_limiter import RateLimited, check_provider
+
 _PROVIDER = os.environ.get("AI_PROVIDER", "openai").lower()
 
+# Retry of transient provider errors (timeouts, connection errors, 429 rate limits, 5xx):
+# attempts per call and the full-jitter exponential backoff window in seconds
+LLM_RETRY_ATTEMPTS = int(os.environ.get("LLM_RETRY_ATTEMPTS", "3"))
+LLM_RETRY_BASE_DELAY = float(os.environ.get("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_RETRY_MAX_DELAY = float(os.environ.get("LLM_RETRY_MAX_DELAY", "8"))
+# Overall budget for all provider calls made while serving one request, and the cap on a single attempt
+LLM_REQUEST_DEADLINE = float(os.environ.get("LLM_REQUEST_DEADLINE", "60"))
+LLM_ATTEMPT_TIMEOUT = float(os.environ.get("LLM_ATTEMPT_TIMEOUT", "30"))
+# Circuit breaker per provider/model: open after this many consecutive failures, probe again after the cooldown
+LLM_BREAKER_FAILURES = int(os.environ.get("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_COOLDOWN = float(os.environ.get("LLM_BREAKER_COOLDOWN", "30"))
+
+log = get_logger("provider")
+
+_RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class ProviderUnavailable(RuntimeError):
+    """The provider was not called: its circuit is open or the request deadline is spent."""
+
+    code = "provider_unavailable"
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _status_code(exc: BaseException) -> _t.Optional[int]:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Transient errors worth another attempt; exhausted quota and client errors are not."""
+    if isinstance(exc, ProviderUnavailable):
+        return False
+    if "insufficient_quota" in str(exc).lower():
+        return False
+    status = _status_code(exc)
+    if status is not None:
+        return status in _RETRYABLE_STATUS
+    name = type(exc).__name__
+    return name in ("APITimeoutError", "APIConnectionError", "Timeout", "ReadTimeout", "ConnectTimeout",
+                    "ConnectionError", "TimeoutError") or isinstance(exc, (TimeoutError, ConnectionError))
+
+
+def _retry_after(exc: BaseException) -> _t.Optional[float]:
+    """Seconds from a Retry-After header on the error's HTTP response, if any."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker for one provider/model.
+
+    closed: calls pass; `failure_threshold` retryable failures in a row open it.
+    open: calls fail fast with ProviderUnavailable until `cooldown` seconds have passed.
+    half_open: one probe call is let through; success closes the breaker, failure reopens it.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = LLM_BREAKER_FAILURES,
+                 cooldown: float = LLM_BREAKER_COOLDOWN):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.calls = 0
+        self.total_failures = 0
+        self.short_circuits = 0
+        self.retries = 0
+        self.last_error: _t.Optional[str] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.state == "open":
+                remaining = self.opened_at + self.cooldown - time.monotonic()
+                if remaining > 0:
+                    self.short_circuits += 1
+                    raise ProviderUnavailable(f"{self.name} is unavailable (circuit open)", retry_after=remaining)
+                self.state = "half_open"
+                self._probing = False
+            if self.state == "half_open":
+                if self._probing:
+                    self.short_circuits += 1
+                    raise ProviderUnavailable(f"{self.name} is being probed (circuit half-open)",
+                                              retry_after=1.0)
+                self._probing = True
+            self.calls += 1
+
+    def on_success(self):
+        with self._lock:
+            if self.state != "closed":
+                log.info("Circuit %s closed", self.name)
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def on_failure(self, exc: BaseException, counts: bool = True):
+        with self._lock:
+            self._probing = False
+            self.last_error = f"{type(exc).__name__}: {str(exc)[:200]}"
+            if not counts:
+                if self.state == "half_open":
+                    self.state = "closed"
+                return
+            self.total_failures += 1
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    log.warning("Circuit %s opened after %d failures: %s", self.name, self.failures, self.last_error)
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            retry_in = 0.0
+            if self.state == "open":
+                retry_in = max(0.0, self.opened_at + self.cooldown - time.monotonic())
+            return {
+                "name": self.name,
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "retry_in": round(retry_in, 1),
+                "calls": self.calls,
+                "failures": self.total_failures,
+                "short_circuits": self.short_circuits,
+                "retries": self.retries,
+                "last_error": self.last_error,
+            }
+
+
+_breakers: _t.Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(provider: str, model: str) -> CircuitBreaker:
+    name = f"{provider}/{model}"
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(name, CircuitBreaker(name))
+    return breaker
+
+
+def breaker_states() -> _t.List[dict]:
+    """Snapshot of every provider/model circuit breaker (for the debug API)."""
+    return [b.snapshot() for b in list(_breakers.values())]
+
+
+def reset_breakers():
+    with _breakers_lock:
+        _breakers.clear()
+
+
+def _deadline() -> float:
+    """Monotonic deadline shared by every provider call of the current request."""
+    try:
+        from flask import g, has_request_context
+        if has_request_context():
+            if "llm_deadline" not in g:
+                g.llm_deadline = time.monotonic() + LLM_REQUEST_DEADLINE
+            return g.llm_deadline
+    except Exception:
+        pass
+    return time.monotonic() + LLM_REQUEST_DEADLINE
+
+
+def guarded_call(provider: str, model: str, endpoint: str, attempt: _t.Callable[[float], _t.Any],
+                 attempts: int = LLM_RETRY_ATTEMPTS):
+    """
+    Run one provider request with retry, deadline and circuit breaker.
+
+    `attempt(timeout)` performs a single request with the given timeout in seconds.
+    Retryable failures are retried with full-jitter exponential backoff (honouring
+    Retry-After) while attempts and the request deadline last. Raises the last provider
+    error, or ProviderUnavailable when the breaker is open, no time is left or the key
+    this provider bills is over its rate limits (checked once, before the first attempt).
+    """
+    breaker = get_breaker(provider, model)
+    deadline = _deadline()
+    try:
+        check_provider(provider)
+    except RateLimited as e:
+        # The key this provider bills is over its limits; the caller fails over or reports it
+        raise ProviderUnavailable(f"{provider} {e.kind.lower()} exceeded ({endpoint})") from e
+    for number in range(1, max(1, attempts) + 1):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0.5:
+            raise ProviderUnavailable(f"{provider} request deadline exceeded ({endpoint})")
+        breaker.before_call()
+        try:
+            result = attempt(min(LLM_ATTEMPT_TIMEOUT, remaining))
+        except Exception as e:
+            retryable = is_retryable(e)
+            breaker.on_failure(e, counts=retryable)
+            if not retryable or number >= attempts or breaker.state == "open":
+                raise
+            delay = random.uniform(0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * 2 ** (number - 1)))
+            hinted = _retry_after(e)
+            if hinted is not None:
+                delay = max(delay, min(hinted, LLM_RETRY_MAX_DELAY))
+            if time.monotonic() + delay >= deadline - 0.5:
+                raise
+            with breaker._lock:
+                breaker.retries += 1
+            log.warning("%s %s attempt %d failed (%s), retrying in %.2fs",
+                        breaker.name, endpoint, number, type(e).__name__, delay)
+            time.sleep(delay)
+            continue
+        breaker.on_success()
+        return result
+
 
 def _get_module():
     if _PROVIDER == "gemini" and _gemini is not None:
@@ -17,39 +251,219 @@ def _get_module():
     return _openai
 
 
+# Routing between providers. LLM_PROVIDERS is the order of preference (only AI_PROVIDER by
+# default); LLM_ROUTING 'failover' keeps that order, 'latency' puts the provider with the
+# lowest rolling p95 first once every provider has LLM_LATENCY_MIN_SAMPLES samples.
+# LLM_HEDGE_AFTER_MS > 0 also sends the request to the next provider when the first has
+# not answered by then, and the first good answer wins. Sending requests to a second
+# vendor changes cost and data handling, so it only happens with LLM_FAILOVER=true.
+LLM_PROVIDERS = list(dict.fromkeys(
+    p.strip().lower() for p in os.environ.get("LLM_PROVIDERS", _PROVIDER).split(",") if p.strip()))
+LLM_ROUTING = os.environ.get("LLM_ROUTING", "failover").lower()
+LLM_FAILOVER = os.environ.get("LLM_FAILOVER", "false").lower() == "true"
+LLM_LATENCY_WINDOW = int(os.environ.get("LLM_LATENCY_WINDOW", "50"))
+LLM_LATENCY_MIN_SAMPLES = int(os.environ.get("LLM_LATENCY_MIN_SAMPLES", "5"))
+LLM_HEDGE_AFTER_MS = float(os.environ.get("LLM_HEDGE_AFTER_MS", "0"))
+LLM_HEDGE_WORKERS = int(os.environ.get("LLM_HEDGE_WORKERS", "8"))
+
+_PROVIDER_MODULES = {"openai": _openai, "gemini": _gemini}
+
+
+def _available(provider: str) -> bool:
+    """True if the provider module is loaded and has an API key to call with."""
+    mod = _PROVIDER_MODULES.get(provider)
+    if mod is None:
+        return False
+    if provider == "openai":
+        return bool(mod.get_api_key())
+    return bool(getattr(mod, "GEMINI_API_KEY", None))
+
+
+class _RouteStats:
+    """Rolling latency window and routing counters per provider."""
+
+    def __init__(self, window: int = LLM_LATENCY_WINDOW):
+        self.window = window
+        self._latency: _t.Dict[str, _t.Deque[float]] = {}
+        self._counts: _t.Dict[str, _t.Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record_latency(self, provider: str, ms: float):
+        with self._lock:
+            self._latency.setdefault(provider, collections.deque(maxlen=self.window)).append(ms)
+
+    def count(self, provider: str, what: str):
+        with self._lock:
+            counts = self._counts.setdefault(provider, {})
+            counts[what] = counts.get(what, 0) + 1
+
+    def p95(self, provider: str) -> _t.Tuple[_t.Optional[float], int]:
+        """(nearest-rank p95 in ms or None, number of samples)"""
+        with self._lock:
+            samples = sorted(self._latency.get(provider, ()))
+        if not samples:
+            return None, 0
+        return samples[min(len(samples), max(1, math.ceil(0.95 * len(samples)))) - 1], len(samples)
+
+    def snapshot(self, provider: str) -> dict:
+        p95, samples = self.p95(provider)
+        with self._lock:
+            counts = dict(self._counts.get(provider, {}))
+        return {"p95_ms": round(p95, 1) if p95 is not None else None, "samples": samples, **counts}
+
+
+_route_stats = _RouteStats()
+_executor: _t.Optional[concurrent.futures.ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _hedge_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=LLM_HEDGE_WORKERS, thread_name_prefix="llm-hedge")
+    return _executor
+
+
+def plan_route() -> _t.Tuple[_t.List[str], str]:
+    """Providers to try, in order, and why the first one was chosen."""
+    order = [p for p in LLM_PROVIDERS if _available(p)] or LLM_PROVIDERS[:1]
+    reason = "preferred"
+    if LLM_ROUTING == "latency" and len(order) > 1:
+        p95s = {p: _route_stats.p95(p) for p in order}
+        if all(samples >= LLM_LATENCY_MIN_SAMPLES for _, samples in p95s.values()):
+            order.sort(key=lambda p: p95s[p][0])
+            reason = "p95 " + ",".join(f"{p}={p95s[p][0]:.0f}ms" for p in order)
+    if not LLM_FAILOVER:
+        order = order[:1]
+    return order, reason
+
+
+def _is_error(result) -> bool:
+    return isinstance(result, Exception) or (
+        isinstance(result, dict) and (result.get("action") == "error" or "error" in result))
+
+
+def _error_label(provider: str, result) -> str:
+    if isinstance(result, Exception):
+        return f"{provider}:{getattr(result, 'code', None) or type(result).__name__}"
+    return f"{provider}:{result.get('code') or 'error'}"
+
+
+def _call(provider: str, names: _t.Tuple[str, ...], args, kwargs, route: str, reason: str):
+    """Call the first of `names` the provider module defines, tagging its cost records with the route."""
+    mod = _PROVIDER_MODULES[provider]
+    fn = next((getattr(mod, n) for n in names if hasattr(mod, n)), None)
+    if fn is None:
+        return AttributeError(f"{provider} provides none of {names}")
+    _route_stats.count(provider, route)
+    started = time.perf_counter()
+    with route_context(route, reason):
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            result = e
+    if not _is_error(result):
+        _route_stats.record_latency(provider, (time.perf_counter() - started) * 1000)
+    else:
+        _route_stats.count(provider, "errors")
+    return result
+
+
+def _submit(*call_args) -> concurrent.futures.Future:
+    # Each task runs in a copy of the caller's context (Flask request, session, deadline)
+    return _hedge_executor().submit(contextvars.copy_context().run, _call, *call_args)
+
+
+def _route(names: _t.Tuple[str, ...], *args, **kwargs):
+    """
+    Run a facade call under the routing policy: the planned first provider, then
+    failover in order on an error result or exception; with hedging, the second
+    provider is started when the first is slower than LLM_HEDGE_AFTER_MS.
+    Returns the first good result, else the last error (exceptions are re-raised).
+    """
+    order, reason = plan_route()
+    log.debug("Route %s: %s (%s)", names[0], order, reason)
+    last = None
+    index = 0
+    if LLM_HEDGE_AFTER_MS > 0 and len(order) > 1:
+        primary = _submit(order[0], names, args, kwargs, "primary", reason)
+        try:
+            last = primary.result(timeout=LLM_HEDGE_AFTER_MS / 1000.0)
+            if not _is_error(last):
+                return last
+            index = 1
+        except concurrent.futures.TimeoutError:
+            hedge_reason = f"{order[0]}>{LLM_HEDGE_AFTER_MS:.0f}ms"
+            futures = {primary: order[0],
+                       _submit(order[1], names, args, kwargs, "hedge", hedge_reason): order[1]}
+            while futures:
+                done, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    provider = futures.pop(future)
+                    result = future.result()
+                    if not _is_error(result):
+                        if provider != order[0]:
+                            _route_stats.count(provider, "hedge_wins")
+                        return result
+                    last = result
+            index = 2
+    for i in range(index, len(order)):
+        provider = order[i]
+        route, why = ("primary", reason) if i == 0 else ("failover", _error_label(order[i - 1], last))
+        if i > 0:
+            log.warning("Failing over %s to %s (%s)", names[0], provider, why)
+        last = _call(provider, names, args, kwargs, route, why)
+        if not _is_error(last):
+            return last
+    if isinstance(last, Exception):
+        raise last
+    return last
+
+
+def routing_state() -> dict:
+    """Routing policy and per-provider latency/counters (for the debug API)."""
+    return {
+        "policy": LLM_ROUTING,
+        "failover": LLM_FAILOVER,
+        "hedge_after_ms": LLM_HEDGE_AFTER_MS,
+        "providers": [{"name": p, "available": _available(p), **_route_stats.snapshot(p)} for p in LLM_PROVIDERS],
+    }
+
+
 # Facade: conversational assistant
 # Returns the same structures as existing code expects
 
 def conversational_facilitator(prompt: str, quadrants: _t.Optional[dict] = None):
-    mod = _get_module()
-    # Gemini provides conversational_facilitator; OpenAI provides same in openai_api
-    if hasattr(mod, "conversational_facilitator"):
-        return mod.conversational_facilitator(prompt, quadrants=quadrants)
-    # Fallback to OpenAI if provider lacks function
-    return _openai.conversational_facilitator(prompt, quadrants=quadrants)
+    result = _route(("conversational_facilitator",), prompt, quadrants=quadrants)
+    # Gemini reports failures as {'error': ...}; callers check for action == 'error'
+    if isinstance(result, dict) and "error" in result and "action" not in result:
+        return {"action": "error", "code": result.get("code") or "provider_error", "message": result["error"]}
+    return result
 
 
 # Facade: board executive summary
 # Returns dict with {'summary': str} or {'error': ..., 'code': ...}
 
 def summarize_board(quadrants: dict, tone: str = "neutral", length: str = "medium"):
-    mod = _get_module()
-    # Preferred provider-specific function name used in existing code
-    if hasattr(mod, "summarize_board_with_openai"):
-        return mod.summarize_board_with_openai(quadrants, tone=tone, length=length)
-    # Try generic name if present on provider
-    if hasattr(mod, "summarize_board"):
-        return mod.summarize_board(quadrants, tone=tone, length=length)
-    # Fallback to OpenAI implementation
-    return _openai.summarize_board_with_openai(quadrants, tone=tone, length=length)
+    # Both providers expose the summary as summarize_board_with_openai (generic name as fallback)
+    return _route(("summarize_board_with_openai", "summarize_board"), quadrants, tone=tone, length=length)
 
 
 # Facade: goals↔status alignment scoring
 # Returns {'score': int, 'rationale': str} or {'error': ..., 'code': ...}
 
 def assess_goals_status_alignment(quadrants: dict):
-    mod = _get_module()
-    if hasattr(mod, "assess_goals_status_alignment"):
-        return mod.assess_goals_status_alignment(quadrants)
-    # Fallback to OpenAI implementation if provider lacks it
-    return _openai.assess_goals_status_alignment(quadrants)
+    return _route(("assess_goals_status_alignment",), quadrants)
+
+
+# Provider-specific helpers that have no facade function yet (brainstorm_with_openai,
+# classify_thought_with_gemini, ...) resolve on the active provider, then on OpenAI
+
+def __getattr__(name: str):
+    for mod in (_get_module(), _openai):
+        if mod is not None and hasattr(mod, name):
+            return getattr(mod, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
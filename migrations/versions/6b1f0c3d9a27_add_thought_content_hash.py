@@ -0,0 +1,46 @@
+"""Add Thought.content_hash for the near-duplicate index
+
+Revision ID: 6b1f0c3d9a27
+Revises: 2e62e854486d
+Create Date: 2025-08-20 10:12:41.318402
+
+"""
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6b1f0c3d9a27'
+down_revision = '2e62e854486d'
+branch_labels = None
+depends_on = None
+
+
+def _content_hash(text):
+    # Must match dedup_index.content_hash
+    normalized = ' '.join((text or '').lower().split())
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def upgrade():
+    with op.batch_alter_table('thought', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=16), nullable=True))
+        batch_op.create_index('ix_thought_board_id_content_hash', ['board_id', 'content_hash'], unique=False)
+
+    # Backfill hashes for existing thoughts
+    conn = op.get_bind()
+    thought = sa.table('thought', sa.column('id', sa.Integer), sa.column('content', sa.String), sa.column('content_hash', sa.String))
+    rows = conn.execute(sa.select(thought.c.id, thought.c.content)).fetchall()
+    if rows:
+        conn.execute(
+            thought.update().where(thought.c.id == sa.bindparam('_id')).values(content_hash=sa.bindparam('_hash')),
+            [{'_id': r.id, '_hash': _content_hash(r.content)} for r in rows]
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('thought', schema=None) as batch_op:
+        batch_op.drop_index('ix_thought_board_id_content_hash')
+        batch_op.drop_column('content_hash')
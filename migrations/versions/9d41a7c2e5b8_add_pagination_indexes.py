@@ -0,0 +1,38 @@
+"""Add indexes backing keyset pagination of minutes, conversation turns and boards
+
+Revision ID: 9d41a7c2e5b8
+Revises: 6b1f0c3d9a27
+Create Date: 2025-08-27 14:03:52.604117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d41a7c2e5b8'
+down_revision = '6b1f0c3d9a27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('board', schema=None) as batch_op:
+        batch_op.create_index('ix_board_user_id_title', ['user_id', 'title', 'id'], unique=False)
+
+    with op.batch_alter_table('meeting_minute', schema=None) as batch_op:
+        batch_op.create_index('ix_meeting_minute_board_id_id', ['board_id', 'id'], unique=False)
+
+    with op.batch_alter_table('conversation_turn', schema=None) as batch_op:
+        batch_op.create_index('ix_conversation_turn_board_id_id', ['board_id', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('conversation_turn', schema=None) as batch_op:
+        batch_op.drop_index('ix_conversation_turn_board_id_id')
+
+    with op.batch_alter_table('meeting_minute', schema=None) as batch_op:
+        batch_op.drop_index('ix_meeting_minute_board_id_id')
+
+    with op.batch_alter_table('board', schema=None) as batch_op:
+        batch_op.drop_index('ix_board_user_id_title')
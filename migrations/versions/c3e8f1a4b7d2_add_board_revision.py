@@ -0,0 +1,26 @@
+"""Add Board.revision for optimistic concurrency control
+
+Revision ID: c3e8f1a4b7d2
+Revises: 9d41a7c2e5b8
+Create Date: 2025-08-24 09:31:07.552190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e8f1a4b7d2'
+down_revision = '9d41a7c2e5b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('board', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('revision', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('board', schema=None) as batch_op:
+        batch_op.drop_column('revision')
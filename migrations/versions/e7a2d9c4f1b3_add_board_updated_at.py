@@ -0,0 +1,29 @@
+"""Add Board.updated_at for Last-Modified and list validators
+
+Revision ID: e7a2d9c4f1b3
+Revises: c3e8f1a4b7d2
+Create Date: 2025-08-25 10:12:44.318027
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a2d9c4f1b3'
+down_revision = 'c3e8f1a4b7d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('board', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute('UPDATE board SET updated_at = created_at')
+    with op.batch_alter_table('board', schema=None) as batch_op:
+        batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('board', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,142 @@
+"""
+Meeting Minutes Log
+Thought edits and their meeting minute form one unit of work: record() adds the minute to
+the session holding the edit, so the route's single commit stores both or neither.
+With MINUTES_BUFFERED the minutes of committed edits are queued instead and inserted in
+batches by a background thread, for drag-heavy sessions where a write per move adds up;
+the newest minutes are then lost if the process dies before a flush.
+"""
+
+import atexit
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from debug_logger import get_logger
+from models import db, Board, MeetingMinute
+
+# Queue minutes of committed thought edits and insert them in batches instead of
+# committing them with the edit
+MINUTES_BUFFERED = os.environ.get('MINUTES_BUFFERED', 'false').lower() == 'true'
+# Writer batching: flush when this many minutes are waiting or after this many seconds
+MINUTES_BATCH_SIZE = int(os.environ.get('MINUTES_BATCH_SIZE', '100'))
+MINUTES_FLUSH_SECONDS = float(os.environ.get('MINUTES_FLUSH_SECONDS', '1.0'))
+
+log = get_logger('minutes')
+
+
+class MinuteLog:
+    """
+    Writes MeetingMinute rows for board changes. Unbuffered (the default) a minute is
+    just added to the caller's session; buffered it waits in session.info until the
+    edit commits, then joins an in-memory queue that a daemon thread drains.
+    """
+
+    def __init__(self, buffered: bool = MINUTES_BUFFERED, batch_size: int = MINUTES_BATCH_SIZE,
+                 flush_seconds: float = MINUTES_FLUSH_SECONDS):
+        self.buffered = buffered
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.written = 0
+        self.dropped = 0
+        self._pending: List[Dict[str, Any]] = []
+        self._engine = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, board_id, action: str, detail: str, session: Optional[Session] = None):
+        """Log a minute as part of the session's current transaction (commit is the caller's)."""
+        session = session if session is not None else db.session
+        row = {'board_id': board_id, 'action': action[:50], 'detail': detail,
+               'timestamp': datetime.utcnow()}
+        if not self.buffered:
+            session.add(MeetingMinute(**row))
+        else:
+            session.info.setdefault('buffered_minutes', []).append(row)
+
+    def _enqueue(self, rows: List[Dict[str, Any]], engine):
+        with self._lock:
+            self._engine = engine
+            self._pending.extend(rows)
+            waiting = len(self._pending)
+        self._ensure_writer()
+        if waiting >= self.batch_size:
+            self._wake.set()
+
+    def _ensure_writer(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='minutes-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """Insert the queued minutes now; returns how many were written."""
+        with self._write_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                engine = self._engine
+            if not batch:
+                return 0
+            try:
+                written = self._write(engine, batch)
+            except Exception as e:
+                log.error("Could not write %d meeting minutes: %s", len(batch), e)
+                self.dropped += len(batch)
+                return 0
+            self.written += written
+            self.dropped += len(batch) - written
+            return written
+
+    def _write(self, engine, batch: List[Dict[str, Any]]) -> int:
+        try:
+            with engine.begin() as conn:
+                conn.execute(insert(MeetingMinute), batch)
+            return len(batch)
+        except IntegrityError:
+            # A board was deleted while its minutes waited; keep the rest
+            board_ids = {row['board_id'] for row in batch}
+            with engine.begin() as conn:
+                live = set(conn.execute(select(Board.id).where(Board.id.in_(board_ids))).scalars())
+                rows = [row for row in batch if row['board_id'] in live]
+                if rows:
+                    conn.execute(insert(MeetingMinute), rows)
+            return len(rows)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            queued = len(self._pending)
+        return {'queued': queued, 'written': self.written, 'dropped': self.dropped}
+
+
+# Global meeting minutes log instance
+minute_log = MinuteLog()
+
+
+# --- Buffered minutes join the queue only once their edit has committed ---
+
+@event.listens_for(Session, 'after_commit')
+def _queue_buffered_minutes(session):
+    rows = session.info.pop('buffered_minutes', None)
+    if rows:
+        minute_log._enqueue(rows, session.get_bind())
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_buffered_minutes(session):
+    session.info.pop('buffered_minutes', None)
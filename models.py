@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
@@ -29,14 +31,26 @@ class Board(db.Model):
     title = db.Column(db.String(100), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     created_at = db.Column(db.DateTime, nullable=False, server_default=db.func.now())
+    revision = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # bumped on every thought change (board_repository)
+    # Set from Python, not CURRENT_TIMESTAMP, so two changes within a second still differ (HTTP validators)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     thoughts = db.relationship('Thought', backref='board', lazy=True, passive_deletes=True)
     minutes = db.relationship('MeetingMinute', backref='board', lazy=True, passive_deletes=True)
 
+    __table_args__ = (
+        db.Index('ix_board_user_id_title', 'user_id', 'title', 'id'),  # /list_boards pages
+    )
+
 class Thought(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.String(500), nullable=False)
     quadrant = db.Column(db.String(20), nullable=False)  # status, goal, analysis, plan
     board_id = db.Column(db.Integer, db.ForeignKey('board.id', ondelete='CASCADE'), nullable=False)
+    content_hash = db.Column(db.String(16), nullable=True)  # normalized-text hash, maintained by dedup_index
+
+    __table_args__ = (
+        db.Index('ix_thought_board_id_content_hash', 'board_id', 'content_hash'),
+    )
 
 class MeetingMinute(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -45,6 +59,10 @@ class MeetingMinute(db.Model):
     action = db.Column(db.String(50), nullable=False)  # e.g., 'add', 'edit', 'delete', 'move', 'ai_suggest', etc.
     detail = db.Column(db.Text, nullable=False)
 
+    __table_args__ = (
+        db.Index('ix_meeting_minute_board_id_id', 'board_id', 'id'),  # /get_meeting_minutes pages
+    )
+
 class ConversationTurn(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     board_id = db.Column(db.Integer, db.ForeignKey('board.id', ondelete='CASCADE'), nullable=False)
@@ -52,3 +70,7 @@ class ConversationTurn(db.Model):
     role = db.Column(db.String(16), nullable=False)  # 'user' or 'assistant'
     content = db.Column(db.Text, nullable=False)
     timestamp = db.Column(db.DateTime, nullable=False, server_default=db.func.now())
+
+    __table_args__ = (
+        db.Index('ix_conversation_turn_board_id_id', 'board_id', 'id'),  # /export_conversation pages
+    )
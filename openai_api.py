@@ -2,11 +2,22 @@ import os
 from openai import OpenAI
 from dotenv import load_dotenv
 from flask import session
+import contextlib
 import logging
+import time
+
+from debug_logger import get_logger
+from cost_ledger import cost_ledger, route_context
+from rate_limiter import record_usage
 
 # Regex is used in fallback parsing for alignment scoring
 import re
 
+# Structured-output schemas and the shared tolerant JSON parser
+import llm_json
+
+log = get_logger('openai')
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -54,7 +65,8 @@ def initialize_openai_client():
     
     try:
         from openai import OpenAI
-        client = OpenAI(api_key=api_key)
+        # Retries and timeouts are handled per call by llm_provider.guarded_call
+        client = OpenAI(api_key=api_key, max_retries=0)
         return True, "OpenAI client initialized successfully"
     except Exception as e:
         client = None
@@ -63,9 +75,9 @@ def initialize_openai_client():
 # Try to initialize with environment key (for development)
 initialized, message = initialize_openai_client()
 if initialized:
-    print(f"[OpenAI] {message}")
+    log.info("%s", message)
 else:
-    print(f"[OpenAI] {message} - Will require user API key")
+    log.info("%s - Will require user API key", message)
 
 # Helper to load prompt from file
 
@@ -97,72 +109,218 @@ SHOW_JSON_WARNING = os.environ.get('SHOW_JSON_WARNING', 'true').lower() == 'true
 
 OPENAI_MODEL = os.environ.get("OPENAI_MODEL", "gpt-5-nano")
 
+# Per-endpoint model overrides, e.g. "classify_thought=gpt-5-nano,conversation=gpt-5-mini";
+# endpoints not listed use OPENAI_MODEL
+OPENAI_ENDPOINT_MODELS = {
+    name.strip(): model.strip()
+    for name, _, model in (part.partition('=') for part in os.environ.get('OPENAI_ENDPOINT_MODELS', '').split(','))
+    if name.strip() and model.strip()
+}
+
+# Escalation: endpoints listed here first try OPENAI_SMALL_MODEL and repeat the call on their
+# configured model when the reply fails validation or reports a confidence below the minimum
+OPENAI_SMALL_MODEL = os.environ.get('OPENAI_SMALL_MODEL', 'gpt-5-nano')
+OPENAI_ESCALATE_ENDPOINTS = {e.strip() for e in os.environ.get('OPENAI_ESCALATE_ENDPOINTS', '').split(',') if e.strip()}
+OPENAI_ESCALATE_MIN_CONFIDENCE = float(os.environ.get('OPENAI_ESCALATE_MIN_CONFIDENCE', '0.6'))
+
+def model_for(endpoint):
+    """Model configured for an endpoint"""
+    return OPENAI_ENDPOINT_MODELS.get(endpoint, OPENAI_MODEL)
+
 # Cost tracking for different models (per 1K tokens)
 MODEL_COSTS = {
-    "gpt-5": {"input": 1.25, "output": 10.0},
-    "gpt-5-mini": {"input": 0.25, "output": 2.0},
-    "gpt-5-nano": {"input": 0.05, "output": 0.40},
-    "gpt-4o": {"input": 0.0025, "output": 0.01},
+    "gpt-5": {"input": 1.25, "output": 10.0, "cached_input": 0.125},
+    "gpt-5-mini": {"input": 0.25, "output": 2.0, "cached_input": 0.025},
+    "gpt-5-nano": {"input": 0.05, "output": 0.40, "cached_input": 0.005},
+    "gpt-4o": {"input": 0.0025, "output": 0.01, "cached_input": 0.00125},
     "gpt-4-turbo": {"input": 0.01, "output": 0.03},
     "gpt-3.5-turbo": {"input": 0.0015, "output": 0.002},
     "gemini-1.5-pro": {"input": 0.00125, "output": 0.005}
 }
 
-def calculate_cost(model, input_tokens, output_tokens, endpoint: str = None):
-    """Calculate cost for API call based on token usage. Optionally tag with endpoint."""
+def calculate_cost(model, input_tokens, output_tokens, endpoint: str = None, cached_tokens: int = 0,
+                   latency_ms: float = None, provider: str = 'openai'):
+    """Calculate cost for API call based on token usage and record it in the cost ledger.
+    Cached prompt tokens are billed at the model's cached_input rate when one is known."""
+    # Charge the tokens to the request's daily budgets (user, API key, endpoint)
+    record_usage((input_tokens or 0) + (output_tokens or 0), provider=provider)
     if model not in MODEL_COSTS:
-        print(f"Warning: Unknown model {model} for cost calculation")
+        log.warning("Unknown model %s for cost calculation", model)
         return 0.0
     
     costs = MODEL_COSTS[model]
-    input_cost = (input_tokens / 1000) * costs["input"]
+    cached_tokens = min(cached_tokens or 0, input_tokens)
+    cached_rate = costs.get("cached_input", costs["input"])
+    input_cost = ((input_tokens - cached_tokens) / 1000) * costs["input"] + (cached_tokens / 1000) * cached_rate
     output_cost = (output_tokens / 1000) * costs["output"]
     total_cost = input_cost + output_cost
     
-    endpoint_tag = f" [{endpoint}]" if endpoint else ""
-    print(f"💰 COST: {model}{endpoint_tag} | In:{input_tokens}tok(${input_cost:.4f}) Out:{output_tokens}tok(${output_cost:.4f}) Total:${total_cost:.4f}")
+    log.info("COST: %s [%s] | In:%dtok($%.4f) Out:%dtok($%.4f) Total:$%.4f",
+             model, endpoint or '-', input_tokens, input_cost, output_tokens, output_cost, total_cost)
     
-    # Also log to dedicated cost tracking file
-    log_cost_to_file(model, input_tokens, output_tokens, input_cost, output_cost, total_cost, endpoint=endpoint)
+    # Queue a structured record; the ledger's background writer does the file/database I/O
+    cost_ledger.record(model=model, endpoint=endpoint, input_tokens=input_tokens, output_tokens=output_tokens,
+                       cached_tokens=cached_tokens, latency_ms=latency_ms, input_cost=input_cost,
+                       output_cost=output_cost, total_cost=total_cost, provider=provider)
     
     return total_cost
 
 def log_cost_to_file(model, input_tokens, output_tokens, input_cost, output_cost, total_cost, endpoint: str = None):
-    """Log cost information to a dedicated file for easy tracking and comparison"""
-    import os
-    from datetime import datetime
-    
-    # Create costs directory if it doesn't exist
-    cost_dir = "costs"
-    if not os.path.exists(cost_dir):
-        os.makedirs(cost_dir)
-    
-    # Generate filename with current date
-    today = datetime.now().strftime("%Y-%m-%d")
-    cost_file = os.path.join(cost_dir, f"llm_costs_{today}.txt")
-    
-    # Format timestamp
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    
-    # Create log entry
-    ep = f"[{endpoint}]" if endpoint else ""
-    log_entry = f"{timestamp} | {model:<12} {ep:<14} | In:{input_tokens:>5}tok(${input_cost:>7.4f}) | Out:{output_tokens:>4}tok(${output_cost:>7.4f}) | Total:${total_cost:>7.4f}\n"
-    
-    # Append to file (create header if new file)
-    try:
-        # Check if file exists to add header
-        file_exists = os.path.exists(cost_file)
-        
-        with open(cost_file, "a", encoding="utf-8") as f:
-            # Add header if this is a new file
-            if not file_exists:
-                f.write("=== LLM COST TRACKING ===\n")
-                f.write("Time     | Model        | Input Tokens (Cost)   | Output Tokens (Cost) | Total Cost\n")
-                f.write("-" * 85 + "\n")
-            
-            f.write(log_entry)
-    except Exception as e:
-        print(f"Warning: Could not write to cost file: {e}")
+    """Record precomputed costs in the cost ledger (kept for callers of the old file logger)"""
+    cost_ledger.record(model=model, endpoint=endpoint, input_tokens=input_tokens, output_tokens=output_tokens,
+                       input_cost=input_cost, output_cost=output_cost, total_cost=total_cost)
+
+def _track_usage(response, endpoint, started, model=None):
+    """Record token usage, cached prompt tokens and latency of a chat completion.
+    Returns (cost, latency_ms)."""
+    latency_ms = (time.perf_counter() - started) * 1000
+    usage = getattr(response, 'usage', None)
+    if usage is None:
+        return 0.0, latency_ms
+    details = getattr(usage, 'prompt_tokens_details', None)
+    cached_tokens = getattr(details, 'cached_tokens', 0) or 0
+    cost = calculate_cost(model or OPENAI_MODEL, usage.prompt_tokens, usage.completion_tokens, endpoint=endpoint,
+                          cached_tokens=cached_tokens, latency_ms=latency_ms)
+    return cost, latency_ms
+
+def _create(endpoint, usage=None, **api_params):
+    """
+    chat.completions.create through the provider resilience layer (retry, deadline, circuit
+    breaker); records cost and latency. If `usage` is a dict, the call's model, cost and
+    latency are accumulated into it.
+    """
+    import llm_provider
+    model = api_params.get('model', OPENAI_MODEL)
+    started = time.perf_counter()
+    response = llm_provider.guarded_call(
+        'openai', model, endpoint,
+        lambda timeout: client.chat.completions.create(timeout=timeout, **api_params))
+    cost, latency_ms = _track_usage(response, endpoint, started, model)
+    if usage is not None:
+        usage['model'] = model
+        usage['calls'] = usage.get('calls', 0) + 1
+        usage['cost'] = usage.get('cost', 0.0) + cost
+        usage['latency_ms'] = usage.get('latency_ms', 0.0) + latency_ms
+    return response
+
+def complete(endpoint, messages, max_tokens=256, temperature=0.7, usage=None):
+    """Plain chat completion on the endpoint's model; returns the reply text."""
+    initialized, message = initialize_openai_client()
+    if not initialized:
+        raise RuntimeError("OpenAI API key required. Please enter your API key in settings.")
+    api_params = {"model": model_for(endpoint), "messages": messages}
+    if api_params["model"].startswith("gpt-5"):
+        api_params["max_completion_tokens"] = max_tokens
+    else:
+        api_params["max_tokens"] = max_tokens
+        api_params["temperature"] = temperature
+    response = _create(endpoint, usage=usage, **api_params)
+    return (response.choices[0].message.content or '').strip()
+
+def _complete_with_escalation(endpoint, build_params, accept, usage=None):
+    """
+    Run a completion whose reply must pass `accept(raw_text)` (returns the parsed value or None).
+
+    On escalation-enabled endpoints the small model answers first; the call is repeated on
+    the endpoint's model when the parsed value is None or carries a 'confidence' below
+    OPENAI_ESCALATE_MIN_CONFIDENCE. The repeated call is tagged route='escalation' in the
+    cost ledger. Returns (parsed_or_None, raw_text) of the last call.
+    """
+    target = model_for(endpoint)
+    models = [target]
+    if endpoint in OPENAI_ESCALATE_ENDPOINTS and OPENAI_SMALL_MODEL != target:
+        models = [OPENAI_SMALL_MODEL, target]
+    reason = None
+    for i, model in enumerate(models):
+        with route_context('escalation', reason) if reason else contextlib.nullcontext():
+            response = _create(endpoint, usage=usage, **build_params(model))
+        raw = (response.choices[0].message.content or '').strip()
+        parsed = accept(raw)
+        if i == len(models) - 1:
+            return parsed, raw
+        confidence = parsed.get('confidence') if isinstance(parsed, dict) else None
+        if parsed is None:
+            reason = f'{model}:invalid_output'
+        elif isinstance(confidence, (int, float)) and confidence < OPENAI_ESCALATE_MIN_CONFIDENCE:
+            reason = f'{model}:confidence {confidence:.2f}'
+        else:
+            return parsed, raw
+        log.info("Escalating %s to %s (%s)", endpoint, models[i + 1], reason)
+        if usage is not None:
+            usage['escalated'] = reason
+
+def _error_code(exc):
+    """Normalize provider errors to the codes the routes map to HTTP statuses"""
+    code = getattr(exc, 'code', None)
+    if code == 'provider_unavailable':
+        return code
+    low = str(exc).lower()
+    if 'insufficient_quota' in low or 'exceeded your current quota' in low or 'status code: 429' in low or 'error code: 429' in low:
+        return 'insufficient_quota'
+    return 'unknown_error'
+
+def _apply_response_format(api_params, name, schema):
+    """Request a strict JSON-schema reply when the model supports it. Returns True if applied."""
+    if llm_json.supports_json_schema(api_params.get("model")):
+        api_params["response_format"] = llm_json.openai_response_format(name, schema)
+        return True
+    return False
+
+def _normalize_thoughts(items):
+    """Normalize a list of suggested thoughts (dicts or strings) to [{'quadrant': ..., 'thought': ...}]."""
+    normalized = []
+    for item in items or []:
+        if isinstance(item, dict):
+            thought_txt = item.get('content') or item.get('thought') or ''
+            quadrant = (item.get('quadrant') or 'status').lower()
+            if thought_txt:
+                normalized.append({'quadrant': quadrant, 'thought': thought_txt})
+        elif isinstance(item, str) and item.strip():
+            normalized.append({'quadrant': 'status', 'thought': item})
+    return normalized
+
+def structured_completion(system, user, schema_name, schema, endpoint, max_tokens=300, temperature=0.2,
+                          validate=None, usage=None):
+    """
+    Run a single-shot completion that must answer with JSON matching `schema`.
+    Uses the provider's JSON-schema response format when available and falls back to
+    tolerant parsing of free text otherwise. A reply that does not parse, or that
+    `validate(parsed)` rejects, counts as invalid (and escalates on escalation-enabled
+    endpoints). `usage` collects model, cost and latency as in _create.
+    Returns: (parsed_dict_or_None, raw_text) or raises on provider errors.
+    """
+    initialized, message = initialize_openai_client()
+    if not initialized:
+        raise RuntimeError("OpenAI API key required. Please enter your API key in settings.")
+
+    def build(model):
+        api_params = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": user},
+            ],
+        }
+        if api_params["model"].startswith("gpt-5"):
+            api_params["max_completion_tokens"] = max_tokens
+        else:
+            api_params["max_tokens"] = max_tokens
+            api_params["temperature"] = temperature
+        _apply_response_format(api_params, schema_name, schema)
+        return api_params
+
+    def accept(raw):
+        try:
+            parsed = llm_json.loads_tolerant(raw)
+        except ValueError:
+            parsed = None
+        if not isinstance(parsed, dict):
+            parsed = llm_json.extract_json(raw, expect=dict)
+        if parsed is None or (validate is not None and not validate(parsed)):
+            return None
+        return parsed
+
+    return _complete_with_escalation(endpoint, build, accept, usage=usage)
 
 def conversational_facilitator(prompt, conversation_history=None, quadrants=None):
     # Removed verbose logging to keep Flask log clean for cost tracking
@@ -170,6 +328,8 @@ def conversational_facilitator(prompt, conversation_history=None, quadrants=None
     Calls OpenAI with a conversational prompt and returns a structured dict:
     - {'action': 'ask_clarification', 'question': ...}
     - {'action': 'classify_and_add', 'thoughts': [{'content': ..., 'quadrant': ...}, ...]}
+    With structured output the dict also carries 'message' and 'suggestions'
+    ({'add_to_quadrant': [...]}) so callers can skip re-parsing reply_text.
     """
     
     # Check if API key is available
@@ -188,115 +348,106 @@ def conversational_facilitator(prompt, conversation_history=None, quadrants=None
         messages.extend(conversation_history)
     # Prepend formatted quadrant state if provided
     if quadrants:
-        def format_items(items):
-            return "\n".join(f"- {item}" for item in items) if items else "(none)"
+        # Same trimmed selection as the prompt built for this request (whole board when small)
+        from board_context import board_context, omitted_note
+        selected, counts = board_context.select(quadrants)
+        def format_items(q):
+            items = selected.get(q, [])
+            lines = [f"- {item}" for item in items]
+            note = omitted_note(len(items), counts[q])
+            if note:
+                lines.append(note)
+            return "\n".join(lines) if lines else "(none)"
         quadrant_text = (
             f"Current Quadrant State:\n"
-            f"Goals:\n{format_items(quadrants.get('goal', []))}\n\n"
-            f"Analyses:\n{format_items(quadrants.get('analysis', []))}\n\n"
-            f"Plans:\n{format_items(quadrants.get('plan', []))}\n\n"
-            f"Statuses:\n{format_items(quadrants.get('status', []))}"
+            f"Goals:\n{format_items('goal')}\n\n"
+            f"Analyses:\n{format_items('analysis')}\n\n"
+            f"Plans:\n{format_items('plan')}\n\n"
+            f"Statuses:\n{format_items('status')}"
         )
         messages.append({"role": "user", "content": quadrant_text})
     messages.append({"role": "user", "content": prompt})
     # GPT-5 models use max_completion_tokens instead of max_tokens and don't support custom temperature
     api_params = {
-        "model": OPENAI_MODEL,
+        "model": model_for("conversation"),
         "messages": messages
     }
     
-    if OPENAI_MODEL.startswith("gpt-5"):
+    if api_params["model"].startswith("gpt-5"):
         api_params["max_completion_tokens"] = 1500
         # GPT-5 only supports default temperature (1.0), so we don't set it
     else:
         api_params["max_tokens"] = 1500
         api_params["temperature"] = 0.7
+    structured = _apply_response_format(api_params, "facilitator_turn", llm_json.FACILITATOR_SCHEMA)
     
     # Call OpenAI with graceful error handling
     try:
-        response = client.chat.completions.create(**api_params)
+        response = _create("conversation", **api_params)
     except Exception as e:
         # Normalize common 429/insufficient quota signals
         msg = str(e)
-        low = msg.lower()
-        code = 'unknown_error'
-        if 'insufficient_quota' in low or 'exceeded your current quota' in low or 'status code: 429' in low or 'error code: 429' in low:
-            code = 'insufficient_quota'
+        code = _error_code(e)
         return {
             'action': 'error',
             'code': code,
             'message': 'The AI provider returned an error. ' + ('Your quota appears to be exhausted. Please check your OpenAI billing/usage.' if code == 'insufficient_quota' else msg)
         }
     
-    # Track cost for this API call
-    if hasattr(response, 'usage'):
-        input_tokens = response.usage.prompt_tokens
-        output_tokens = response.usage.completion_tokens
-        calculate_cost(OPENAI_MODEL, input_tokens, output_tokens, endpoint="conversation")
-    
     # Get model reply
-    reply = response.choices[0].message.content.strip()
-
-    # Try to parse a structured response (JSON, possibly within code fences)
-    import json as _json
-    import re as _re
-    try:
-        text_clean = reply
-        # Strip Markdown code fences if present
-        if text_clean.startswith("```"):
-            # remove first fence line and trailing fence
-            text_clean = text_clean.split('\n', 1)[1]
-            if '```' in text_clean:
-                text_clean = text_clean.split('```', 1)[0]
-        # If no outer fence, try to extract first JSON object
-        m = _re.search(r'\{[\s\S]*\}', text_clean)
-        if m:
-            text_clean = m.group(0)
-        result = _json.loads(text_clean)
-
-        # If result is a list of items, treat as classify_and_add
-        if isinstance(result, list):
-            normalized = []
-            for item in result:
-                if isinstance(item, dict):
-                    thought_txt = item.get('content') or item.get('thought') or ''
-                    quadrant = (item.get('quadrant') or 'status').lower()
-                    if thought_txt:
-                        normalized.append({'quadrant': quadrant, 'thought': thought_txt})
-                elif isinstance(item, str):
-                    normalized.append({'quadrant': 'status', 'thought': item})
+    reply = (response.choices[0].message.content or '').strip()
+
+    # Structured output: the reply is a FACILITATOR_SCHEMA object; render it back to
+    # the prompt's canonical "JSON block then message" text so history stays uniform
+    if structured:
+        try:
+            data = llm_json.loads_tolerant(reply)
+        except ValueError:
+            data = None
+        if isinstance(data, dict) and 'message' in data:
+            normalized = _normalize_thoughts(data.get('add_to_quadrant'))
+            message = data.get('message') or ''
+            result = {
+                'reply_text': llm_json.format_facilitator_reply(normalized, message),
+                'message': message,
+                'suggestions': {'add_to_quadrant': normalized}
+            }
             if normalized:
-                return {'action': 'classify_and_add', 'thoughts': normalized, 'reply_text': normalized[0]['thought']}
-        # If result is a dict
-        if isinstance(result, dict):
-            # Full action dict from LLM
-            if result.get('action') == 'classify_and_add' and 'thoughts' in result:
-                normalized = []
-                for t in result.get('thoughts', []):
-                    normalized.append({
-                        'quadrant': (t.get('quadrant') or 'status').lower(),
-                        'thought': t.get('content') or t.get('thought') or ''
-                    })
-                reply_text = result.get('message') or result.get('reply_text') or (normalized[0]['thought'] if normalized else '')
-                if normalized:
-                    return {'action': 'classify_and_add', 'thoughts': normalized, 'reply_text': reply_text}
-            if result.get('action') == 'ask_clarification' and 'question' in result:
-                return {'action': 'ask_clarification', 'question': result['question']}
-            # Single thought shape
-            if 'quadrant' in result and 'thought' in result:
-                return {
-                    'action': 'classify_and_add',
-                    'thoughts': [{
-                        'quadrant': (result.get('quadrant') or 'status').lower(),
-                        'thought': result.get('thought', '')
-                    }],
-                    'reply_text': result.get('thought', '')
-                }
-            # Clarification by presence of question
-            if 'question' in result:
-                return {'action': 'ask_clarification', 'question': result['question']}
-    except Exception:
-        pass
+                result['action'] = 'classify_and_add'
+                result['thoughts'] = normalized
+            return result
+
+    # Free-text reply: locate an embedded JSON payload with the shared tolerant parser
+    result = llm_json.extract_json(reply)
+
+    # If result is a list of items, treat as classify_and_add
+    if isinstance(result, list):
+        normalized = _normalize_thoughts(result)
+        if normalized:
+            return {'action': 'classify_and_add', 'thoughts': normalized, 'reply_text': normalized[0]['thought']}
+    # If result is a dict
+    if isinstance(result, dict):
+        # Full action dict from LLM
+        if result.get('action') == 'classify_and_add' and 'thoughts' in result:
+            normalized = _normalize_thoughts(result.get('thoughts'))
+            reply_text = result.get('message') or result.get('reply_text') or (normalized[0]['thought'] if normalized else '')
+            if normalized:
+                return {'action': 'classify_and_add', 'thoughts': normalized, 'reply_text': reply_text}
+        if result.get('action') == 'ask_clarification' and 'question' in result:
+            return {'action': 'ask_clarification', 'question': result['question']}
+        # Single thought shape
+        if 'quadrant' in result and 'thought' in result:
+            return {
+                'action': 'classify_and_add',
+                'thoughts': [{
+                    'quadrant': (result.get('quadrant') or 'status').lower(),
+                    'thought': result.get('thought', '')
+                }],
+                'reply_text': result.get('thought', '')
+            }
+        # Clarification by presence of question
+        if 'question' in result:
+            return {'action': 'ask_clarification', 'question': result['question']}
 
     # Heuristic fallbacks if JSON parsing fails
     conversational_indicators = [
@@ -325,51 +476,50 @@ def classify_thought_with_openai(content):
     if not initialized:
         return {"error": "OpenAI API key required. Please enter your API key in settings."}
     
-    # GPT-5 models use max_completion_tokens instead of max_tokens and don't support custom temperature
-    api_params = {
-        "model": OPENAI_MODEL,
-        "messages": [
-            {"role": "system", "content": "You are a helpful assistant. Categorize the following thought into one of these categories: goal, status, analysis, plan. Respond with just the category name in lowercase."},
-            {"role": "user", "content": content}
-        ]
-    }
-    
-    if OPENAI_MODEL.startswith("gpt-5"):
-        api_params["max_completion_tokens"] = 512
-        # GPT-5 only supports default temperature (1.0), so we don't set it
-    else:
-        api_params["max_tokens"] = 512
-        api_params["temperature"] = 0.3
-    
-    response = client.chat.completions.create(**api_params)
-    
-    # Track cost for this API call
-    if hasattr(response, 'usage'):
-        input_tokens = response.usage.prompt_tokens
-        output_tokens = response.usage.completion_tokens
-        calculate_cost(OPENAI_MODEL, input_tokens, output_tokens, endpoint="classify_thought")
-    
-    # Extract and parse the JSON from the response
-    import json
-    reply = response.choices[0].message.content
-    try:
-        # Remove code block if present
-        if reply.strip().startswith("```json"):
-            reply = reply.strip().split("```json",1)[1].split("```",1)[0].strip()
-        result = json.loads(reply)
-        # If the result is a dict (old style), wrap in list for backward compatibility
-        if isinstance(result, dict):
-            result = [result]
-        # Return a list of dicts, each with quadrant and thought
-        return [
-            {
-                "quadrant": item.get("quadrant", "status").lower(),
-                "thought": item.get("thought", "")
-            }
-            for item in result if item.get("thought")
-        ]
-    except Exception as e:
-        raise RuntimeError(f"OpenAI response could not be parsed as JSON: {reply}\nError: {e}")
+    def build(model):
+        # GPT-5 models use max_completion_tokens instead of max_tokens and don't support custom temperature
+        api_params = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": "You are a helpful assistant. Categorize the following thought into one of these categories: goal, status, analysis, plan. Respond with just the category name in lowercase."},
+                {"role": "user", "content": content}
+            ]
+        }
+        if api_params["model"].startswith("gpt-5"):
+            api_params["max_completion_tokens"] = 512
+            # GPT-5 only supports default temperature (1.0), so we don't set it
+        else:
+            api_params["max_tokens"] = 512
+            api_params["temperature"] = 0.3
+        _apply_response_format(api_params, "thought_classification", llm_json.CLASSIFICATION_SCHEMA)
+        return api_params
+
+    def accept(reply):
+        # Extract and parse the JSON from the response
+        try:
+            result = llm_json.loads_tolerant(reply)
+            result = result.get('thoughts', [result]) if isinstance(result, dict) else result
+        except ValueError:
+            result = llm_json.extract_json(reply)
+        # Bare category name (as the system prompt requests) -> keep the original thought
+        if result is None and reply.lower().strip('. ') in llm_json.QUADRANTS:
+            result = [{"quadrant": reply.lower().strip('. '), "thought": content}]
+        return result
+
+    result, reply = _complete_with_escalation("classify_thought", build, accept)
+    if result is None:
+        raise RuntimeError(f"OpenAI response could not be parsed as JSON: {reply}")
+    # If the result is a dict (old style), wrap in list for backward compatibility
+    if isinstance(result, dict):
+        result = result.get('thoughts', [result])
+    # Return a list of dicts, each with quadrant and thought
+    return [
+        {
+            "quadrant": item.get("quadrant", "status").lower(),
+            "thought": item.get("thought", "")
+        }
+        for item in result if isinstance(item, dict) and item.get("thought")
+    ]
 
 
 # --- Suggest Solution ---
@@ -385,35 +535,29 @@ def suggest_solution_with_openai(problems, obstacles):
     
     # GPT-5 models use max_completion_tokens instead of max_tokens and don't support custom temperature
     api_params = {
-        "model": OPENAI_MODEL,
+        "model": model_for("suggest_solution"),
         "messages": [
             {"role": "system", "content": "You are a helpful assistant that generates concise, actionable suggestions based on user input. Respond with exactly 3-5 suggestions, each as a separate line starting with a dash (-). Keep suggestions brief and specific."},
             {"role": "user", "content": f"Based on this context: {problems}\n\nGenerate 3-5 actionable suggestions for: {obstacles}"}
         ]
     }
     
-    if OPENAI_MODEL.startswith("gpt-5"):
+    if api_params["model"].startswith("gpt-5"):
         api_params["max_completion_tokens"] = 300
         # GPT-5 only supports default temperature (1.0), so we don't set it
     else:
         api_params["max_tokens"] = 300
         api_params["temperature"] = 0.7
+    _apply_response_format(api_params, "solution_suggestions", llm_json.SUGGESTIONS_SCHEMA)
     
-    response = client.chat.completions.create(**api_params)
+    response = _create("suggest_solution", **api_params)
     
-    # Track cost for this API call
-    if hasattr(response, 'usage'):
-        input_tokens = response.usage.prompt_tokens
-        output_tokens = response.usage.completion_tokens
-        calculate_cost(OPENAI_MODEL, input_tokens, output_tokens, endpoint="suggest_solution")
-    
-    import json
-    reply = response.choices[0].message.content
+    reply = response.choices[0].message.content or ''
     try:
-        # Remove code block if present
-        if reply.strip().startswith("```json"):
-            reply = reply.strip().split("```json",1)[1].split("```",1)[0].strip()
-        suggestions = json.loads(reply)
+        # Structured replies wrap the list as {"suggestions": [...]}; free text may hold a bare list
+        suggestions = llm_json.extract_json(reply)
+        if isinstance(suggestions, dict):
+            suggestions = suggestions.get('suggestions')
         if not isinstance(suggestions, list):
             raise ValueError('OpenAI did not return a list')
         # Ensure each suggestion is a dict with content and quadrant
@@ -425,8 +569,7 @@ def suggest_solution_with_openai(problems, obstacles):
                 normalized.append({'content': s, 'quadrant': 'status'})
         return {'suggestions': normalized}
     except Exception as e:
-        import logging
-        logging.error(f"OpenAI classify_thought_with_openai JSON parse error: {e}\nAI reply: {reply}")
+        log.error("suggest_solution_with_openai JSON parse error: %s\nAI reply: %s", e, reply)
         return {'error': 'Sorry, the AI response could not be understood. Please try again or rephrase your input.'}
 
 
@@ -441,21 +584,21 @@ def brainstorm_with_openai(topic):
         "Respond as a numbered list."
     )
     user_prompt = f"'{topic}'"
-    response = client.chat.completions.create(
-        model=OPENAI_MODEL,
-        messages=[
+    api_params = {
+        "model": model_for("brainstorm"),
+        "messages": [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt}
-        ],
-        temperature=0.5,
-        max_tokens=256
-    )
+        ]
+    }
+    # GPT-5 models use max_completion_tokens and only the default temperature
+    if api_params["model"].startswith("gpt-5"):
+        api_params["max_completion_tokens"] = 256
+    else:
+        api_params["max_tokens"] = 256
+        api_params["temperature"] = 0.5
+    response = _create("brainstorm", **api_params)
     text = response.choices[0].message.content
-    # Track cost for this API call
-    if hasattr(response, 'usage'):
-        input_tokens = response.usage.prompt_tokens
-        output_tokens = response.usage.completion_tokens
-        calculate_cost(OPENAI_MODEL, input_tokens, output_tokens, endpoint="brainstorm")
     # Parse ideas from numbered list
     ideas = [line.lstrip("1234567890. ").strip() for line in text.split('\n') if line.strip() and any(c.isalpha() for c in line)]
     if len(ideas) > 3:
@@ -474,47 +617,42 @@ def meeting_minutes_with_openai(summary):
     user_prompt = f"Summary: '{summary}'\n\nMeeting Minutes:"
     # GPT-5 models use max_completion_tokens instead of max_tokens and don't support custom temperature
     api_params = {
-        "model": OPENAI_MODEL,
+        "model": model_for("meeting_minutes"),
         "messages": [
             {"role": "system", "content": "You are a helpful assistant. Analyze the following thought and provide a brief insight or suggestion for improvement. Keep response to 1-2 sentences."},
             {"role": "user", "content": summary}
         ]
     }
     
-    if OPENAI_MODEL.startswith("gpt-5"):
+    if api_params["model"].startswith("gpt-5"):
         api_params["max_completion_tokens"] = 256
         # GPT-5 only supports default temperature (1.0), so we don't set it
     else:
         api_params["max_tokens"] = 256
         api_params["temperature"] = 0.2
     
-    response = client.chat.completions.create(**api_params)
-    # Track cost for this API call
-    if hasattr(response, 'usage'):
-        input_tokens = response.usage.prompt_tokens
-        output_tokens = response.usage.completion_tokens
-        calculate_cost(OPENAI_MODEL, input_tokens, output_tokens, endpoint="meeting_minutes")
+    response = _create("meeting_minutes", **api_params)
     text = response.choices[0].message.content.strip()
     return {'result': text}
 
 def rewrite_thought_with_openai(thought):
     system_prompt = "You are an assistant that rewrites thoughts to be clearer, more positive, or more actionable. Respond with 1-3 improved versions as a numbered or bulleted list."
     user_prompt = f"Rewrite the following thought to be clearer, more positive, or more actionable.\n\nThought: '{thought}'\n\nRewritten Thought:"
-    response = client.chat.completions.create(
-        model=OPENAI_MODEL,
-        messages=[
+    api_params = {
+        "model": model_for("rewrite_thought"),
+        "messages": [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt}
-        ],
-        temperature=0.5,
-        max_tokens=256
-    )
+        ]
+    }
+    # GPT-5 models use max_completion_tokens and only the default temperature
+    if api_params["model"].startswith("gpt-5"):
+        api_params["max_completion_tokens"] = 256
+    else:
+        api_params["max_tokens"] = 256
+        api_params["temperature"] = 0.5
+    response = _create("rewrite_thought", **api_params)
     text = response.choices[0].message.content.strip()
-    # Track cost for this API call
-    if hasattr(response, 'usage'):
-        input_tokens = response.usage.prompt_tokens
-        output_tokens = response.usage.completion_tokens
-        calculate_cost(OPENAI_MODEL, input_tokens, output_tokens, endpoint="rewrite_thought")
     # Parse for multiple suggestions (numbered or bulleted)
     lines = [line.strip("1234567890.-• \t") for line in text.split('\n') if line.strip()]
     filtered = [l for l in lines if l and not l.lower().startswith("here are") and not l.lower().startswith("depending on")]
@@ -579,34 +717,26 @@ def summarize_board_with_openai(quadrants, tone: str = 'neutral', length: str =
     )
 
     api_params = {
-        "model": OPENAI_MODEL,
+        "model": model_for("board_ai_summary"),
         "messages": [
             {"role": "system", "content": system},
             {"role": "user", "content": board_context},
         ],
     }
 
-    if OPENAI_MODEL.startswith("gpt-5"):
+    if api_params["model"].startswith("gpt-5"):
         api_params["max_completion_tokens"] = token_cap
     else:
         api_params["max_tokens"] = token_cap
         api_params["temperature"] = 0.4
 
     try:
-        response = client.chat.completions.create(**api_params)
+        response = _create("board_ai_summary", **api_params)
     except Exception as e:
         msg = str(e)
-        low = msg.lower()
-        code = 'unknown_error'
-        if 'insufficient_quota' in low or 'status code: 429' in low or 'error code: 429' in low:
-            code = 'insufficient_quota'
+        code = _error_code(e)
         return {"error": f"AI error: {msg}", "code": code}
 
-    if hasattr(response, 'usage'):
-        input_tokens = response.usage.prompt_tokens
-        output_tokens = response.usage.completion_tokens
-        calculate_cost(OPENAI_MODEL, input_tokens, output_tokens, endpoint="board_ai_summary")
-
     text = response.choices[0].message.content.strip()
     return {"summary": text}
 
@@ -649,53 +779,40 @@ def assess_goals_status_alignment(quadrants):
     )
 
     api_params = {
-        "model": OPENAI_MODEL,
+        "model": model_for("board_alignment"),
         "messages": [
             {"role": "system", "content": system},
             {"role": "user", "content": user},
         ],
     }
-    if OPENAI_MODEL.startswith("gpt-5"):
+    if api_params["model"].startswith("gpt-5"):
         api_params["max_completion_tokens"] = 120
     else:
         api_params["max_tokens"] = 120
         api_params["temperature"] = 0.2
+    _apply_response_format(api_params, "goal_status_alignment", llm_json.ALIGNMENT_SCHEMA)
 
     try:
-        response = client.chat.completions.create(**api_params)
+        response = _create("board_alignment", **api_params)
     except Exception as e:
         msg = str(e)
-        low = msg.lower()
-        code = 'unknown_error'
-        if 'insufficient_quota' in low or 'status code: 429' in low or 'error code: 429' in low:
-            code = 'insufficient_quota'
+        code = _error_code(e)
         return {"error": f"AI error: {msg}", "code": code}
 
-    if hasattr(response, 'usage'):
-        input_tokens = response.usage.prompt_tokens
-        output_tokens = response.usage.completion_tokens
-        calculate_cost(OPENAI_MODEL, input_tokens, output_tokens, endpoint="board_alignment")
-
     raw = response.choices[0].message.content.strip()
     debug_enabled = os.environ.get('DEBUG_ALIGNMENT', '0') == '1'
 
     if debug_enabled:
-        print("[ALIGNMENT] Raw AI response:", raw)
+        log.info("[ALIGNMENT] Raw AI response: %s", raw)
 
-    import json
     try:
-        if raw.startswith("```"):
-            # Strip code-fence if present
-            raw_json = raw.split('\n', 1)[1]
-            if '```' in raw_json:
-                raw_json = raw_json.split('```', 1)[0]
-        else:
-            raw_json = raw
-        data = json.loads(raw_json)
+        data = llm_json.extract_json(raw, expect=dict)
+        if data is None:
+            raise ValueError("No JSON object in alignment reply")
         score = int(max(0, min(100, int(data.get('score', 0)))))
         rationale = str(data.get('rationale', '')).strip()
         if debug_enabled:
-            print(f"[ALIGNMENT] Parsed JSON score={score}, rationale={rationale}")
+            log.info("[ALIGNMENT] Parsed JSON score=%s, rationale=%s", score, rationale)
         return {"score": score, "rationale": rationale}
     except Exception as json_err:
         # Robust fallback parsing avoiding ranges like "0-100"
@@ -740,7 +857,7 @@ def assess_goals_status_alignment(quadrants):
         rationale = text[:240].strip()
 
         if debug_enabled:
-            print(f"[ALIGNMENT] Fallback parsed score={score_val}; raw snippet={rationale}")
+            log.info("[ALIGNMENT] Fallback parsed score=%s; raw snippet=%s", score_val, rationale)
 
         return {"score": score_val, "rationale": rationale}
 
@@ -0,0 +1,299 @@
+"""
+Rate Limiter
+Token-bucket request limits and daily LLM token budgets per user, per API key and per
+endpoint, kept in a shared SQLite store so every worker process enforces the same limits
+"""
+
+import functools
+import hashlib
+import math
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from debug_logger import get_logger
+
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+# Shared store; every worker must point at the same file
+RATE_LIMIT_PATH = os.environ.get('RATE_LIMIT_PATH', os.path.join('instance', 'rate_limits.db'))
+
+# Requests per minute (bucket size = one minute of requests, refilled continuously); 0 = no limit
+RATE_LIMIT_USER_PER_MINUTE = int(os.environ.get('RATE_LIMIT_USER_PER_MINUTE', '20'))
+RATE_LIMIT_KEY_PER_MINUTE = int(os.environ.get('RATE_LIMIT_KEY_PER_MINUTE', '60'))
+RATE_LIMIT_ENDPOINT_PER_MINUTE = int(os.environ.get('RATE_LIMIT_ENDPOINT_PER_MINUTE', '0'))
+# Per-endpoint overrides of the endpoint limit, e.g. "brainstorm=10,interactive_gaps=60"
+RATE_LIMIT_ENDPOINTS = os.environ.get('RATE_LIMIT_ENDPOINTS', '')
+
+# Daily LLM token budgets (input + output tokens, reset at local midnight); 0 = no budget.
+# Off unless set: a facilitator turn sends ~7.5k input tokens (see costs/), so size any
+# budget from the recorded usage (scripts/cost_report.py) rather than a guess
+TOKEN_BUDGET_USER_DAILY = int(os.environ.get('TOKEN_BUDGET_USER_DAILY', '0'))
+TOKEN_BUDGET_KEY_DAILY = int(os.environ.get('TOKEN_BUDGET_KEY_DAILY', '0'))
+TOKEN_BUDGET_ENDPOINT_DAILY = int(os.environ.get('TOKEN_BUDGET_ENDPOINT_DAILY', '0'))
+
+log = get_logger('ratelimit')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_buckets (
+    scope TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS token_usage (
+    day TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    tokens INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, scope)
+);
+"""
+
+
+def _parse_limits(spec: str) -> Dict[str, int]:
+    limits = {}
+    for part in spec.split(','):
+        name, _, value = part.partition('=')
+        try:
+            limits[name.strip()] = int(value)
+        except ValueError:
+            continue
+    return limits
+
+
+def _seconds_until_midnight(now: float) -> int:
+    current = datetime.fromtimestamp(now)
+    midnight = (current + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return max(1, math.ceil((midnight - current).total_seconds()))
+
+
+def key_fingerprint(api_key: Optional[str]) -> str:
+    """Stable, non-reversible id for an API key ('shared' for the server's own key)."""
+    if not api_key:
+        return 'shared'
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]
+
+
+class RateLimited(Exception):
+    """Raised when a request would exceed a rate limit or a daily token budget."""
+
+    def __init__(self, scope: str, kind: str, retry_after: int):
+        super().__init__(f'{kind} exceeded for {scope}')
+        self.scope = scope
+        self.kind = kind
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """
+    Limits are checked per scope: 'user:<id>', 'key:<fingerprint>' and 'endpoint:<name>'.
+
+    check() takes one token from every scope's bucket and verifies the daily token
+    budgets in a single BEGIN IMMEDIATE transaction, so concurrent workers serialize on
+    the store and a rejected request consumes nothing. add_usage() adds the tokens a
+    provider call actually used to each scope's counter for the day.
+    """
+
+    def __init__(self, path: str = RATE_LIMIT_PATH, enabled: bool = RATE_LIMIT_ENABLED,
+                 user_rpm: int = RATE_LIMIT_USER_PER_MINUTE, key_rpm: int = RATE_LIMIT_KEY_PER_MINUTE,
+                 endpoint_rpm: int = RATE_LIMIT_ENDPOINT_PER_MINUTE,
+                 endpoint_limits: Optional[Dict[str, int]] = None,
+                 user_budget: int = TOKEN_BUDGET_USER_DAILY, key_budget: int = TOKEN_BUDGET_KEY_DAILY,
+                 endpoint_budget: int = TOKEN_BUDGET_ENDPOINT_DAILY):
+        self.path = path
+        self.enabled = enabled
+        self.rpm = {'user': user_rpm, 'key': key_rpm, 'endpoint': endpoint_rpm}
+        self.endpoint_limits = _parse_limits(RATE_LIMIT_ENDPOINTS) if endpoint_limits is None else endpoint_limits
+        self.budgets = {'user': user_budget, 'key': key_budget, 'endpoint': endpoint_budget}
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def rate_for(self, scope: str) -> int:
+        kind, _, name = scope.partition(':')
+        if kind == 'endpoint' and name in self.endpoint_limits:
+            return self.endpoint_limits[name]
+        return self.rpm.get(kind, 0)
+
+    def budget_for(self, scope: str) -> int:
+        return self.budgets.get(scope.partition(':')[0], 0)
+
+    def check(self, scopes: List[str], now: Optional[float] = None) -> None:
+        """Consume one request from each scope's bucket or raise RateLimited (nothing consumed)."""
+        if not self.enabled or not scopes:
+            return
+        now = time.time() if now is None else now
+        day = datetime.fromtimestamp(now).strftime('%Y-%m-%d')
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for scope in scopes:
+                budget = self.budget_for(scope)
+                if budget > 0:
+                    row = conn.execute('SELECT tokens FROM token_usage WHERE day = ? AND scope = ?',
+                                       (day, scope)).fetchone()
+                    if row and row[0] >= budget:
+                        raise RateLimited(scope, 'Daily token budget', _seconds_until_midnight(now))
+
+            updates: List[Tuple[str, float, float]] = []
+            for scope in scopes:
+                rpm = self.rate_for(scope)
+                if rpm <= 0:
+                    continue
+                refill = rpm / 60.0
+                row = conn.execute('SELECT tokens, updated FROM rate_buckets WHERE scope = ?', (scope,)).fetchone()
+                tokens = float(rpm) if row is None else min(float(rpm), row[0] + (now - row[1]) * refill)
+                if tokens < 1.0:
+                    raise RateLimited(scope, 'Rate limit', max(1, math.ceil((1.0 - tokens) / refill)))
+                updates.append((scope, tokens - 1.0, now))
+
+            conn.executemany('INSERT OR REPLACE INTO rate_buckets (scope, tokens, updated) VALUES (?, ?, ?)',
+                             updates)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def add_usage(self, scopes: List[str], tokens: int, now: Optional[float] = None) -> None:
+        """Add tokens used by a provider call to each scope's daily counter."""
+        if not self.enabled or not scopes or tokens <= 0:
+            return
+        now = time.time() if now is None else now
+        day = datetime.fromtimestamp(now).strftime('%Y-%m-%d')
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany(
+                'INSERT INTO token_usage (day, scope, tokens) VALUES (?, ?, ?) '
+                'ON CONFLICT(day, scope) DO UPDATE SET tokens = tokens + excluded.tokens',
+                [(day, scope, int(tokens)) for scope in scopes])
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def usage(self, scope: str, day: Optional[str] = None) -> int:
+        day = day or datetime.now().strftime('%Y-%m-%d')
+        row = self._connect().execute('SELECT tokens FROM token_usage WHERE day = ? AND scope = ?',
+                                      (day, scope)).fetchone()
+        return row[0] if row else 0
+
+
+# Global rate limiter instance
+rate_limiter = RateLimiter()
+
+
+def request_scopes(endpoint: str) -> List[str]:
+    """Scopes of the current Flask request: user (or browser session), API key in use, endpoint."""
+    from flask import session
+    from flask_login import current_user
+    if current_user and current_user.is_authenticated:
+        user_scope = f'user:{current_user.id}'
+    else:
+        # Anonymous callers are told apart by a random id in their session cookie; behind a
+        # reverse proxy remote_addr is the proxy's, which would put everyone in one bucket
+        if 'rate_limit_id' not in session:
+            session['rate_limit_id'] = secrets.token_urlsafe(12)
+        user_scope = f'user:anon-{session["rate_limit_id"]}'
+    return [user_scope, key_scope(), f'endpoint:{endpoint}']
+
+
+def key_scope(provider: Optional[str] = None) -> str:
+    """Scope of the API key a call to `provider` (default AI_PROVIDER) is billed to."""
+    from flask import session
+    provider = (provider or os.environ.get('AI_PROVIDER', 'openai')).lower()
+    api_key = session.get('openai_api_key') if provider == 'openai' else None
+    return f'key:{provider}-{key_fingerprint(api_key)}'
+
+
+def _served_scopes(scopes: List[str], provider: Optional[str]) -> List[str]:
+    # Failover may serve a call with another provider than the one checked up front
+    if not provider:
+        return scopes
+    return [s for s in scopes if not s.startswith('key:')] + [key_scope(provider)]
+
+
+def check_provider(provider: str) -> None:
+    """
+    Before calling `provider` for a rate-limited request: check the limits of the key it
+    bills when that is not the key checked by @rate_limited (failover). Raises RateLimited.
+    """
+    try:
+        from flask import g, has_request_context
+        if not rate_limiter.enabled or not has_request_context():
+            return
+        scopes = g.get('rate_limit_scopes')
+        if not scopes:
+            return
+        scope = key_scope(provider)
+        if scope in scopes:
+            return
+    except Exception as e:
+        log.warning("Could not check provider key limits: %s", e)
+        return
+    rate_limiter.check([scope])
+
+
+def record_usage(tokens: int, provider: Optional[str] = None) -> None:
+    """
+    Charge tokens to the scopes of the current request (no-op outside rate-limited routes);
+    the key scope is that of `provider`, the provider that served the call.
+    """
+    try:
+        from flask import g, has_request_context
+        if not has_request_context():
+            return
+        scopes = g.get('rate_limit_scopes')
+        if scopes:
+            rate_limiter.add_usage(_served_scopes(scopes, provider), tokens)
+    except Exception as e:
+        log.warning("Could not record token usage: %s", e)
+
+
+def rate_limited(endpoint: Optional[str] = None):
+    """
+    Route decorator enforcing rate limits and token budgets before the view runs.
+    Over-limit requests get a 429 JSON error with a Retry-After header; if the store
+    itself fails the request is let through and the failure logged.
+    """
+    def decorator(view):
+        name = endpoint or view.__name__
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            from flask import g, jsonify
+            if rate_limiter.enabled:
+                try:
+                    scopes = request_scopes(name)
+                    rate_limiter.check(scopes)
+                    g.rate_limit_scopes = scopes
+                except RateLimited as e:
+                    log.info("Rejected %s: %s (retry in %ss)", name, e, e.retry_after)
+                    response = jsonify({
+                        'success': False,
+                        'error': f'{e.kind} exceeded, please retry in {e.retry_after} seconds',
+                        'code': 'rate_limited',
+                        'scope': e.scope.partition(':')[0],
+                        'retry_after': e.retry_after,
+                    })
+                    response.status_code = 429
+                    response.headers['Retry-After'] = str(e.retry_after)
+                    return response
+                except Exception as e:
+                    log.warning("Rate limit store unavailable, allowing %s: %s", name, e)
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,191 @@
+# context_benchmark.py
+"""
+Compare the full quadrant state with the retrieved board context on recorded sessions.
+
+For every user turn stored in ConversationTurn, the board's thoughts are rendered both ways
+and the script reports prompt tokens saved and a grounding recall: of the thoughts the
+recorded assistant reply actually drew on (shares >= 2 content words with it), the share
+still present in the compact context. --pad adds synthetic thoughts to every board to see
+how savings scale on large boards; --llm N replays N turns through the facilitator with
+both contexts and compares the answers (needs an API key, costs tokens).
+
+Usage:
+    python scripts/context_benchmark.py [--board BOARD_ID] [--budget TOKENS] [--pad N]
+                                        [--llm N] [--json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+QUADRANTS = ('status', 'goal', 'analysis', 'plan')
+
+
+def _render(quadrants, counts=None):
+    from board_context import omitted_note
+    lines = []
+    for q in QUADRANTS:
+        items = quadrants.get(q, [])
+        lines.append(f"{q.capitalize()}:")
+        lines.extend(f"  - {item}" for item in items)
+        if not items:
+            lines.append("  (empty)")
+        note = omitted_note(len(items), (counts or {}).get(q, len(items)))
+        if note:
+            lines.append(f"  {note}")
+    return "\n".join(lines)
+
+
+def _words(text):
+    from utils.text_index import tokenize
+    return set(tokenize(text))
+
+
+def _padding(n, seed):
+    # Filler built from the rule tester's sample inputs, varied so items are not duplicates
+    base = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sample_test_cases.txt')
+    with open(base, 'r', encoding='utf-8') as f:
+        samples = [line.strip() for line in f if line.strip()]
+    rng = random.Random(seed)
+    topics = ['the onboarding flow', 'vendor contracts', 'the mobile app', 'regional sales', 'hiring',
+              'the data warehouse', 'support tickets', 'release planning', 'office move', 'training']
+    return {q: [f"{rng.choice(samples)} for {rng.choice(topics)} (item {i})" for i in range(n // 4)]
+            for q in QUADRANTS}
+
+
+def load_sessions(board_id=None):
+    from models import Thought, ConversationTurn
+    query = ConversationTurn.query
+    if board_id:
+        query = query.filter_by(board_id=int(board_id) if str(board_id).isdigit() else board_id)
+    sessions = {}
+    for turn in query.order_by(ConversationTurn.id.asc()).all():
+        sessions.setdefault(turn.board_id, []).append(turn)
+    for bid, turns in sessions.items():
+        quadrants = {q: [] for q in QUADRANTS}
+        if str(bid).isdigit():
+            for t in Thought.query.filter_by(board_id=int(bid)).order_by(Thought.id.asc()).all():
+                if t.quadrant in quadrants:
+                    quadrants[t.quadrant].append(t.content)
+        else:
+            import board_store
+            for t in (board_store.get_board(bid) or {}).get('thoughts', []):
+                if t.get('quadrant') in quadrants:
+                    quadrants[t['quadrant']].append(t.get('content', ''))
+        yield bid, quadrants, turns
+
+
+def benchmark(board_id=None, budget=None, pad=0, llm_turns=0):
+    from board_context import BoardContext, estimate_tokens
+    ctx = BoardContext(budget=budget) if budget else BoardContext()
+    rows, replays = [], []
+    for bid, quadrants, turns in load_sessions(board_id):
+        if pad:
+            extra = _padding(pad, seed=str(bid))
+            quadrants = {q: extra[q] + quadrants[q] for q in QUADRANTS}
+        for i, turn in enumerate(turns):
+            if turn.role != 'user' or not (turn.content or '').strip():
+                continue
+            reply = next((t.content for t in turns[i + 1:] if t.role == 'assistant'), '')
+            selected, counts = ctx.select(quadrants, turn.content)
+            full_tokens = estimate_tokens(_render(quadrants))
+            compact_tokens = estimate_tokens(_render(selected, counts))
+            reply_words = _words(reply)
+            shown = {item for items in selected.values() for item in items}
+            grounded = [item for items in quadrants.values() for item in items
+                        if len(_words(item) & reply_words) >= 2]
+            rows.append({
+                'board_id': bid,
+                'thoughts': sum(counts.values()),
+                'full_tokens': full_tokens,
+                'compact_tokens': compact_tokens,
+                'grounded': len(grounded),
+                'grounded_kept': sum(1 for item in grounded if item in shown),
+            })
+            if len(replays) < llm_turns:
+                replays.append(_replay(turn.content, turns[:i], quadrants))
+    return _summarize(rows, replays)
+
+
+def _replay(user_input, earlier_turns, quadrants):
+    """Ask the facilitator the same turn with the full and the compact board; compare the answers."""
+    import app as gaps_app
+    from board_context import board_context
+    history = [{'role': t.role, 'content': t.content} for t in earlier_turns if t.role in ('user', 'assistant')]
+    answers = {}
+    for mode in ('full', 'compact'):
+        board_context.enabled = mode == 'compact'
+        with gaps_app.app.test_request_context():
+            prompt = gaps_app.build_conversational_prompt(history + [{'role': 'user', 'content': user_input}], quadrants)
+            result = gaps_app.ai_api.conversational_facilitator(prompt, quadrants=quadrants)
+        board_context.enabled = True
+        suggestions = (result.get('suggestions') or {}).get('add_to_quadrant', []) if isinstance(result, dict) else []
+        answers[mode] = {
+            'text': (result.get('message') or result.get('reply_text') or '') if isinstance(result, dict) else str(result),
+            'suggestions': {(s.get('quadrant'), (s.get('thought') or '').lower()) for s in suggestions},
+            'prompt_tokens': len(prompt) // 4,
+        }
+    a, b = _words(answers['full']['text']), _words(answers['compact']['text'])
+    sa, sb = answers['full']['suggestions'], answers['compact']['suggestions']
+    return {
+        'prompt_tokens_full': answers['full']['prompt_tokens'],
+        'prompt_tokens_compact': answers['compact']['prompt_tokens'],
+        'answer_overlap': round(len(a & b) / len(a | b), 3) if a | b else 1.0,
+        'suggestion_agreement': round(len(sa & sb) / len(sa | sb), 3) if sa | sb else 1.0,
+    }
+
+
+def _summarize(rows, replays):
+    full = sum(r['full_tokens'] for r in rows)
+    compact = sum(r['compact_tokens'] for r in rows)
+    grounded = sum(r['grounded'] for r in rows)
+    summary = {
+        'turns': len(rows),
+        'boards': len({r['board_id'] for r in rows}),
+        'avg_thoughts': round(sum(r['thoughts'] for r in rows) / len(rows), 1) if rows else 0,
+        'full_tokens': full,
+        'compact_tokens': compact,
+        'tokens_saved_pct': round(100 * (full - compact) / full, 1) if full else 0.0,
+        'grounding_recall': round(sum(r['grounded_kept'] for r in rows) / grounded, 3) if grounded else None,
+        'turns_trimmed': sum(1 for r in rows if r['compact_tokens'] < r['full_tokens']),
+    }
+    if replays:
+        summary['llm_replays'] = len(replays)
+        for key in ('answer_overlap', 'suggestion_agreement'):
+            summary[key] = round(sum(r[key] for r in replays) / len(replays), 3)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tokens saved vs grounding by the retrieved board context')
+    parser.add_argument('--board', help='only this board id')
+    parser.add_argument('--budget', type=int, help='token budget (default: BOARD_CONTEXT_TOKEN_BUDGET)')
+    parser.add_argument('--pad', type=int, default=0, help='add N synthetic thoughts to every board')
+    parser.add_argument('--llm', type=int, default=0, help='replay N turns through the facilitator')
+    parser.add_argument('--json', action='store_true', help='print the raw JSON summary')
+    args = parser.parse_args()
+
+    from app import app
+    with app.app_context():
+        summary = benchmark(args.board, args.budget, args.pad, args.llm)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+    if not summary['turns']:
+        print("No recorded user turns found.")
+        return
+    print(f"{summary['turns']} user turns on {summary['boards']} boards "
+          f"(avg {summary['avg_thoughts']} thoughts, {summary['turns_trimmed']} trimmed)")
+    print(f"Quadrant context tokens: full {summary['full_tokens']:,}  compact {summary['compact_tokens']:,}  "
+          f"saved {summary['tokens_saved_pct']}%")
+    if summary['grounding_recall'] is not None:
+        print(f"Grounding recall (thoughts used by recorded replies kept in context): {summary['grounding_recall']:.1%}")
+    if 'llm_replays' in summary:
+        print(f"LLM replays: {summary['llm_replays']}  answer overlap {summary['answer_overlap']:.1%}  "
+              f"suggestion agreement {summary['suggestion_agreement']:.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+# cost_report.py
+"""
+Summarize LLM cost and latency from the cost ledger (costs/ledger.db).
+Usage:
+    python scripts/cost_report.py [--group-by endpoint|day|model|provider|user|board|route]
+                                  [--start YYYY-MM-DD] [--end YYYY-MM-DD] [--import-text] [--refresh] [--json]
+"""
+import argparse
+import json
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cost_analytics import GROUP_COLUMNS, connect, import_text_logs, refresh_rollups, report
+
+
+def _fmt(value, spec):
+    if value is None:
+        return '-'.rjust(int(spec.lstrip('>').split('.')[0]))
+    return format(value, spec)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='LLM cost and latency report')
+    parser.add_argument('--group-by', default='endpoint', choices=sorted(GROUP_COLUMNS))
+    parser.add_argument('--start', help='first day (default: 30 days before --end)')
+    parser.add_argument('--end', help='last day (default: today)')
+    parser.add_argument('--import-text', action='store_true',
+                        help='import costs/llm_costs_*.txt logs before reporting')
+    parser.add_argument('--refresh', action='store_true',
+                        help='rebuild the daily rollups from the ledger (latest rolled-up day onwards)')
+    parser.add_argument('--json', action='store_true', help='print the raw JSON report')
+    args = parser.parse_args()
+
+    conn = connect()
+    try:
+        if args.import_text:
+            result = import_text_logs(conn)
+            print(f"Imported {result['rows']} rows from {result['files']} files "
+                  f"({result['skipped_files']} already imported)", file=sys.stderr)
+        if args.refresh:
+            print(f"Rebuilt {refresh_rollups(conn)} rollup rows", file=sys.stderr)
+        data = report(conn, args.group_by, args.start, args.end)
+    finally:
+        conn.close()
+
+    if args.json:
+        print(json.dumps(data, indent=2))
+        return
+
+    print(f"LLM costs by {data['group_by']} from {data['start']} to {data['end']}")
+    header = f"{data['group_by']:<24} {'calls':>7} {'in tok':>10} {'cached':>9} {'out tok':>9} " \
+             f"{'cost $':>10} {'saved $':>9} {'tok p50':>8} {'tok p95':>8} {'lat p50':>8} {'lat p95':>8}"
+    print(header)
+    print('-' * len(header))
+    for g in data['groups']:
+        print(f"{str(g[data['group_by']])[:24]:<24} {_fmt(g.get('calls'), '>7')} "
+              f"{_fmt(g.get('input_tokens'), '>10')} {_fmt(g.get('cached_tokens'), '>9')} "
+              f"{_fmt(g.get('output_tokens'), '>9')} {_fmt(g.get('total_cost'), '>10.4f')} "
+              f"{_fmt(g.get('cache_savings'), '>9.4f')} {_fmt(g.get('tokens_p50'), '>8')} "
+              f"{_fmt(g.get('tokens_p95'), '>8')} {_fmt(g.get('latency_p50_ms'), '>8.0f')} "
+              f"{_fmt(g.get('latency_p95_ms'), '>8.0f')}")
+    t = data['totals']
+    print('-' * len(header))
+    print(f"{'TOTAL':<24} {t['calls']:>7} {t['input_tokens']:>10} {t['cached_tokens']:>9} "
+          f"{t['output_tokens']:>9} {t['total_cost']:>10.4f} {t['cache_savings']:>9.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+# import_boards.py
+"""
+Bulk-import boards (e.g. from workshops) for a user from JSON, NDJSON or CSV files.
+The format is taken from the file extension unless --format is given; '-' reads stdin.
+Usage:
+    python scripts/import_boards.py <username> FILE [FILE ...] [--format json|ndjson|csv]
+                                    [--json-store] [--chunk N] [--verbose]
+"""
+import argparse
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk-import boards for a user')
+    parser.add_argument('username', help='owner of the imported boards')
+    parser.add_argument('files', nargs='+', help="JSON, NDJSON or CSV files ('-' for stdin)")
+    parser.add_argument('--format', choices=('json', 'ndjson', 'csv'), help='override the detected format')
+    parser.add_argument('--json-store', action='store_true', help='import into the JSON board store instead')
+    parser.add_argument('--chunk', type=int, help='boards per transaction (default: IMPORT_CHUNK_BOARDS)')
+    parser.add_argument('--verbose', action='store_true', help='list every created board and skipped record')
+    args = parser.parse_args()
+
+    from app import app
+    from models import User
+    from board_import import READERS, detect_format, import_boards, import_json_store, IMPORT_CHUNK_BOARDS
+
+    started = time.time()
+    failed = False
+    with app.app_context():
+        user = User.query.filter_by(username=args.username).first()
+        if not user:
+            print(f"User '{args.username}' not found.")
+            sys.exit(1)
+        for path in args.files:
+            fmt = args.format or detect_format(path)
+            print(f"{path} ({fmt}):")
+            with (open(path, 'rb') if path != '-' else sys.stdin.buffer) as f:
+                records = READERS[fmt](f)
+                if args.json_store:
+                    events = import_json_store(records)
+                else:
+                    events = import_boards(records, user.id, chunk_boards=args.chunk or IMPORT_CHUNK_BOARDS)
+                for event in events:
+                    if args.verbose:
+                        for board in event.get('created', []):
+                            print(f"  + {board.get('title') or board['source_title']} "
+                                  f"(id={board['board_id']}, {board['thoughts']} thoughts)")
+                        for problem in event.get('problems', []):
+                            print(f"  ! {problem['where']}: {problem['error']}")
+                    if event['type'] == 'error':
+                        print(f"  error: {event['error']}")
+                        failed = True
+                    print(f"  {event['boards']} boards, {event['thoughts']} thoughts, {event['skipped']} skipped"
+                          + (' - done' if event['type'] == 'done' else ''))
+    print(f"Finished in {time.time() - started:.1f}s")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
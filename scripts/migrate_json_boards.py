@@ -0,0 +1,138 @@
+# migrate_json_boards.py
+"""
+Move JSON-store boards (boards_data/) into the database, in batches, while the app keeps
+running. Each batch is copied (board, thoughts, session events as meeting minutes) and
+committed while the JSON store is locked, then the boards are retired: their UUIDs keep
+working because the app resolves them to the new database ids (boards_data/migrated.json)
+and the old files move to boards_data/migrated/.
+JSON boards have no owner, so the new boards are assigned to the given user.
+Usage:
+    python scripts/migrate_json_boards.py <username> [--batch 50] [--pause 0.2] [--dry-run]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _timestamp(value):
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def _copy_board(board, user_id, allocate):
+    """Add one JSON board to the session; returns (Board, thoughts copied, thoughts skipped)."""
+    from models import db, Board, Thought, MeetingMinute
+    from board_import import normalize_quadrant
+    new_board = Board(title=allocate(board.get('name') or board.get('title') or 'Imported Board'), user_id=user_id)
+    db.session.add(new_board)
+    db.session.flush()
+    copied = skipped = 0
+    for t in board.get('thoughts', []):
+        quadrant = normalize_quadrant(t.get('quadrant'))
+        content = (t.get('content') or '').strip()
+        if not (quadrant and content):
+            skipped += 1
+            continue
+        db.session.add(Thought(content=content, quadrant=quadrant, board_id=new_board.id))
+        copied += 1
+    for e in board.get('events', []) or []:
+        minute = MeetingMinute(board_id=new_board.id, action=(e.get('action') or 'event')[:50], detail=e.get('detail') or '')
+        when = _timestamp(e.get('timestamp'))
+        if when:
+            minute.timestamp = when
+        db.session.add(minute)
+    return new_board, copied, skipped
+
+
+def _finish_pending():
+    # A previous run stopped between the database commit and retiring its batch
+    import board_store
+    from models import db, Board
+    pending = board_store.ALIASES + '.pending'
+    if not os.path.exists(pending):
+        return
+    with open(pending, 'r') as f:
+        mapping = json.load(f)
+    committed = {k: v for k, v in mapping.items() if db.session.get(Board, v) is not None}
+    if committed:
+        board_store.retire_boards(committed)
+        print(f"Finished retiring {len(committed)} boards from an interrupted run")
+    os.remove(pending)
+
+
+def migrate(user, batch_size, pause, dry_run):
+    import board_store
+    from models import db, Board
+    from board_import import unique_titles
+
+    _finish_pending()
+    existing = {title for (title,) in db.session.query(Board.title).filter(Board.user_id == user.id)}
+    allocate = unique_titles(existing)
+    ids = [b['id'] for b in board_store.list_boards()]
+    totals = {'boards': 0, 'thoughts': 0, 'skipped': 0}
+    pending = board_store.ALIASES + '.pending'
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        mapping = {}
+        # Writes to these boards wait while the batch is copied, so none can be lost
+        with board_store.locked():
+            try:
+                for board_id in batch:
+                    board = board_store.get_board(board_id)
+                    if board is None:
+                        continue
+                    new_board, copied, skipped = _copy_board(board, user.id, allocate)
+                    mapping[board_id] = new_board.id
+                    totals['thoughts'] += copied
+                    totals['skipped'] += skipped
+                if dry_run:
+                    db.session.rollback()
+                    totals['boards'] += len(mapping)
+                    continue
+                with open(pending, 'w') as f:
+                    json.dump(mapping, f)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                if os.path.exists(pending):
+                    os.remove(pending)
+                raise
+            board_store.retire_boards(mapping)
+            os.remove(pending)
+        totals['boards'] += len(mapping)
+        print(f"  {totals['boards']}/{len(ids)} boards, {totals['thoughts']} thoughts"
+              + (f", {totals['skipped']} invalid thoughts skipped" if totals['skipped'] else ''))
+        time.sleep(pause)
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Move JSON-store boards into the database')
+    parser.add_argument('username', help='owner of the migrated boards')
+    parser.add_argument('--batch', type=int, default=50, help='boards per transaction')
+    parser.add_argument('--pause', type=float, default=0.2, help='seconds between batches, to let the app write')
+    parser.add_argument('--dry-run', action='store_true', help='copy and roll back; nothing is changed')
+    args = parser.parse_args()
+
+    from app import app
+    from models import User
+
+    started = time.time()
+    with app.app_context():
+        user = User.query.filter_by(username=args.username).first()
+        if not user:
+            print(f"User '{args.username}' not found.")
+            sys.exit(1)
+        totals = migrate(user, max(1, args.batch), args.pause, args.dry_run)
+    print(f"{'Would migrate' if args.dry_run else 'Migrated'} {totals['boards']} boards "
+          f"({totals['thoughts']} thoughts) to '{args.username}' in {time.time() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+# search_reindex.py
+"""
+Rebuild the full-text search index (instance/search.db) from the database and the JSON
+board store. Needed once after enabling search, or after bulk changes made outside the ORM.
+Usage:
+    python scripts/search_reindex.py [--no-json]
+"""
+import argparse
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild the full-text search index')
+    parser.add_argument('--no-json', action='store_true', help='skip boards in the JSON store')
+    args = parser.parse_args()
+
+    from app import app
+    import board_store
+    from models import db
+    from search_index import search_index
+
+    started = time.time()
+    with app.app_context():
+        json_boards = []
+        if not args.no_json:
+            json_boards = (board_store.get_board(b['id']) for b in board_store.list_boards())
+        counts = search_index.rebuild(db.session, (b for b in json_boards if b))
+    print(', '.join(f'{kind}: {n}' for kind, n in counts.items()))
+    print(f'{search_index.count()} documents indexed in {time.time() - started:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,460 @@
+"""
+Full-Text Search Index
+SQLite FTS5 index over thoughts, meeting minutes, conversation turns and board titles
+(database and JSON-store boards), scoped per user. Committed changes are queued and
+written by a background thread, so the request's commit does not wait for the index
+"""
+
+import atexit
+import html
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from debug_logger import get_logger
+from models import Board, ConversationTurn, MeetingMinute, Thought
+
+SEARCH_ENABLED = os.environ.get('SEARCH_ENABLED', 'true').lower() == 'true'
+# Shared index file; every worker must point at the same file
+SEARCH_INDEX_PATH = os.environ.get('SEARCH_INDEX_PATH', os.path.join('instance', 'search.db'))
+# JSON-store boards have no owner; indexing them puts them in every user's results (opt-in)
+SEARCH_JSON_BOARDS = os.environ.get('SEARCH_JSON_BOARDS', 'false').lower() == 'true'
+SEARCH_MAX_LIMIT = int(os.environ.get('SEARCH_MAX_LIMIT', '50'))
+# SQLite page cache per connection
+SEARCH_CACHE_MB = int(os.environ.get('SEARCH_CACHE_MB', '64'))
+# Index writer: committed changes waiting (beyond this they are dropped until a reindex)
+# and the most index operations applied in one transaction
+SEARCH_QUEUE_SIZE = int(os.environ.get('SEARCH_QUEUE_SIZE', '10000'))
+SEARCH_BATCH_OPS = int(os.environ.get('SEARCH_BATCH_OPS', '2000'))
+
+KINDS = ('thought', 'minute', 'conversation', 'board')
+
+log = get_logger('search')
+
+# search_docs holds the metadata, search_fts the text plus board/kind tokens that filters match
+# inside FTS. Document ids are (scope << 32) + sequence, scope 0 for ownerless JSON boards and
+# user_id + 1 otherwise, so a user's documents form one rowid range that FTS5 scans on its own
+# (a user-scoped query does not walk other users' postings). The prefix indexes keep
+# search-as-you-type on short prefixes fast.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_docs (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    ref TEXT NOT NULL,
+    board_id TEXT NOT NULL,
+    user_id INTEGER,
+    label TEXT,
+    ts REAL,
+    UNIQUE (kind, ref)
+);
+CREATE INDEX IF NOT EXISTS ix_search_docs_board ON search_docs (board_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+    body, board, kind, tokenize = 'porter unicode61', prefix = '2 3'
+);
+"""
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+# Snippet match markers: control characters, so they pass html.escape untouched and never
+# collide with user text
+_MARK_OPEN, _MARK_CLOSE = '\x02', '\x03'
+
+_STOP = object()
+
+
+def _scope(user_id) -> int:
+    return 0 if user_id is None else int(user_id) + 1
+
+
+def _scope_range(scope: int) -> Tuple[int, int]:
+    return scope << 32, (scope << 32) + 0xFFFFFFFF
+
+
+def _board_token(board_id) -> str:
+    return 'b' + re.sub(r'\W', '', str(board_id))
+
+
+def match_expression(query: str, kinds: Optional[Iterable[str]] = None, board_id=None) -> Optional[str]:
+    """
+    FTS5 MATCH expression for a free-text query: every word required, the last one as a
+    prefix (search-as-you-type), restricted to the given kinds and board.
+    """
+    words = _WORD_RE.findall((query or '').lower())[:16]
+    if not words:
+        return None
+    terms = [f'"{w}"' for w in words[:-1]] + [f'"{words[-1]}"' + ('*' if len(words[-1]) > 1 else '')]
+    parts = [f"body : ({' AND '.join(terms)})"]
+    kinds = [k for k in (kinds or ()) if k in KINDS]
+    if kinds:
+        parts.append(f"kind : ({' OR '.join(kinds)})")
+    if board_id is not None:
+        parts.append(f'board : {_board_token(board_id)}')
+    return ' AND '.join(parts)
+
+
+def snippet_html(snippet: str) -> str:
+    """HTML-escaped snippet with matches wrapped in <mark>."""
+    return html.escape(snippet or '').replace(_MARK_OPEN, '<mark>').replace(_MARK_CLOSE, '</mark>')
+
+
+class SearchIndex:
+    """
+    FTS5-backed search over everything users write. Writes come from the SQLAlchemy
+    session hooks below (queued after commit), from board_store for JSON boards and from
+    bulk imports; a daemon thread applies the queue in order, each batch in one SQLite
+    transaction. Results may trail a commit by the time the writer takes.
+    """
+
+    def __init__(self, path: str = SEARCH_INDEX_PATH, enabled: bool = SEARCH_ENABLED,
+                 maxsize: int = SEARCH_QUEUE_SIZE, batch_ops: int = SEARCH_BATCH_OPS):
+        self.path = path
+        self.enabled = enabled
+        self.batch_ops = batch_ops
+        self.written = 0
+        self.dropped = 0
+        self._local = threading.local()
+        self._board_owners: Dict[str, Optional[int]] = {}
+        self._queue: "queue.Queue" = queue.Queue(maxsize=maxsize)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            # FTS segment merges and bm25 ranking touch many pages; keep them in memory
+            conn.execute(f'PRAGMA cache_size=-{SEARCH_CACHE_MB * 1024}')
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    # --- writes ---
+
+    def _delete(self, conn, where: str, params: tuple):
+        ids = [row[0] for row in conn.execute(f'SELECT id FROM search_docs WHERE {where}', params)]
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            marks = ','.join('?' * len(chunk))
+            conn.execute(f'DELETE FROM search_fts WHERE rowid IN ({marks})', chunk)
+            conn.execute(f'DELETE FROM search_docs WHERE id IN ({marks})', chunk)
+
+    def _next_id(self, conn, scope: int) -> int:
+        low, high = _scope_range(scope)
+        last = conn.execute('SELECT MAX(id) FROM search_docs WHERE id BETWEEN ? AND ?', (low, high)).fetchone()[0]
+        return (last or low) + 1
+
+    def _upsert(self, conn, kind: str, ref, board_id, user_id, body: str, label: Optional[str] = None,
+                ts: Optional[float] = None):
+        ref, board_id, scope = str(ref), str(board_id), _scope(user_id)
+        row = conn.execute('SELECT id FROM search_docs WHERE kind = ? AND ref = ?', (kind, ref)).fetchone()
+        if row:
+            conn.execute('DELETE FROM search_fts WHERE rowid = ?', (row[0],))
+            conn.execute('DELETE FROM search_docs WHERE id = ?', (row[0],))
+        # Same id while the owner is unchanged, a new id in the new owner's range otherwise
+        doc_id = row[0] if row and row[0] >> 32 == scope else self._next_id(conn, scope)
+        conn.execute('INSERT INTO search_docs (id, kind, ref, board_id, user_id, label, ts) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                     (doc_id, kind, ref, board_id, user_id, label, ts))
+        conn.execute('INSERT INTO search_fts (rowid, body, board, kind) VALUES (?, ?, ?, ?)',
+                     (doc_id, body or '', _board_token(board_id), kind))
+
+    def apply(self, ops: List[tuple]):
+        """Apply queued index operations in one transaction; failures are logged, not raised."""
+        if not self.enabled or not ops:
+            return
+        try:
+            conn = self._connect()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                for op in ops:
+                    if op[0] == 'upsert':
+                        self._upsert(conn, *op[1:])
+                    elif op[0] == 'delete':
+                        self._delete(conn, 'kind = ? AND ref = ?', (op[1], str(op[2])))
+                    elif op[0] == 'drop_board':
+                        self._delete(conn, 'board_id = ?', (str(op[1]),))
+                    elif op[0] == 'rescope_board':
+                        self._rescope(conn, str(op[1]), op[2])
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        except Exception as e:
+            log.error("Could not apply %d search index updates: %s", len(ops), e)
+
+    def enqueue(self, ops: List[tuple]):
+        """Queue index operations for the writer thread; never blocks the caller."""
+        if not self.enabled or not ops:
+            return
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(ops)
+        except queue.Full:
+            self.dropped += len(ops)
+            log.warning("Search index queue full, dropped %d updates (rebuild with scripts/search_reindex.py)",
+                        len(ops))
+
+    def _ensure_writer(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='search-index-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = list(item)
+            stop = False
+            # Whatever else is already waiting joins the same transaction
+            while len(batch) < self.batch_ops:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.extend(item)
+            self.apply(batch)
+            self.written += len(batch)
+            if stop:
+                return
+
+    def close(self, timeout: float = 5.0):
+        """Apply queued updates and stop the writer thread."""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        thread.join(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        return {'queued': self._queue.qsize(), 'written': self.written, 'dropped': self.dropped}
+
+    def _rescope(self, conn, board_id: str, user_id):
+        rows = conn.execute(
+            'SELECT d.kind, d.ref, d.label, d.ts, f.body FROM search_docs d JOIN search_fts f ON f.rowid = d.id '
+            'WHERE d.board_id = ?', (board_id,)).fetchall()
+        for kind, ref, label, ts, body in rows:
+            self._upsert(conn, kind, ref, board_id, user_id, body, label, ts)
+
+    @staticmethod
+    def _json_board_ops(board: dict) -> List[tuple]:
+        board_id = board['id']
+        ops = [('drop_board', board_id),
+               ('upsert', 'board', board_id, board_id, None, board.get('name') or '', None, None)]
+        for i, t in enumerate(board.get('thoughts') or []):
+            ops.append(('upsert', 'thought', f"{board_id}:{t.get('id') or i}", board_id, None,
+                        t.get('content') or '', t.get('quadrant'), None))
+        return ops
+
+    def index_json_board(self, board: dict):
+        """Replace every document of a JSON-store board (called by board_store on each write)."""
+        if not SEARCH_JSON_BOARDS or not board or not board.get('id'):
+            return
+        self.enqueue(self._json_board_ops(board))
+
+    def remove_board(self, board_id):
+        self.enqueue([('drop_board', board_id)])
+
+    # --- reads ---
+
+    def search(self, query: str, user_id, kinds: Optional[Iterable[str]] = None, board_id=None,
+               limit: int = 20, offset: int = 0, include_shared: bool = SEARCH_JSON_BOARDS) -> dict:
+        """
+        Ranked results for one user: [{'kind', 'ref', 'board_id', 'label', 'timestamp',
+        'snippet', 'score'}] best first, plus the offset of the next page (None at the end).
+        """
+        limit = max(1, min(int(limit), SEARCH_MAX_LIMIT))
+        offset = max(0, int(offset))
+        expression = match_expression(query, kinds, board_id)
+        if not self.enabled or expression is None:
+            return {'results': [], 'next_cursor': None}
+        started = time.perf_counter()
+        conn = self._connect()
+        scopes = [_scope(user_id)]
+        if include_shared and user_id is not None and self._has_scope(conn, 0):
+            scopes.append(0)
+        ranked = []
+        # Rank inside each scope's rowid range (bm25 scores are comparable across ranges);
+        # snippets are then built for the page only, not for every match
+        for scope in scopes:
+            ranked.extend(conn.execute(
+                "SELECT rowid, bm25(search_fts, 1.0, 0.0, 0.0) AS score FROM search_fts "
+                "WHERE search_fts MATCH ? AND rowid BETWEEN ? AND ? ORDER BY score LIMIT ?",
+                (expression, *_scope_range(scope), offset + limit + 1)).fetchall())
+        ranked.sort(key=lambda r: r[1])
+        ranked = ranked[offset:offset + limit + 1]
+        page = dict(ranked[:limit])
+        rows = {}
+        if page:
+            marks = ','.join('?' * len(page))
+            rows = {row[0]: row[1:] for row in conn.execute(
+                f"SELECT d.id, d.kind, d.ref, d.board_id, d.label, d.ts, snippet(search_fts, 0, ?, ?, '…', 12) "
+                f"FROM search_fts JOIN search_docs d ON d.id = search_fts.rowid "
+                f"WHERE search_fts MATCH ? AND search_fts.rowid IN ({marks})",
+                (_MARK_OPEN, _MARK_CLOSE, expression, *page))}
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        log.debug("search %r for user %s: %d results in %.1fms", query, user_id, len(page), elapsed_ms)
+        results = [{
+            'kind': kind,
+            'ref': ref,
+            'board_id': board,
+            'label': label,
+            'timestamp': ts,
+            'snippet': snippet_html(snippet),
+            'score': round(-page[doc_id], 4),
+        } for doc_id, (kind, ref, board, label, ts, snippet) in ((i, rows[i]) for i in page if i in rows)]
+        return {'results': results, 'next_cursor': offset + limit if len(ranked) > limit else None,
+                'took_ms': round(elapsed_ms, 1)}
+
+    def _has_scope(self, conn, scope: int) -> bool:
+        low, high = _scope_range(scope)
+        return conn.execute('SELECT 1 FROM search_docs WHERE id BETWEEN ? AND ? LIMIT 1', (low, high)).fetchone() is not None
+
+    def count(self) -> int:
+        return self._connect().execute('SELECT COUNT(*) FROM search_docs').fetchone()[0]
+
+    # --- rebuild ---
+
+    def rebuild(self, session, json_boards: Iterable[dict] = (), batch_size: int = 5000) -> Dict[str, int]:
+        """Reindex everything from the database and the JSON store (scripts/search_reindex.py)."""
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        conn.execute('DELETE FROM search_fts')
+        conn.execute('DELETE FROM search_docs')
+        conn.execute('COMMIT')
+        owners = dict(session.execute(select(Board.id, Board.user_id)).all())
+        counts = {}
+        sources = (
+            ('board', select(Board.id, Board.id, Board.title, Board.user_id, Board.created_at)),
+            ('thought', select(Thought.id, Thought.board_id, Thought.content, Thought.quadrant)),
+            ('minute', select(MeetingMinute.id, MeetingMinute.board_id, MeetingMinute.detail,
+                              MeetingMinute.action, MeetingMinute.timestamp)),
+            ('conversation', select(ConversationTurn.id, ConversationTurn.board_id, ConversationTurn.content,
+                                    ConversationTurn.role, ConversationTurn.timestamp)),
+        )
+        for kind, stmt in sources:
+            ops, counts[kind] = [], 0
+            for row in session.execute(stmt.execution_options(yield_per=batch_size)):
+                ops.append(_row_op(kind, row, owners))
+                if len(ops) >= batch_size:
+                    self.apply(ops)
+                    counts[kind] += len(ops)
+                    ops = []
+            self.apply(ops)
+            counts[kind] += len(ops)
+        counts['json_boards'] = 0
+        for board in json_boards if SEARCH_JSON_BOARDS else ():
+            if board.get('id'):
+                self.apply(self._json_board_ops(board))
+                counts['json_boards'] += 1
+        conn.execute("INSERT INTO search_fts (search_fts) VALUES ('optimize')")
+        self._board_owners.clear()
+        return counts
+
+    def board_owner(self, session, board_id) -> Optional[int]:
+        """Owner of a database board (cached; kept current by the Board hooks)."""
+        key = str(board_id)
+        if key not in self._board_owners:
+            row = session.connection().execute(select(Board.user_id).where(Board.id == board_id)).first()
+            if len(self._board_owners) > 10000:
+                self._board_owners.clear()
+            self._board_owners[key] = row[0] if row else None
+        return self._board_owners[key]
+
+
+def _ts(value) -> Optional[float]:
+    return value.timestamp() if value is not None and hasattr(value, 'timestamp') else None
+
+
+def _row_op(kind: str, row, owners: Dict) -> tuple:
+    if kind == 'board':
+        board_id, _, title, user_id, created = row
+        return ('upsert', 'board', board_id, board_id, user_id, title, None, _ts(created))
+    if kind == 'thought':
+        ref, board_id, body, label = row
+        ts = None
+    else:
+        ref, board_id, body, label, when = row
+        ts = _ts(when)
+    return ('upsert', kind, ref, board_id, owners.get(board_id), body, label, ts)
+
+
+# Global search index instance
+search_index = SearchIndex()
+
+
+# --- Keep the index in sync with the ORM (queued after commit, dropped on rollback) ---
+
+_KIND_OF = {Thought: 'thought', MeetingMinute: 'minute', ConversationTurn: 'conversation'}
+
+
+def _doc_op(session, obj) -> tuple:
+    kind = _KIND_OF[type(obj)]
+    owner = search_index.board_owner(session, obj.board_id)
+    if kind == 'thought':
+        return ('upsert', kind, obj.id, obj.board_id, owner, obj.content, obj.quadrant, None)
+    if kind == 'minute':
+        return ('upsert', kind, obj.id, obj.board_id, owner, obj.detail, obj.action, _ts(obj.timestamp))
+    return ('upsert', kind, obj.id, obj.board_id, owner, obj.content, obj.role, _ts(obj.timestamp))
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_search_changes(session, flush_context):
+    if not search_index.enabled:
+        return
+    ops = session.info.setdefault('search_index_ops', [])
+    for obj in session.new:
+        if isinstance(obj, Board):
+            search_index._board_owners[str(obj.id)] = obj.user_id
+            ops.append(('upsert', 'board', obj.id, obj.id, obj.user_id, obj.title, None, _ts(obj.created_at)))
+        elif type(obj) in _KIND_OF:
+            ops.append(_doc_op(session, obj))
+    for obj in session.dirty:
+        if not session.is_modified(obj):
+            continue
+        if isinstance(obj, Board):
+            if inspect(obj).attrs.user_id.history.has_changes():
+                ops.append(('rescope_board', obj.id, obj.user_id))
+            search_index._board_owners[str(obj.id)] = obj.user_id
+            ops.append(('upsert', 'board', obj.id, obj.id, obj.user_id, obj.title, None, _ts(obj.created_at)))
+        elif type(obj) in _KIND_OF:
+            ops.append(_doc_op(session, obj))
+    for obj in session.deleted:
+        if isinstance(obj, Board):
+            # Its rows go with it through ON DELETE CASCADE
+            search_index._board_owners.pop(str(obj.id), None)
+            ops.append(('drop_board', obj.id))
+        elif type(obj) in _KIND_OF:
+            ops.append(('delete', _KIND_OF[type(obj)], obj.id))
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_search_changes(session):
+    ops = session.info.pop('search_index_ops', None)
+    if ops:
+        search_index.enqueue(ops)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_search_changes(session):
+    session.info.pop('search_index_ops', None)
@@ -0,0 +1,309 @@
+"""
+Semantic Cache for Facilitator Questions
+Answers to generic facilitator questions ("what is a goal?", "what should I do next?")
+cached under an embedding of the normalized question and a coarse board-state class, so
+near-identical questions asked on other boards skip the LLM
+"""
+
+import hashlib
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from debug_logger import get_logger
+
+# Off by default; answers are only reused for questions that pass the exclusion rules below
+SEMANTIC_CACHE_ENABLED = os.environ.get('SEMANTIC_CACHE_ENABLED', 'false').lower() == 'true'
+# Cosine similarity needed to reuse an answer
+SEMANTIC_CACHE_THRESHOLD = float(os.environ.get('SEMANTIC_CACHE_THRESHOLD', '0.85'))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.environ.get('SEMANTIC_CACHE_MAX_ENTRIES', '2000'))
+SEMANTIC_CACHE_TTL_SECONDS = int(os.environ.get('SEMANTIC_CACHE_TTL_SECONDS', str(7 * 24 * 3600)))
+# Longer questions are nearly always about the user's own situation and are never cached
+SEMANTIC_CACHE_MAX_WORDS = int(os.environ.get('SEMANTIC_CACHE_MAX_WORDS', '16'))
+# Optional sentence-transformers model (e.g. all-MiniLM-L6-v2, run on CPU); empty or not
+# installed = built-in hashed n-gram embeddings
+SEMANTIC_CACHE_MODEL = os.environ.get('SEMANTIC_CACHE_MODEL', '')
+
+log = get_logger('semantic_cache')
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+FUNCTION_WORDS = frozenset("""
+a an and are as at be been being but by can could did do does doing for from had has have how i
+if in into is just me more most of on or should so some such than that the then there to up
+very was we were what when where which while who why will with would you your yours about
+again also any anything each else get give go good help know like make much need next now one
+ok okay please really see start still tell thanks thank want way well work
+""".split())
+
+# Words that carry no board content: function words plus the GAPS vocabulary itself
+STOPWORDS = FUNCTION_WORDS | frozenset("""
+gaps goal goals status statuses analysis analyses plan plans quadrant quadrants board process
+step steps model method facilitator facilitate overview explain example examples define definition
+mean meaning difference between first
+""".split())
+
+# Words that point at the user's own board or earlier turns: such questions are never cached
+REFERENTIAL = frozenset("""
+my our mine ours this these those current currently above it its they them their here
+""".split())
+
+
+def normalize_question(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    return ' '.join(_WORD_RE.findall((text or '').lower()))
+
+
+def board_state_class(quadrants: Optional[Dict[str, List[str]]], has_history: bool = False) -> str:
+    """
+    Coarse, content-free board state: which quadrants hold items plus whether a
+    conversation is under way (e.g. 'g1s0a0p1:ongoing').
+    """
+    quadrants = quadrants or {}
+    flags = ''.join(f"{q[0]}{1 if quadrants.get(q) else 0}" for q in ('goal', 'status', 'analysis', 'plan'))
+    return f"{flags}:{'ongoing' if has_history else 'new'}"
+
+
+def _content_tokens(text: str) -> set:
+    return {t for t in _WORD_RE.findall((text or '').lower()) if len(t) > 2 and t not in STOPWORDS}
+
+
+def board_vocabulary(quadrants: Optional[Dict[str, List[str]]]) -> set:
+    """Content words used anywhere on the board."""
+    vocab = set()
+    for items in (quadrants or {}).values():
+        for item in items or []:
+            vocab |= _content_tokens(item)
+    return vocab
+
+
+class HashingEmbedder:
+    """
+    Dependency-free sentence embedding: signed feature hashing of word unigrams, word
+    bigrams and character trigrams, L2-normalized. Returned as a sparse {dim: weight} dict.
+    """
+
+    def __init__(self, dims: int = 1 << 18):
+        self.dims = dims
+
+    def _features(self, text: str) -> Iterable[Tuple[str, float]]:
+        words = text.split()
+        for w in words:
+            # Function words barely change what a question asks; GAPS terms ("goal" vs "plan") do
+            scale = 0.25 if w in FUNCTION_WORDS else 1.0
+            yield 'w:' + w, 2.0 * scale
+            padded = f' {w} '
+            for i in range(len(padded) - 2):
+                yield 'c:' + padded[i:i + 3], 0.5 * scale
+        for a, b in zip(words, words[1:]):
+            yield f'b:{a} {b}', 0.5
+
+    def embed(self, text: str) -> Dict[int, float]:
+        vec: Dict[int, float] = {}
+        weights: Dict[str, float] = {}
+        for feature, weight in self._features(text):
+            weights[feature] = weights.get(feature, 0.0) + weight
+        for feature, weight in weights.items():
+            digest = hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest()
+            h = int.from_bytes(digest, 'little')
+            dim = h % self.dims
+            vec[dim] = vec.get(dim, 0.0) + (weight if (h >> 63) & 1 else -weight)
+        norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+        return {d: v / norm for d, v in vec.items() if v}
+
+
+class SentenceTransformerEmbedder:
+    """Dense embeddings from a local sentence-transformers model on CPU (optional dependency)."""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device='cpu')
+
+    def embed(self, text: str):
+        return self.model.encode(text, normalize_embeddings=True)
+
+
+def _make_embedder(model_name: str = SEMANTIC_CACHE_MODEL):
+    if model_name:
+        try:
+            return SentenceTransformerEmbedder(model_name)
+        except Exception as e:
+            log.warning("sentence-transformers model %s unavailable (%s); using hashed n-gram embeddings",
+                        model_name, e)
+    return HashingEmbedder()
+
+
+class SemanticCache:
+    """
+    Bounded LRU cache of facilitator answers.
+
+    Entries are partitioned by board-state class and matched on the normalized question:
+    exact text first, then the nearest embedding above `threshold`. Sparse (hashed)
+    vectors are searched through an inverted index of their dimensions; dense vectors
+    with a dot product. A question is skipped, and an answer is never stored, when it
+    could carry board-specific content: referential words ("my", "this"), quotes,
+    digits, more than `max_words` words, words that also occur on the board, or (for
+    answers) quadrant suggestions or board words not in the question.
+    """
+
+    def __init__(self, enabled: bool = SEMANTIC_CACHE_ENABLED, threshold: float = SEMANTIC_CACHE_THRESHOLD,
+                 max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES, ttl: int = SEMANTIC_CACHE_TTL_SECONDS,
+                 max_words: int = SEMANTIC_CACHE_MAX_WORDS, embedder=None):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_words = max_words
+        self._embedder = embedder
+        self._entries: "OrderedDict[int, dict]" = OrderedDict()
+        self._exact: Dict[Tuple[str, str], int] = {}
+        self._postings: Dict[Tuple[str, int], set] = {}
+        self._ids = 0
+        self._lock = threading.Lock()
+        self.metrics: Counter = Counter()
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            self._embedder = _make_embedder()
+        return self._embedder
+
+    def _exclusion(self, question: str, normalized: str, vocab: set) -> Optional[str]:
+        words = normalized.split()
+        if not words:
+            return 'empty'
+        if len(words) > self.max_words:
+            return 'too_long'
+        if any(ch in question for ch in '"“”') or re.search(r'\d', question):
+            return 'literal_content'
+        if REFERENTIAL.intersection(words):
+            return 'refers_to_board'
+        if _content_tokens(normalized) & vocab:
+            return 'board_content'
+        return None
+
+    def _similarity(self, a, b) -> float:
+        if isinstance(a, dict):
+            if len(a) > len(b):
+                a, b = b, a
+            return sum(v * b.get(d, 0.0) for d, v in a.items())
+        return float((a * b).sum())
+
+    def lookup(self, question: str, quadrants: Optional[Dict[str, List[str]]], has_history: bool = False) -> Optional[dict]:
+        """Cached answer for the question on a board in this state, or None."""
+        if not self.enabled:
+            return None
+        self.metrics['lookups'] += 1
+        normalized = normalize_question(question)
+        reason = self._exclusion(question, normalized, board_vocabulary(quadrants))
+        if reason:
+            self.metrics[f'skipped_{reason}'] += 1
+            return None
+        state = board_state_class(quadrants, has_history)
+        now = time.time()
+        with self._lock:
+            entry_id = self._exact.get((state, normalized))
+        best, best_score = None, 0.0
+        if entry_id is not None:
+            best, best_score = self._entries.get(entry_id), 1.0
+        else:
+            vec = self.embedder.embed(normalized)
+            with self._lock:
+                if isinstance(vec, dict):
+                    candidates = set()
+                    for dim in vec:
+                        candidates |= self._postings.get((state, dim), set())
+                else:
+                    candidates = [i for i, e in self._entries.items() if e['state'] == state]
+                for i in candidates:
+                    entry = self._entries.get(i)
+                    if entry is None:
+                        continue
+                    score = self._similarity(vec, entry['vector'])
+                    if score > best_score:
+                        best, best_score = entry, score
+        if best is None or best_score < self.threshold or now - best['created'] > self.ttl:
+            self.metrics['misses'] += 1
+            return None
+        with self._lock:
+            if best['id'] in self._entries:
+                self._entries.move_to_end(best['id'])
+            best['hits'] += 1
+        self.metrics['hits'] += 1
+        return {'answer': best['answer'], 'similarity': round(best_score, 4), 'question': best['question']}
+
+    def store(self, question: str, quadrants: Optional[Dict[str, List[str]]], answer: str,
+              suggestions: Optional[list] = None, has_history: bool = False) -> bool:
+        """Cache an LLM answer if neither the question nor the answer is board-specific."""
+        if not self.enabled:
+            return False
+        normalized = normalize_question(question)
+        vocab = board_vocabulary(quadrants)
+        reason = self._exclusion(question, normalized, vocab)
+        if not reason:
+            if suggestions:
+                reason = 'has_suggestions'
+            elif not answer or not answer.strip() or 'add_to_quadrant' in answer:
+                reason = 'empty_or_structured_answer'
+            elif (_content_tokens(answer) - _content_tokens(normalized)) & vocab:
+                reason = 'answer_mentions_board'
+        if reason:
+            self.metrics[f'rejected_{reason}'] += 1
+            return False
+        state = board_state_class(quadrants, has_history)
+        vec = self.embedder.embed(normalized)
+        with self._lock:
+            old = self._exact.pop((state, normalized), None)
+            if old is not None:
+                self._remove(old)
+            self._ids += 1
+            entry = {'id': self._ids, 'state': state, 'question': normalized, 'answer': answer.strip(),
+                     'vector': vec, 'created': time.time(), 'hits': 0}
+            self._entries[entry['id']] = entry
+            self._exact[(state, normalized)] = entry['id']
+            if isinstance(vec, dict):
+                for dim in vec:
+                    self._postings.setdefault((state, dim), set()).add(entry['id'])
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._exact.pop((self._entries[oldest]['state'], self._entries[oldest]['question']), None)
+                self._remove(oldest)
+                self.metrics['evictions'] += 1
+        self.metrics['stores'] += 1
+        return True
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id, None)
+        if entry and isinstance(entry['vector'], dict):
+            for dim in entry['vector']:
+                ids = self._postings.get((entry['state'], dim))
+                if ids is not None:
+                    ids.discard(entry_id)
+                    if not ids:
+                        del self._postings[(entry['state'], dim)]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._exact.clear()
+            self._postings.clear()
+        self.metrics.clear()
+
+    def stats(self) -> dict:
+        lookups = self.metrics.get('lookups', 0)
+        return {
+            'enabled': self.enabled,
+            'entries': len(self._entries),
+            'threshold': self.threshold,
+            'embedder': type(self._embedder).__name__ if self._embedder is not None else None,
+            'hit_rate': round(self.metrics.get('hits', 0) / lookups, 4) if lookups else 0.0,
+            **dict(self.metrics),
+        }
+
+
+# Global semantic cache instance
+semantic_cache = SemanticCache()
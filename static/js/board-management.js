@@ -274,43 +274,8 @@ async function handleOpenBoard(e) {
             boardList.innerHTML = '<div style="padding:1em; color:#888;">Loading boards...</div>';
             
             try {
-                const data = await getJSON('/list_boards');
-                dlog('[DEBUG] /list_boards response:', data);
-                
-                if (data && Array.isArray(data.boards) && data.boards.length > 0) {
-                    let boardsHtml = '';
-                    data.boards.forEach(board => {
-                        const isActive = board.id == window.boardId ? ' (current)' : '';
-                        
-                        // Handle date formatting safely
-                        let dateStr = 'Unknown';
-                        if (board.created_at) {
-                            try {
-                                const date = new Date(board.created_at);
-                                if (!isNaN(date.getTime())) {
-                                    dateStr = date.toLocaleDateString();
-                                }
-                            } catch (e) {
-                                dwarn('Invalid date for board:', board.created_at);
-                            }
-                        }
-                        
-                        boardsHtml += `
-                            <div class="board-item" data-board-id="${board.id}" style="padding:0.5em; border:1px solid #ddd; margin:0.3em 0; cursor:pointer; border-radius:4px;">
-                                <strong>${board.name}</strong>${isActive}
-                                <div style="font-size:0.9em; color:#666;">Created: ${dateStr}</div>
-                            </div>`;
-                    });
-                    boardList.innerHTML = boardsHtml;
-                    
-                    // Add click handlers for board items
-                    boardList.querySelectorAll('.board-item').forEach(item => {
-                        item.addEventListener('click', function() {
-                            const boardId = this.getAttribute('data-board-id');
-                            selectBoard(boardId);
-                        });
-                    });
-                } else {
+                const data = await loadBoardPage(boardList, null);
+                if (!data || !Array.isArray(data.boards) || data.boards.length === 0) {
                     boardList.innerHTML = '<div style="padding:1em; color:#888;">No boards found. Create a new board to get started.</div>';
                 }
             } catch (error) {
@@ -324,6 +289,79 @@ async function handleOpenBoard(e) {
     }
 }
 
+/**
+ * Fetch one page of /list_boards into the board list. The first page (cursor null)
+ * replaces the list; when there are more boards a "Load more" row is appended that
+ * fetches the next page when it scrolls into view or is clicked.
+ */
+async function loadBoardPage(boardList, cursor) {
+    const url = cursor ? `/list_boards?cursor=${encodeURIComponent(cursor)}` : '/list_boards';
+    const data = await getJSON(url);
+    dlog('[DEBUG] /list_boards response:', data);
+    if (!cursor) {
+        boardList.innerHTML = '';
+    }
+    (data && Array.isArray(data.boards) ? data.boards : []).forEach(board => {
+        const isActive = board.id == window.boardId ? ' (current)' : '';
+
+        // Handle date formatting safely
+        let dateStr = 'Unknown';
+        if (board.created_at) {
+            try {
+                const date = new Date(board.created_at);
+                if (!isNaN(date.getTime())) {
+                    dateStr = date.toLocaleDateString();
+                }
+            } catch (e) {
+                dwarn('Invalid date for board:', board.created_at);
+            }
+        }
+
+        const item = document.createElement('div');
+        item.className = 'board-item';
+        item.setAttribute('data-board-id', board.id);
+        item.style.cssText = 'padding:0.5em; border:1px solid #ddd; margin:0.3em 0; cursor:pointer; border-radius:4px;';
+        item.innerHTML = `
+                <strong>${board.name}</strong>${isActive}
+                <div style="font-size:0.9em; color:#666;">Created: ${dateStr}</div>`;
+        item.addEventListener('click', function() {
+            selectBoard(this.getAttribute('data-board-id'));
+        });
+        boardList.appendChild(item);
+    });
+
+    if (data && data.next_cursor) {
+        const more = document.createElement('div');
+        more.className = 'board-list-more';
+        more.style.cssText = 'padding:0.5em; color:#666; text-align:center; cursor:pointer;';
+        more.textContent = 'Load more boards...';
+        let loading = false;
+        const loadMore = async () => {
+            if (loading) return;
+            loading = true;
+            more.textContent = 'Loading...';
+            if (observer) observer.disconnect();
+            try {
+                await loadBoardPage(boardList, data.next_cursor);
+                more.remove();
+            } catch (error) {
+                derror('[ERROR] Failed to load more boards:', error);
+                more.textContent = 'Failed to load more boards. Click to retry.';
+                loading = false;
+            }
+        };
+        const observer = ('IntersectionObserver' in window)
+            ? new IntersectionObserver(entries => {
+                if (entries.some(entry => entry.isIntersecting)) loadMore();
+            }, { root: boardList })
+            : null;
+        more.addEventListener('click', loadMore);
+        boardList.appendChild(more);
+        if (observer) observer.observe(more);
+    }
+    return data;
+}
+
 /**
  * Handle creating a new board
  */
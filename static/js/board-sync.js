@@ -0,0 +1,137 @@
+/* GAPS Facilitator - Real-time Board Sync Module */
+
+// Applies the board's change events (pushed by /boards/<id>/events over Server-Sent
+// Events) to the quadrants in place, so edits from other people in the workshop show
+// up without polling or reloading. Events may echo this client's own edits; applying
+// them is idempotent.
+
+let boardEventSource = null;
+let lastBoardEventId = 0;
+
+/**
+ * Remember the newest board revision seen (from page load, write replies and events);
+ * edits send it back and get a 409 if the board has changed since
+ */
+function trackBoardRevision(revision) {
+    if (typeof revision !== 'number') return;
+    if (window.boardRevision == null || revision > window.boardRevision) {
+        window.boardRevision = revision;
+    }
+}
+
+/**
+ * Handle a 409 from an edit based on an old revision: show the current board
+ */
+function handleRevisionConflict(error) {
+    const data = (error && error.data) || error || {};
+    if (!data.conflict) return false;
+    showNotification('Someone else changed this board - reloading it...', true);
+    setTimeout(() => location.reload(), 1500);
+    return true;
+}
+
+/**
+ * True while the push channel is open (edits made elsewhere will arrive by themselves)
+ */
+function boardSyncActive() {
+    return !!boardEventSource && boardEventSource.readyState === EventSource.OPEN;
+}
+
+/**
+ * Open the event stream of the current board
+ */
+function initializeBoardSync() {
+    const boardId = getCurrentBoardId();
+    if (!boardId || typeof EventSource === 'undefined') {
+        dlog('[SYNC] Board sync not available');
+        return;
+    }
+    if (boardEventSource) boardEventSource.close();
+
+    // The browser reconnects on its own and sends Last-Event-ID to resume
+    boardEventSource = new EventSource(`/boards/${encodeURIComponent(boardId)}/events`);
+
+    const handlers = {
+        thought_added: applyThoughtAdded,
+        thought_moved: applyThoughtMoved,
+        thought_updated: applyThoughtUpdated,
+        thought_deleted: applyThoughtDeleted,
+        board_renamed: applyBoardRenamed,
+        board_deleted: applyBoardDeleted,
+        resync: () => location.reload()
+    };
+    Object.entries(handlers).forEach(([type, handler]) => {
+        boardEventSource.addEventListener(type, function (e) {
+            const id = parseInt(e.lastEventId, 10);
+            // Replayed events after a reconnect may repeat ones already applied
+            if (id && id <= lastBoardEventId) return;
+            if (id) lastBoardEventId = id;
+            let data;
+            try {
+                data = JSON.parse(e.data);
+            } catch (_) {
+                return;
+            }
+            dlog('[SYNC]', type, data);
+            handler(data);
+            trackBoardRevision(data.revision);
+            if (type.startsWith('thought_') && window.debouncedSummaryRefresh) {
+                window.debouncedSummaryRefresh();
+            }
+        });
+    });
+}
+
+function findThoughtElement(thoughtId) {
+    return document.querySelector(`[data-thought-id="${CSS.escape(String(thoughtId))}"]`);
+}
+
+function applyThoughtAdded(data) {
+    const thought = data.thought;
+    if (findThoughtElement(thought.id)) return;
+    addThoughtToDOM(thought.quadrant, thought.content, thought.id);
+}
+
+function applyThoughtMoved(data) {
+    const thought = data.thought;
+    const element = findThoughtElement(thought.id);
+    if (!element) {
+        applyThoughtAdded(data);
+        return;
+    }
+    if (element.parentElement && element.parentElement.id === `${thought.quadrant}-list`) return;
+    updateThoughtLocationInDOM(thought.id, thought.quadrant);
+    element.setAttribute('data-quadrant', thought.quadrant);
+}
+
+function applyThoughtUpdated(data) {
+    const thought = data.thought;
+    const element = findThoughtElement(thought.id);
+    const content = element && element.querySelector('.thought-content');
+    if (content) {
+        content.textContent = thought.content;
+    } else if (!element) {
+        applyThoughtAdded(data);
+    }
+}
+
+function applyThoughtDeleted(data) {
+    const element = findThoughtElement(data.thought.id);
+    if (element) element.remove();
+}
+
+function applyBoardRenamed(data) {
+    const badge = document.getElementById('board-title-badge');
+    if (badge) badge.textContent = `📋 ${data.title}`;
+}
+
+function applyBoardDeleted() {
+    if (boardEventSource) boardEventSource.close();
+    showNotification('This board was deleted.', true);
+    setTimeout(() => { window.location.href = '/facilitator'; }, 1800);
+}
+
+// Initialize when DOM is loaded
+document.addEventListener('DOMContentLoaded', function() {
+    initializeBoardSync();
+});
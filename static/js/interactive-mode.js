@@ -430,7 +430,6 @@ function addSuggestionsToQuadrants(suggestions) {
         suggestions.add_to_quadrant.forEach(item => {
             if (item && typeof item === 'object' && item.quadrant && item.thought) {
                 dlog(`[DEBUG] Adding "${item.thought}" to ${item.quadrant} quadrant`);
-                updateQuadrantInBackground(item.quadrant, item.thought.trim());
                 addedItems.push({ quadrant: item.quadrant, thought: item.thought.trim() });
             } else {
                 dlog('[DEBUG] Invalid item structure:', item);
@@ -443,7 +442,6 @@ function addSuggestionsToQuadrants(suggestions) {
                 suggestions[quadrant].forEach(thought => {
                     if (thought && thought.trim()) {
                         dlog(`[DEBUG] Adding "${thought}" to ${quadrant} quadrant`);
-                        updateQuadrantInBackground(quadrant, thought.trim());
                         addedItems.push({ quadrant: quadrant, thought: thought.trim() });
                     }
                 });
@@ -451,6 +449,9 @@ function addSuggestionsToQuadrants(suggestions) {
         });
     }
     
+    // Save all suggestions in one batch request
+    addThoughtsInBatch(addedItems);
+    
     // Display added items in chat (one per line)
     if (addedItems.length > 0 && chat) {
         const itemsDiv = document.createElement('div');
@@ -876,38 +877,28 @@ async function executeBulkDelete() {
     let deletedCount = 0;
     let failedCount = 0;
     
-    // Delete each thought
-    for (const thoughtElement of allThoughts) {
-        const thoughtId = thoughtElement.getAttribute('data-thought-id');
-        console.log(`[DELETE DEBUG] Bulk deleting thought ID: ${thoughtId}`);
-        
+    // Delete the thoughts in batch requests (the server takes up to 200 operations each)
+    const elements = Array.from(allThoughts);
+    for (let start = 0; start < elements.length; start += 200) {
+        const chunk = elements.slice(start, start + 200);
         try {
-            const resp = await fetch('/delete_thought', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                    'X-CSRFToken': getCsrfToken()
-                },
-                body: JSON.stringify({ 
-                    thought_id: thoughtId,
-                    board_id: getCurrentBoardId()
-                })
+            const result = await applyThoughtBatch(chunk.map(el => ({
+                op: 'delete',
+                thought_id: el.getAttribute('data-thought-id')
+            })));
+            result.results.forEach(r => {
+                if (r.success) {
+                    // Remove from DOM immediately
+                    chunk[r.index].remove();
+                    deletedCount++;
+                } else {
+                    failedCount++;
+                    console.error(`[DELETE DEBUG] Failed to delete thought ${chunk[r.index].getAttribute('data-thought-id')}:`, r.error);
+                }
             });
-
-            const result = await resp.json();
-            
-            if (result.success) {
-                // Remove from DOM immediately
-                thoughtElement.remove();
-                deletedCount++;
-                console.log(`[DELETE DEBUG] Successfully deleted thought ${thoughtId}`);
-            } else {
-                failedCount++;
-                console.error(`[DELETE DEBUG] Failed to delete thought ${thoughtId}:`, result.error);
-            }
         } catch (error) {
-            failedCount++;
-            console.error(`[DELETE DEBUG] Error deleting thought ${thoughtId}:`, error);
+            failedCount += chunk.length;
+            console.error('[DELETE DEBUG] Error in bulk delete:', error);
         }
     }
     
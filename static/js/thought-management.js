@@ -37,6 +37,118 @@ function initializeThoughtManagement() {
             addBtn.click();
         }
     });
+
+    initializeThoughtSelection();
+}
+
+/**
+ * Apply several thought operations in one request and one transaction.
+ * ops: [{op: 'add', content, quadrant} | {op: 'move', thought_id, quadrant} |
+ *       {op: 'update', thought_id, content} | {op: 'delete', thought_id}]
+ * Resolves to the server reply: {success, applied, results: [{index, op, success, error?, thought?}]}
+ */
+async function applyThoughtBatch(ops, atomic = false) {
+    const result = await postJSON('/thoughts/batch', {
+        board_id: getCurrentBoardId(),
+        ops: ops,
+        atomic: atomic,
+        // Moves, edits and deletes must not overwrite changes this client has not seen
+        revision: ops.some(op => op.op !== 'add') ? window.boardRevision : undefined
+    });
+    trackBoardRevision(result.revision);
+    return result;
+}
+
+/**
+ * Add several thoughts at once (accepted AI suggestions); items: [{quadrant, thought}]
+ */
+async function addThoughtsInBatch(items) {
+    if (!items.length) return;
+    try {
+        const result = await applyThoughtBatch(items.map(item => ({
+            op: 'add',
+            content: item.thought,
+            quadrant: item.quadrant
+        })));
+        result.results.forEach(r => {
+            const item = items[r.index];
+            if (r.success) {
+                // The SSE thought_added event may already have inserted it
+                applyThoughtAdded({ thought: r.thought });
+            } else {
+                dlog(`[DEBUG] Batch add skipped "${item.thought}":`, r.error);
+            }
+        });
+        if (window.debouncedSummaryRefresh) window.debouncedSummaryRefresh();
+    } catch (error) {
+        derror('[ERROR] Failed to add thoughts:', error);
+        if (error && error.status === 429) {
+            showNotification('AI quota exceeded (429). Try again later.', true);
+        } else {
+            showNotification('Error adding thoughts. Please try again.', true);
+        }
+    }
+}
+
+/**
+ * Multi-select: Ctrl/Cmd/Shift-click toggles a thought, Escape clears the selection,
+ * Delete removes the selected thoughts; dragging a selected thought moves all of them
+ */
+function initializeThoughtSelection() {
+    document.addEventListener('click', function (e) {
+        const item = e.target.closest('.thought-item');
+        if (!item || e.target.closest('button, select, input')) return;
+        if (e.ctrlKey || e.metaKey || e.shiftKey) {
+            e.preventDefault();
+            item.classList.toggle('selected');
+        }
+    });
+
+    document.addEventListener('keydown', function (e) {
+        if (['INPUT', 'TEXTAREA', 'SELECT'].includes(document.activeElement?.tagName)) return;
+        if (e.key === 'Escape') {
+            clearThoughtSelection();
+        } else if ((e.key === 'Delete' || e.key === 'Backspace') && getSelectedThoughtIds().length) {
+            e.preventDefault();
+            deleteSelectedThoughts();
+        }
+    });
+}
+
+function getSelectedThoughtIds() {
+    return Array.from(document.querySelectorAll('.thought-item.selected'))
+        .map(item => item.getAttribute('data-thought-id'));
+}
+
+function clearThoughtSelection() {
+    document.querySelectorAll('.thought-item.selected').forEach(item => item.classList.remove('selected'));
+}
+
+/**
+ * Delete all selected thoughts in one batch
+ */
+async function deleteSelectedThoughts() {
+    const ids = getSelectedThoughtIds();
+    if (!ids.length) return;
+    const confirmed = await showConfirm(`Delete ${ids.length} selected thought${ids.length > 1 ? 's' : ''}?`);
+    if (!confirmed) return;
+
+    try {
+        const result = await applyThoughtBatch(ids.map(id => ({ op: 'delete', thought_id: id })));
+        result.results.forEach(r => {
+            if (r.success) {
+                document.querySelector(`[data-thought-id="${ids[r.index]}"]`)?.remove();
+            }
+        });
+        const failed = ids.length - result.applied;
+        showNotification(`${result.applied} thought${result.applied === 1 ? '' : 's'} deleted` +
+            (failed ? `, ${failed} failed` : '!'), failed > 0);
+        if (window.debouncedSummaryRefresh) window.debouncedSummaryRefresh();
+    } catch (error) {
+        derror('[ERROR] Failed to delete thoughts:', error);
+        if (handleRevisionConflict(error)) return;
+        showNotification('Error deleting thoughts. Please try again.', true);
+    }
 }
 
 /**
@@ -74,11 +186,14 @@ async function handleConversationalAddThought() {
             showNotification('Thought(s) added!');
             if (window.debouncedSummaryRefresh) window.debouncedSummaryRefresh();
             
-            // Wait for notification to finish before reloading page
-            if (window.notificationTimeout) clearTimeout(window.notificationTimeout);
-            window.notificationTimeout = setTimeout(() => {
-                location.reload();
-            }, 1800);
+            // The board's event stream brings the new thoughts in; reload only without it
+            if (!boardSyncActive()) {
+                // Wait for notification to finish before reloading page
+                if (window.notificationTimeout) clearTimeout(window.notificationTimeout);
+                window.notificationTimeout = setTimeout(() => {
+                    location.reload();
+                }, 1800);
+            }
             
         } else if (result.success && result.followup && (!result.thoughts || result.thoughts.length === 0)) {
             // Only show followup if NO thoughts were added
@@ -146,8 +261,9 @@ async function handleManualAddThought() {
         if (addResult.success) {
             showNotification('Thought added!');
             newThoughtInput.value = '';
+            applyThoughtAdded({ thought: addResult.thought });
+            trackBoardRevision(addResult.revision);
             if (window.debouncedSummaryRefresh) window.debouncedSummaryRefresh();
-            setTimeout(() => location.reload(), 1200);
         } else {
             showNotification('Failed to add thought: ' + (addResult.error || 'Unknown error'), true);
         }
@@ -196,12 +312,14 @@ async function deleteThought(thoughtId, element) {
                 'Content-Type': 'application/json',
                 'X-CSRFToken': getCsrfToken()
             },
-            body: JSON.stringify({ thought_id: thoughtId })
+            body: JSON.stringify({ thought_id: thoughtId, board_id: getCurrentBoardId(), revision: window.boardRevision })
         });
 
         const result = await resp.json();
+        if (handleRevisionConflict(result)) return;
 
         if (result.success) {
+            trackBoardRevision(result.revision);
             // Remove the element from DOM
             element.closest('.thought-item').remove();
             showNotification('Thought deleted!');
@@ -257,7 +375,9 @@ async function addThought(content, quadrant) {
             const thoughtId = result.thought_id || result.thought?.id;
             if (thoughtId) {
                 dlog(`[DEBUG] Quick Add: Adding thought with ID ${thoughtId} to ${targetQuadrant} quadrant`);
-                addThoughtToDOM(targetQuadrant, content.trim(), thoughtId);
+                applyThoughtAdded({
+                    thought: { id: thoughtId, content: content.trim(), quadrant: targetQuadrant }
+                });
             } else {
                 dlog('[DEBUG] Quick Add: No thought ID returned, will reload page');
                 setTimeout(() => location.reload(), 1000);
@@ -292,7 +412,10 @@ function getCurrentBoardId() {
  */
 function dragThought(event, thoughtId) {
     dlog('dragThought called', thoughtId);
-    event.dataTransfer.setData('text/plain', thoughtId);
+    // Dragging one of several selected thoughts carries the whole selection
+    const selected = getSelectedThoughtIds();
+    const ids = selected.includes(String(thoughtId)) ? selected : [String(thoughtId)];
+    event.dataTransfer.setData('text/plain', ids.join(','));
     event.dataTransfer.effectAllowed = 'move';
 }
 
@@ -320,14 +443,43 @@ function dragLeave(event) {
 
 function dropThought(event, targetQuadrant) {
     event.preventDefault();
-    const thoughtId = event.dataTransfer.getData('text/plain');
-    dlog('dropThought', thoughtId, 'to', targetQuadrant);
+    const thoughtIds = event.dataTransfer.getData('text/plain').split(',').filter(Boolean);
+    dlog('dropThought', thoughtIds, 'to', targetQuadrant);
     
     // Clear drag highlighting
     clearTrashHighlight();
     
-    // Move the thought
-    moveThought(thoughtId, targetQuadrant, null);
+    // Move the thought, or all selected thoughts in one batch
+    if (thoughtIds.length > 1) {
+        moveThoughts(thoughtIds, targetQuadrant);
+    } else if (thoughtIds.length === 1) {
+        moveThought(thoughtIds[0], targetQuadrant, null);
+    }
+}
+
+/**
+ * Move several thoughts to a quadrant in one batch
+ */
+async function moveThoughts(thoughtIds, newQuadrant) {
+    try {
+        const result = await applyThoughtBatch(thoughtIds.map(id => ({
+            op: 'move',
+            thought_id: id,
+            quadrant: newQuadrant
+        })));
+        result.results.forEach(r => {
+            if (r.success) updateThoughtLocationInDOM(r.thought_id, newQuadrant);
+        });
+        clearThoughtSelection();
+        const failed = thoughtIds.length - result.applied;
+        showNotification(`${result.applied} thoughts moved to ${newQuadrant}` +
+            (failed ? `, ${failed} failed` : '!'), failed > 0);
+        if (window.debouncedSummaryRefresh) window.debouncedSummaryRefresh();
+    } catch (error) {
+        derror('[ERROR] Failed to move thoughts:', error);
+        if (handleRevisionConflict(error)) return;
+        showNotification('Error moving thoughts. Please try again.', true);
+    }
 }
 
 /**
@@ -338,18 +490,21 @@ async function moveThought(thoughtId, newQuadrant, element) {
         const result = await postJSON('/move_thought', { 
             thought_id: thoughtId, 
             quadrant: newQuadrant,
-            board_id: getCurrentBoardId()
+            board_id: getCurrentBoardId(),
+            revision: window.boardRevision
         });
 
         if (result.success) {
+            trackBoardRevision(result.revision);
             showNotification(`Thought moved to ${newQuadrant}!`);
+            updateThoughtLocationInDOM(thoughtId, newQuadrant);
             if (window.debouncedSummaryRefresh) window.debouncedSummaryRefresh();
-            setTimeout(() => location.reload(), 1000);
         } else {
             showNotification('Failed to move thought: ' + (result.error || 'Unknown error'), true);
         }
     } catch (error) {
         derror('[ERROR] Failed to move thought:', error);
+        if (handleRevisionConflict(error)) return;
         if (error && error.status === 429) {
             showNotification('AI quota exceeded (429). Try again later.', true);
         } else {
@@ -369,12 +524,15 @@ async function editThought(thoughtId, currentContent, element) {
     }
 
     try {
-        const result = await postJSON('/edit_thought', { 
+        const result = await postJSON('/update_thought', { 
             thought_id: thoughtId, 
-            content: newContent.trim() 
+            content: newContent.trim(),
+            board_id: getCurrentBoardId(),
+            revision: window.boardRevision
         });
 
         if (result.success) {
+            trackBoardRevision(result.revision);
             // Update the element content
             const contentElement = element.closest('.thought-item').querySelector('.thought-content');
             if (contentElement) {
@@ -387,6 +545,7 @@ async function editThought(thoughtId, currentContent, element) {
         }
     } catch (error) {
         derror('[ERROR] Failed to edit thought:', error);
+        if (handleRevisionConflict(error)) return;
         if (error && error.status === 429) {
             showNotification('AI quota exceeded (429). Try again later.', true);
         } else {
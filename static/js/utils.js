@@ -105,7 +105,7 @@ function updateQuadrantInBackground(quadrant, thought, thoughtId = null) {
         if (result && result.success) {
             const createdId = result.thought_id || (result.thought && result.thought.id);
             dlog(`[DEBUG] Successfully saved thought to database with ID: ${createdId}`);
-            addThoughtToDOM(quadrant, thought, createdId);
+            applyThoughtAdded({ thought: { id: createdId, content: thought, quadrant: quadrant } });
         } else {
             derror(`[DEBUG] Failed to save thought to database:`, result && (result.error || result.message));
             addThoughtToDOM(quadrant, thought, thoughtId || 0);
@@ -145,27 +145,48 @@ function addThoughtToDOM(quadrant, thought, thoughtId) {
         return;
     }
     
-    // Create new thought element (matching template structure)
+    // Create new thought element (matching template structure). The content is set as
+    // text and the handlers read the id from data-thought-id, so neither thought text
+    // nor ids (numeric or UUID) are ever parsed as markup or script.
     const thoughtElement = document.createElement('li');
     thoughtElement.className = 'thought-item';
+    thoughtElement.draggable = true;
     thoughtElement.setAttribute('data-thought-id', thoughtId);
-    const escapedThought = thought.replace(/'/g, "\\'");
-    
-    thoughtElement.innerHTML = `
-        <span class="thought-content">${thought}</span>
-        <div class="thought-controls">
-            <button onclick="editThought(${thoughtId}, '${escapedThought}', this)" title="Edit">✏️</button>
-            <select onchange="moveThought(${thoughtId}, this.value, this)">
-                <option value="">Move to...</option>
-                <option value="goal">Goal</option>
-                <option value="analysis">Analysis</option>
-                <option value="plan">Plan</option>
-                <option value="status">Status</option>
-            </select>
-            <button onclick="deleteThought(${thoughtId}, this)" title="Delete">🗑️</button>
-        </div>
-    `;
-    
+    thoughtElement.setAttribute('data-quadrant', quadrant);
+    const idOf = el => el.closest('.thought-item').getAttribute('data-thought-id');
+    thoughtElement.addEventListener('dragstart', event => dragThought(event, idOf(thoughtElement)));
+    thoughtElement.addEventListener('dragend', () => clearTrashHighlight());
+
+    const content = document.createElement('span');
+    content.className = 'thought-content';
+    content.textContent = thought;
+
+    const controls = document.createElement('div');
+    controls.className = 'thought-controls';
+
+    const editButton = document.createElement('button');
+    editButton.title = 'Edit';
+    editButton.textContent = '✏️';
+    editButton.addEventListener('click', () => editThought(idOf(editButton), content.textContent, editButton));
+
+    const moveSelect = document.createElement('select');
+    [['', 'Move to...'], ['goal', 'Goal'], ['analysis', 'Analysis'], ['plan', 'Plan'], ['status', 'Status']]
+        .forEach(([value, label]) => {
+            const option = document.createElement('option');
+            option.value = value;
+            option.textContent = label;
+            moveSelect.appendChild(option);
+        });
+    moveSelect.addEventListener('change', () => moveThought(idOf(moveSelect), moveSelect.value, moveSelect));
+
+    const deleteButton = document.createElement('button');
+    deleteButton.title = 'Delete';
+    deleteButton.textContent = '🗑️';
+    deleteButton.addEventListener('click', () => deleteThought(idOf(deleteButton), deleteButton));
+
+    controls.append(editButton, moveSelect, deleteButton);
+    thoughtElement.append(content, controls);
+
     // Add to quadrant
     container.appendChild(thoughtElement);
     
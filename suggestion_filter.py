@@ -0,0 +1,220 @@
+"""
+Suggestion Filter for Interactive Mode
+Single-pass filtering of AI quadrant suggestions: meta-conversational phrases,
+duplicates of existing board items, and near-duplicates within one reply
+"""
+
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, FrozenSet, List, Optional
+
+from debug_logger import debug_logger
+
+# Phrases that mark a suggestion as conversation about the board rather than board content
+META_FILTERS = [
+    'quadrants are currently empty',
+    'quadrants are empty',
+    'user requested a summary',
+    'user requested recommendations',
+    'provide recommendations for how to proceed',
+    'need recommendations',
+    'should start with goals',
+    'should start with',
+    'recommendations for how to proceed',
+    # Greeting and conversational content filters
+    'i can help you solve problems',
+    'what gap is on your mind',
+    'what problem are you hoping to solve',
+    'tell me about your goals',
+    'which area would you like to start',
+    'anything more for goals',
+    'anything else you want to add',
+    'ok? anything more',
+    'want to move or edit it',
+    'edit wording or move it',
+    'how do you think this might be impacting',
+    'what do you think about',
+    'does that sound right',
+    'make sense?',
+    'sound good?',
+    'i see you have a goal',
+    'what would you like to work on next',
+    'goals, status, analysis, or plans',
+    'which quadrant should we work on',
+    'what should we focus on'
+]
+
+# Leading phrases that differ between rule-based and AI wording of the same thought
+SEMANTIC_PREFIXES = ('i want to ', 'we need to ', 'goal is to ', 'plan to ')
+
+# Boards whose existing-items index is kept (least recently used ones are rebuilt on demand)
+MAX_CACHED_BOARDS = 256
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and collapse whitespace for duplicate comparison."""
+    return ' '.join((text or '').lower().split())
+
+
+class SuggestionFilter:
+    """
+    Reusable filter stage for `add_to_quadrant` suggestions.
+
+    - Meta phrases are matched with one compiled alternation instead of ~30 `in` scans
+    - Token sets are built once per suggestion and near-duplicates are found through an
+      inverted token index, so each suggestion only touches suggestions sharing a word
+    - Normalized existing quadrant items are cached per board and rebuilt only when the
+      quadrant contents change; at most `max_boards` boards are kept
+    """
+
+    def __init__(self, meta_phrases: Optional[List[str]] = None, similarity_threshold: float = 0.8, logger=None,
+                 max_boards: int = MAX_CACHED_BOARDS):
+        phrases = sorted(set(meta_phrases or META_FILTERS), key=len, reverse=True)
+        self._meta_re = re.compile('|'.join(re.escape(p) for p in phrases))
+        self.similarity_threshold = similarity_threshold
+        self.logger = logger or debug_logger
+        self.max_boards = max_boards
+        self._board_index: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def is_meta(self, normalized_text: str) -> bool:
+        """True if the (normalized) text contains any meta-conversational phrase."""
+        return self._meta_re.search(normalized_text) is not None
+
+    @staticmethod
+    def semantic_key(normalized_text: str) -> str:
+        """Strip a leading intent prefix so 'I want to X' and 'X' compare equal."""
+        for prefix in SEMANTIC_PREFIXES:
+            if normalized_text.startswith(prefix):
+                return normalized_text[len(prefix):]
+        return normalized_text
+
+    def existing_index(self, quadrants: Optional[Dict[str, List[str]]], board_id=None) -> FrozenSet[str]:
+        """
+        Normalized set of existing quadrant items, cached per board.
+        The cache key is the quadrant contents themselves, so edits invalidate it automatically.
+        """
+        quadrants = quadrants or {}
+        key = tuple((q, tuple(items or [])) for q, items in sorted(quadrants.items()))
+        if board_id is not None:
+            with self._lock:
+                cached = self._board_index.get(str(board_id))
+                if cached:
+                    self._board_index.move_to_end(str(board_id))
+            if cached and cached[0] == key:
+                return cached[1]
+        index = frozenset(normalize_text(item) for _, items in key for item in items)
+        if board_id is not None:
+            with self._lock:
+                self._board_index[str(board_id)] = (key, index)
+                self._board_index.move_to_end(str(board_id))
+                while len(self._board_index) > self.max_boards:
+                    self._board_index.popitem(last=False)
+        return index
+
+    def invalidate(self, board_id) -> None:
+        """Drop the cached existing-items index for a board."""
+        with self._lock:
+            self._board_index.pop(str(board_id), None)
+
+    def filter(self, suggestions: List[Dict], quadrants: Optional[Dict[str, List[str]]] = None,
+               board_id=None, existing: Optional[FrozenSet[str]] = None,
+               known_duplicate: Optional[Callable[[str], bool]] = None) -> List[Dict]:
+        """
+        Filter a list of {'quadrant', 'thought'} suggestions in a single pass.
+
+        Args:
+            suggestions: Suggestions parsed from the AI reply
+            quadrants: Current quadrant contents used for duplicate detection
+            board_id: Board the suggestions are for (enables the per-board index cache)
+            existing: Precomputed normalized existing items (overrides quadrants)
+            known_duplicate: Optional lookup (e.g. the board's near-duplicate index) returning
+                True when the thought text is already stored on the board
+
+        Returns:
+            Suggestions that are not meta-conversational, not already on the board
+            and not near-duplicates of an earlier suggestion in the same reply
+        """
+        if existing is None:
+            existing = self.existing_index(quadrants, board_id=board_id)
+        log = self.logger.log
+        # Skip building per-suggestion log entries when nothing would keep them
+        verbose = self.logger.enabled('filtering') if hasattr(self.logger, 'enabled') else True
+        if verbose:
+            log('filtering', 'Starting suggestion filtering', {
+                'total_suggestions': len(suggestions),
+                'existing_items_count': len(existing)
+            })
+
+        kept = []
+        kept_tokens: List[FrozenSet[str]] = []
+        postings: Dict[str, List[int]] = {}
+        for suggestion in suggestions:
+            raw = suggestion.get('thought', '') if isinstance(suggestion, dict) else ''
+            thought_text = normalize_text(raw)
+
+            # Check for meta-conversational content
+            if self.is_meta(thought_text):
+                if verbose:
+                    log('filtering', 'Filtered meta-suggestion', {
+                        'suggestion': raw[:100],
+                        'reason': 'Meta-conversational content'
+                    })
+                continue
+
+            # Check for duplicates against existing quadrant items
+            if thought_text in existing:
+                if verbose:
+                    log('filtering', 'Filtered duplicate suggestion', {
+                        'suggestion': raw[:100],
+                        'reason': 'Already exists in quadrants'
+                    })
+                continue
+            if known_duplicate is not None and known_duplicate(raw):
+                if verbose:
+                    log('filtering', 'Filtered duplicate suggestion', {
+                        'suggestion': raw[:100],
+                        'reason': 'Near-duplicate of an existing board thought'
+                    })
+                continue
+
+            # Near-duplicates among suggestions already kept: count shared words via the
+            # inverted index (80% of the larger word set must overlap)
+            tokens = frozenset(self.semantic_key(thought_text).split())
+            overlaps = Counter(idx for tok in tokens for idx in postings.get(tok, ()))
+            similarity = 0.0
+            for idx, overlap in overlaps.items():
+                similarity = overlap / max(len(tokens), len(kept_tokens[idx]))
+                if similarity >= self.similarity_threshold:
+                    break
+            if tokens and similarity >= self.similarity_threshold:
+                if verbose:
+                    log('filtering', 'Filtered semantic duplicate', {
+                        'suggestion': raw[:100],
+                        'similarity': round(similarity, 2),
+                        'reason': 'Similar to previous suggestion'
+                    })
+                continue
+
+            # Keep non-meta, non-duplicate suggestions
+            for tok in tokens:
+                postings.setdefault(tok, []).append(len(kept_tokens))
+            kept_tokens.append(tokens)
+            kept.append(suggestion)
+            if verbose:
+                log('filtering', 'Kept suggestion', {
+                    'suggestion': raw[:100],
+                    'quadrant': suggestion.get('quadrant', 'unknown')
+                })
+
+        if verbose:
+            log('filtering', 'Filtering complete', {
+                'final_suggestions_count': len(kept),
+                'filtered_out_count': len(suggestions) - len(kept)
+            })
+        return kept
+
+
+# Global suggestion filter instance
+suggestion_filter = SuggestionFilter()
@@ -1,4 +1,3 @@
-import openai
 from models import ConversationTurn, db
 from sqlalchemy import asc
 
@@ -25,15 +24,10 @@ def summarize_conversation(board_id, keep_last_n=6):
         "Focus on key issues, goals, and progress. Be concise.\n\n"
         f"{convo_text}"
     )
-    # Use the global OpenAI client from openai_api.py
-    from openai_api import client
-    response = client.ChatCompletion.create(
-        model="gpt-3.5-turbo",
-        messages=[{"role": "system", "content": prompt}],
-        temperature=0.2,
-        max_tokens=200
-    )
-    summary = response.choices[0].message.content.strip()
+    # Model per OPENAI_ENDPOINT_MODELS (summarize_conversation), with cost tracking and retries
+    from openai_api import complete
+    summary = complete("summarize_conversation", [{"role": "system", "content": prompt}],
+                       max_tokens=200, temperature=0.2)
     # Store summary turn
     db.session.add(ConversationTurn(
         board_id=board_id,
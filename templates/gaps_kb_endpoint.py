@@ -1,14 +1,31 @@
-from flask import Blueprint, jsonify
-import os
+from flask import Blueprint, jsonify, request
+from utils.http_cache import conditional, hashed_etag
+from utils.knowledge_base import knowledge_base, KB_CACHE_SECONDS
 
 kb_blueprint = Blueprint('kb_blueprint', __name__)
 
+# The KB is the same for everyone and only changes when the file is edited
+KB_CACHE_CONTROL = f'public, max-age={KB_CACHE_SECONDS}'
+
 @kb_blueprint.route('/gaps_kb', methods=['GET'])
 def serve_gaps_kb():
-    kb_path = os.path.join(os.path.dirname(__file__), '../prompts/gaps_knowledge_base.md')
+    # Served from the parsed in-memory copy; reloaded only when the file changes
+    try:
+        etag, modified = knowledge_base.validators()
+        return conditional(lambda: jsonify({'content': knowledge_base.content()}), etag, modified, KB_CACHE_CONTROL)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@kb_blueprint.route('/gaps_kb/search', methods=['GET'])
+def search_gaps_kb():
+    query = request.args.get('q', '')
+    try:
+        k = max(1, min(int(request.args.get('k', 3)), 10))
+    except ValueError:
+        k = 3
     try:
-        with open(kb_path, 'r', encoding='utf-8') as f:
-            kb_content = f.read()
-        return jsonify({'content': kb_content})
+        etag, modified = knowledge_base.validators()
+        return conditional(lambda: jsonify({'query': query, 'results': knowledge_base.search(query, k)}),
+                           hashed_etag('kb-search', etag, query, k), modified, KB_CACHE_CONTROL)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -0,0 +1,99 @@
+import glob
+import hashlib
+import os
+import threading
+
+STATIC_DIR = os.path.join(os.path.dirname(__file__), '../static')
+# Files served under content-hashed URLs (relative to static/)
+ASSET_PATTERNS = ('js/*.js', 'css/*.css', '*.js', '*.css')
+
+# Fingerprinted URLs never change content, so browsers may keep them for a year
+ASSET_MAX_AGE = int(os.environ.get('ASSET_MAX_AGE', str(365 * 24 * 3600)))
+# Re-hash assets whose file changed (development); otherwise the manifest is built once
+ASSET_MANIFEST_RELOAD = os.environ.get('ASSET_MANIFEST_RELOAD', 'false').lower() == 'true'
+
+
+def _fingerprinted(path, digest):
+    root, ext = os.path.splitext(path)
+    return f'{root}.{digest}{ext}'
+
+
+class AssetManifest:
+    """
+    Content hashes of the static JS and CSS, built once: 'js/api.js' is served as
+    /assets/js/api.<hash>.js, so its URL only changes when the file does.
+    """
+
+    def __init__(self, static_dir=STATIC_DIR, patterns=ASSET_PATTERNS, reload=ASSET_MANIFEST_RELOAD):
+        self.static_dir = os.path.abspath(static_dir)
+        self.patterns = patterns
+        self.reload = reload
+        self._lock = threading.Lock()
+        self._entries = None    # 'js/api.js' -> (signature, digest)
+        self._files = {}        # 'js/api.<hash>.js' -> 'js/api.js'
+        self.version = None     # digest over all assets; changes when any of them does
+
+    def _signature(self, path):
+        st = os.stat(os.path.join(self.static_dir, path))
+        return st.st_mtime_ns, st.st_size
+
+    def _hash(self, path):
+        with open(os.path.join(self.static_dir, path), 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()[:12]
+
+    def _scan(self):
+        paths = set()
+        for pattern in self.patterns:
+            for full in glob.glob(os.path.join(self.static_dir, pattern)):
+                paths.add(os.path.relpath(full, self.static_dir).replace(os.sep, '/'))
+        return sorted(paths)
+
+    def build(self):
+        """Hash the assets, reusing the digest of files whose mtime and size are unchanged."""
+        with self._lock:
+            previous = self._entries or {}
+            entries = {}
+            for path in self._scan():
+                signature = self._signature(path)
+                old = previous.get(path)
+                entries[path] = (signature, old[1] if old and old[0] == signature else self._hash(path))
+            self._files = {_fingerprinted(path, digest): path for path, (_, digest) in entries.items()}
+            self.version = hashlib.sha256(''.join(f'{p}:{d};' for p, (_, d) in entries.items())
+                                          .encode('utf-8')).hexdigest()[:12]
+            self._entries = entries
+
+    def _ensure_built(self):
+        if self._entries is None:
+            self.build()
+        elif self.reload and any(self._signature(path) != signature
+                                 for path, (signature, _) in self._entries.items()
+                                 if os.path.exists(os.path.join(self.static_dir, path))):
+            self.build()
+
+    def url(self, path):
+        """Fingerprinted URL of a static asset; plain /static/ URL for files not in the manifest."""
+        self._ensure_built()
+        entry = self._entries.get(path)
+        if entry is None:
+            return f'/static/{path}'
+        return f'/assets/{_fingerprinted(path, entry[1])}'
+
+    def resolve(self, fingerprinted):
+        """Static path a fingerprinted name stands for, or None if the hash is not current."""
+        self._ensure_built()
+        return self._files.get(fingerprinted)
+
+    def current_url(self, fingerprinted):
+        """URL with the current hash for a fingerprinted name of an asset, or None."""
+        self._ensure_built()
+        root, ext = os.path.splitext(fingerprinted)
+        path = root.rsplit('.', 1)[0] + ext
+        return self.url(path) if path in self._entries else None
+
+    def get_version(self):
+        self._ensure_built()
+        return self.version
+
+
+# Global asset manifest instance
+asset_manifest = AssetManifest()
@@ -0,0 +1,70 @@
+import hashlib
+import re
+from datetime import timezone
+
+from flask import current_app, request
+
+# Board reads are tagged with the board's revision; writes may send it back (If-Match)
+_REVISION_ETAG = re.compile(r'^rev-(\d+)$')
+
+# Per-user JSON that changes with the data: browsers keep it but ask before reusing it
+PRIVATE_REVALIDATE = 'private, no-cache'
+
+
+def revision_etag(revision):
+    """ETag value (unquoted) for a board at the given revision."""
+    return f'rev-{revision}'
+
+
+def revision_from_etags(etags):
+    """Revision named by an If-Match header (werkzeug ETags), or None."""
+    for tag in etags.as_set() if etags else ():
+        match = _REVISION_ETAG.match(tag)
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def hashed_etag(prefix, *parts):
+    """Short ETag value (unquoted) naming the given validator parts."""
+    digest = hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:16]
+    return f'{prefix}-{digest}'
+
+
+def _utc(moment):
+    # Database timestamps are naive UTC; werkzeug compares aware datetimes
+    if moment is not None and moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
+def is_fresh(etag, last_modified=None):
+    """
+    True if the client's cached copy is current. If-None-Match wins when sent;
+    If-Modified-Since is only compared to the second, as HTTP dates are.
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    if since is not None and last_modified is not None:
+        return _utc(last_modified).replace(microsecond=0) <= since
+    return False
+
+
+def conditional(build, etag, last_modified=None, cache_control=PRIVATE_REVALIDATE):
+    """
+    Response for a GET whose validators are known up front: 304 if the client's copy is
+    fresh, otherwise whatever build() returns. build() is only called on a miss, so an
+    unchanged resource is never loaded or serialized.
+    """
+    if is_fresh(etag, last_modified):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.make_response(build())
+        if response.status_code != 200:
+            return response
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = _utc(last_modified)
+    response.headers['Cache-Control'] = cache_control
+    return response
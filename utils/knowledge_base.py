@@ -1,35 +1,162 @@
+import hashlib
 import os
+import re
+import threading
+from datetime import datetime
+
+from utils.text_index import BM25Index
 
 KB_PATH = os.path.join(os.path.dirname(__file__), '../prompts/gaps_knowledge_base.md')
 
-# Load the entire knowledge base file into memory (simple, as it's not huge)
+# Passages retrieved per facilitator turn, the prompt budget they may use, and the BM25
+# score below which a passage is considered unrelated
+KB_RETRIEVAL_TOP_K = int(os.environ.get('KB_RETRIEVAL_TOP_K', '2'))
+KB_CONTEXT_MAX_CHARS = int(os.environ.get('KB_CONTEXT_MAX_CHARS', '1200'))
+KB_MIN_SCORE = float(os.environ.get('KB_MIN_SCORE', '0.5'))
+# Sections longer than this are split into paragraph-sized passages for retrieval
+KB_PASSAGE_CHARS = int(os.environ.get('KB_PASSAGE_CHARS', '600'))
+# How long browsers may reuse /gaps_kb responses before revalidating them
+KB_CACHE_SECONDS = int(os.environ.get('KB_CACHE_SECONDS', '300'))
+
+
+def _normalize_heading(text):
+    # Remove leading #, dashes, spaces, numbers and periods, then all dashes and spaces
+    normalized = text.lower().lstrip('#- ').strip()
+    normalized = re.sub(r'^[0-9]+\.?\s*', '', normalized)
+    return normalized.replace('-', '').replace(' ', '')
+
+
+class KnowledgeBase:
+    """
+    The GAPS knowledge base parsed once into a heading -> section index plus a BM25 index
+    over passages; reparsed when the file's mtime or size changes.
+    """
+
+    def __init__(self, path=KB_PATH):
+        self.path = path
+        self._signature = None
+        self._lock = threading.Lock()
+        self.text = ''
+        self.sections = {}      # normalized heading -> section body
+        self.headings = []      # normalized headings in file order
+        self.passages = []      # (heading, text)
+        self.etag = None        # content hash of the loaded text
+        self.modified = None    # file mtime (UTC) of the loaded text
+        self._index = BM25Index([])
+
+    def _ensure_loaded(self):
+        st = os.stat(self.path)
+        signature = (st.st_mtime_ns, st.st_size)
+        if signature == self._signature:
+            return
+        with self._lock:
+            if signature != self._signature:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._parse(f.read())
+                self.modified = datetime.utcfromtimestamp(st.st_mtime)
+                self._signature = signature
+
+    def _parse(self, text):
+        sections, headings, titles, body, top = {}, [], {}, {}, set()
+        # A section runs from its heading to the next '## ' heading (subsections included)
+        for line in text.split('\n'):
+            stripped = line.strip()
+            if stripped.startswith('#'):
+                if stripped.startswith('## ') or stripped.startswith('# '):
+                    for key, lines in body.items():
+                        sections.setdefault(key, '\n'.join(lines).strip())
+                    body = {}
+                    top.add(_normalize_heading(stripped))
+                key = _normalize_heading(stripped)
+                if key:
+                    headings.append(key)
+                    titles.setdefault(key, stripped.lstrip('#').strip())
+                    body.setdefault(key, [])
+                continue
+            for lines in body.values():
+                lines.append(line)
+        for key, lines in body.items():
+            sections.setdefault(key, '\n'.join(lines).strip())
+
+        # Retrieval passages: top-level sections, split at paragraphs when long
+        passages = []
+        for key in dict.fromkeys(headings):
+            if key not in top or key not in sections:
+                continue
+            content = re.sub(r'^\s*-{3,}\s*$', '', sections[key], flags=re.M).strip()
+            chunk = []
+            for paragraph in re.split(r'\n\s*\n', content):
+                if chunk and len('\n\n'.join(chunk + [paragraph])) > KB_PASSAGE_CHARS:
+                    passages.append((titles[key], '\n\n'.join(chunk)))
+                    chunk = []
+                if paragraph.strip():
+                    chunk.append(paragraph.strip())
+            if chunk:
+                passages.append((titles[key], '\n\n'.join(chunk)))
+
+        self.text, self.sections, self.headings = text, sections, headings
+        self.etag = 'kb-' + hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+        self.passages = passages
+        self._index = BM25Index(title + '\n' + body_text for title, body_text in passages)
+
+    def content(self):
+        self._ensure_loaded()
+        return self.text
+
+    def validators(self):
+        """(ETag, last modified) of the current text, for HTTP caching."""
+        self._ensure_loaded()
+        return self.etag, self.modified
+
+    def section(self, section_name):
+        """Body of the section whose heading matches `section_name` (exact, then prefix), or ''."""
+        self._ensure_loaded()
+        target = _normalize_heading(section_name)
+        if target in self.sections:
+            return self.sections[target]
+        for key in self.headings:
+            if key.startswith(target):
+                return self.sections[key]
+        return ''
+
+    def search(self, query, k=KB_RETRIEVAL_TOP_K, min_score=KB_MIN_SCORE):
+        """Top-k passages for `query` by BM25: [{'heading', 'text', 'score'}]."""
+        self._ensure_loaded()
+        return [{'heading': self.passages[i][0], 'text': self.passages[i][1], 'score': round(score, 3)}
+                for i, score in self._index.search(query or '', k, min_score)]
+
+    def context(self, query, k=KB_RETRIEVAL_TOP_K, max_chars=KB_CONTEXT_MAX_CHARS):
+        """Most relevant passages formatted for a prompt, within `max_chars`; '' when none match."""
+        parts, used = [], 0
+        for hit in self.search(query, k):
+            block = f"[{hit['heading']}]\n{hit['text']}"
+            if used + len(block) > max_chars:
+                if parts:
+                    break
+                block = block[:max_chars]
+            parts.append(block)
+            used += len(block)
+        return '\n\n'.join(parts)
+
+
+# Global knowledge base instance
+knowledge_base = KnowledgeBase()
+
+
+# Kept for callers that want the raw markdown
 def load_kb():
-    with open(KB_PATH, 'r', encoding='utf-8') as f:
-        return f.read()
+    return knowledge_base.content()
+
 
-# Simple section extractor by heading name
+# Section extractor by heading name
 def get_kb_section(section_name):
-    kb = load_kb()
-    lines = kb.split('\n')
-    section_lines = []
-    in_section = False
-    # Normalize the section name for flexible matching
-    target = section_name.lower().strip().replace('-', '').replace(' ', '')
-    import re
-    for line in lines:
-        # Remove leading #, dashes, spaces, numbers, and periods for matching
-        normalized = line.lower().lstrip('#- ').strip()
-        normalized = re.sub(r'^[0-9]+\.?\s*', '', normalized)  # Remove leading numbers and periods
-        normalized = normalized.replace('-', '').replace(' ', '')
-        if normalized.startswith(target):
-            in_section = True
-            continue
-        if in_section and line.strip().startswith('## '):
-            break
-        if in_section:
-            section_lines.append(line)
-    return '\n'.join(section_lines).strip() if section_lines else ''
+    return knowledge_base.section(section_name)
+
+
+def search_kb(query, k=KB_RETRIEVAL_TOP_K):
+    return knowledge_base.search(query, k)
 
 # Example usage:
 # get_kb_section('Quadrant Definitions')
 # get_kb_section('Step-by-Step GAPS Process')
+# search_kb('how do the quadrants work together?')
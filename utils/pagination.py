@@ -0,0 +1,62 @@
+import base64
+import binascii
+import json
+import os
+
+from sqlalchemy import tuple_
+
+# Page size used when a list endpoint gets no ?limit=, and the largest page it will serve
+PAGE_SIZE_DEFAULT = int(os.environ.get('PAGE_SIZE_DEFAULT', '50'))
+PAGE_SIZE_MAX = int(os.environ.get('PAGE_SIZE_MAX', '200'))
+
+
+class InvalidCursor(ValueError):
+    """A cursor that was not produced by encode_cursor for the same ordering."""
+
+
+def page_limit(value, default=PAGE_SIZE_DEFAULT, maximum=PAGE_SIZE_MAX):
+    """Clamp a requested page size to 1..maximum; missing or malformed values give the default."""
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(limit, maximum))
+
+
+def encode_cursor(values):
+    """Opaque URL-safe token holding the sort key of the last row of a page."""
+    raw = json.dumps(list(values), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, size):
+    """The sort key stored in token; raises InvalidCursor unless it has `size` scalar values."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw.decode('utf-8'))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidCursor('Malformed cursor') from e
+    if not isinstance(values, list) or len(values) != size or \
+            not all(isinstance(v, (str, int)) and not isinstance(v, bool) for v in values):
+        raise InvalidCursor('Malformed cursor')
+    return values
+
+
+def keyset_page(query, columns, cursor=None, limit=PAGE_SIZE_DEFAULT, descending=False):
+    """
+    One page of query ordered by columns (which must end in a unique column), starting
+    after the row the cursor points at. Returns (rows, next_cursor); next_cursor is None
+    on the last page. The query should filter on the leading columns of an index that
+    continues with `columns` so each page is an index range scan.
+    """
+    order = [c.desc() if descending else c.asc() for c in columns]
+    query = query.order_by(*order)
+    if cursor:
+        key = tuple_(*columns)
+        values = tuple_(*decode_cursor(cursor, len(columns)))
+        query = query.filter(key < values if descending else key > values)
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(getattr(rows[-1], c.key) for c in columns)
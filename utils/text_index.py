@@ -0,0 +1,59 @@
+import math
+import re
+from collections import Counter
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from has have how i if in into is it its me my of on or
+our so that the their then there these this to was we what when where which who why will with you your
+""".split())
+
+
+def stem(token):
+    # Just enough folding to match singular and plural quadrant names (analysis/analyses, statuses)
+    if len(token) > 4:
+        if token.endswith('ies'):
+            return token[:-3] + 'y'
+        if token.endswith(('sis', 'ses')):
+            return token[:-2]
+        if token.endswith('s') and not token.endswith(('ss', 'us')):
+            return token[:-1]
+    return token
+
+
+def tokenize(text):
+    """Lowercased, stemmed word tokens without stopwords."""
+    return [stem(t) for t in _TOKEN_RE.findall((text or '').lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of documents, searched through an inverted index."""
+
+    def __init__(self, documents, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings = {}     # term -> [(document index, term frequency)]
+        self._lengths = []
+        for i, doc in enumerate(documents):
+            counts = Counter(tokenize(doc))
+            self._lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self._postings.setdefault(term, []).append((i, tf))
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+
+    def __len__(self):
+        return len(self._lengths)
+
+    def search(self, query, k=None, min_score=0.0):
+        """[(document index, score)] best first, at most k, scores of at least min_score."""
+        n = len(self._lengths)
+        scores = Counter()
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for i, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[i] / (self._avg_length or 1))
+                scores[i] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return [(i, score) for i, score in scores.most_common(k) if score > 0 and score >= min_score]